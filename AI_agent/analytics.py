@@ -0,0 +1,229 @@
+# analytics.py
+"""
+Vectorized range analytics over the hourly usage rollup.
+
+Trend questions ("last 30 days trend", "peak hours this quarter") used to reach
+the LLM as raw grouped rows, leaving it to work out trends by hand. Here a
+range is loaded ONCE into compact parallel arrays, one entry per rollup row:
+
+    day      int32    days since the range start
+    hour     int8     hour of day (0-23)
+    app      int32    index into UsageArrays.apps
+    category int32    index into UsageArrays.categories
+    ms       int64    milliseconds
+    verdict  int8     index into VERDICTS (categories.type, like productivity.py)
+
+and every report is a handful of NumPy reductions (bincount, cumsum, masks)
+over those arrays, so even a full year costs milliseconds.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from rollup_cache import get_rollup_cache
+
+VERDICTS = ("productive", "neutral", "distracted")
+DEFAULT_VERDICT = "neutral"
+
+WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+MS_PER_MINUTE = 60000
+
+# Day index and verdict index are computed by SQLite, so Python never parses a date
+RANGE_ROWS_SQL = f"""
+SELECT CAST(julianday(r.date) - julianday(?) AS INTEGER) AS day,
+       r.hour, r.app_name, r.category,
+       CASE COALESCE(c.type, '{DEFAULT_VERDICT}')
+           {" ".join(f"WHEN '{verdict}' THEN {index}" for index, verdict in enumerate(VERDICTS))}
+           ELSE {VERDICTS.index(DEFAULT_VERDICT)}
+       END AS verdict,
+       r.time_spent
+FROM usage_rollup r
+LEFT JOIN src.categories c ON c.name = r.category
+WHERE r.date BETWEEN ? AND ?
+"""
+
+
+class UsageArrays:
+    """One date range of the rollup as parallel NumPy arrays."""
+
+    def __init__(self, start_date, end_date, rows):
+        self.start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        self.end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        self.n_days = (self.end - self.start).days + 1
+
+        # rows: (day, hour, app_name, category, verdict index, time_spent) from RANGE_ROWS_SQL
+        day, hour, app_names, category_names, verdict, ms = zip(*rows) if rows else ((),) * 6
+        count = len(day)
+
+        self.day = np.array(day, dtype=np.int32)
+        self.hour = np.array(hour, dtype=np.int8)
+        self.verdict = np.array(verdict, dtype=np.int8)
+        self.ms = np.array([value or 0 for value in ms], dtype=np.int64)
+
+        # Names become small integer ids (first-seen order)
+        apps, categories = {}, {}
+        self.app = np.fromiter((apps.setdefault(name, len(apps)) for name in app_names), dtype=np.int32, count=count)
+        self.category = np.fromiter(
+            (categories.setdefault(name, len(categories)) for name in category_names), dtype=np.int32, count=count
+        )
+        self.apps = list(apps)
+        self.categories = list(categories)
+
+    def date_at(self, day):
+        return (self.start + timedelta(days=int(day))).strftime("%Y-%m-%d")
+
+    # === Reductions ===
+
+    def daily_totals(self, mask=None):
+        """Milliseconds per day of the range (days without data are 0)."""
+        weights = self.ms if mask is None else np.where(mask, self.ms, 0)
+        return np.bincount(self.day, weights=weights, minlength=self.n_days).astype(np.int64)
+
+    def weekday_hour_heatmap(self):
+        """7 x 24 matrix of AVERAGE milliseconds per weekday (Monday first) and hour."""
+        first_weekday = self.start.weekday()
+        weekday = (self.day + first_weekday) % 7
+        totals = np.bincount(weekday * 24 + self.hour, weights=self.ms, minlength=7 * 24).reshape(7, 24)
+        occurrences = np.bincount((np.arange(self.n_days) + first_weekday) % 7, minlength=7)
+        return totals / np.maximum(occurrences, 1)[:, None]
+
+    def hour_totals(self):
+        """Milliseconds per hour of day over the whole range."""
+        return np.bincount(self.hour, weights=self.ms, minlength=24).astype(np.int64)
+
+    def weekly_totals(self):
+        """(week start dates, milliseconds) per calendar week (Monday start) touching the range."""
+        offset = self.start.weekday()
+        week = (np.arange(self.n_days) + offset) // 7
+        totals = np.bincount(week, weights=self.daily_totals(), minlength=week[-1] + 1 if self.n_days else 0)
+        starts = [(self.start + timedelta(days=7 * w - offset)).strftime("%Y-%m-%d") for w in range(len(totals))]
+        return starts, totals.astype(np.int64)
+
+    def period_totals(self, labels, n_labels, first_day, last_day):
+        """Milliseconds per label (app or category id) for days in [first_day, last_day]."""
+        mask = (self.day >= first_day) & (self.day <= last_day)
+        return np.bincount(labels[mask], weights=self.ms[mask], minlength=n_labels).astype(np.int64)
+
+
+def rolling_mean(values, window):
+    """Trailing mean over `window` values (shorter windows at the start of the series)."""
+    cumulative = np.cumsum(np.concatenate(([0.0], values.astype(np.float64))))
+    index = np.arange(1, len(values) + 1)
+    lower = np.maximum(index - window, 0)
+    return (cumulative[index] - cumulative[lower]) / (index - lower)
+
+
+def top_movers(names, current, previous, top_n):
+    """Largest increases and decreases between two per-label totals."""
+    delta = current - previous
+    order = np.argsort(delta)
+
+    def entry(i):
+        return {
+            "name": names[i],
+            "current_min": int(current[i] // MS_PER_MINUTE),
+            "previous_min": int(previous[i] // MS_PER_MINUTE),
+            "delta_min": int(delta[i] // MS_PER_MINUTE) if delta[i] >= 0 else -int(-delta[i] // MS_PER_MINUTE),
+        }
+
+    rising = [entry(i) for i in order[::-1][:top_n] if delta[i] > 0]
+    falling = [entry(i) for i in order[:top_n] if delta[i] < 0]
+    return {"rising": rising, "falling": falling}
+
+
+def load_usage_arrays(start_date, end_date):
+    """Load an inclusive date range of the rollup into UsageArrays."""
+    rows = get_rollup_cache().execute(RANGE_ROWS_SQL, (start_date, start_date, end_date))
+    return UsageArrays(start_date, end_date, [tuple(row) for row in rows])
+
+
+def usage_trends(start_date, end_date, window=7, top_n=5):
+    """
+    Trend report for an inclusive date range.
+
+    Args:
+        start_date: First day ('YYYY-MM-DD')
+        end_date: Last day ('YYYY-MM-DD')
+        window: Days per rolling average and per top-movers comparison period
+        top_n: Entries per top-movers list
+
+    Returns:
+        Dictionary of daily / weekly series, rolling averages, the weekday x hour
+        heatmap, peak hours and top movers. Durations are whole minutes.
+    """
+    data = load_usage_arrays(start_date, end_date)
+    window = max(1, int(window))
+
+    daily = data.daily_totals()
+    productive = data.daily_totals(data.verdict == VERDICTS.index("productive"))
+    distracted = data.daily_totals(data.verdict == VERDICTS.index("distracted"))
+    rolling = rolling_mean(daily, window)
+    rolling_productive = rolling_mean(productive, window)
+
+    week_starts, weekly = data.weekly_totals()
+    weekly_delta = np.diff(weekly, prepend=weekly[:1]) if len(weekly) else weekly
+
+    hours = data.hour_totals()
+    peak_hours = [int(h) for h in np.argsort(hours)[::-1][:3] if hours[h] > 0]
+
+    heatmap = data.weekday_hour_heatmap()
+
+    # Last `window` days against the `window` days before them
+    last_day = data.n_days - 1
+    current = (last_day - window + 1, last_day)
+    previous = (last_day - 2 * window + 1, last_day - window)
+
+    active_days = int(np.count_nonzero(daily))
+    total_ms = int(daily.sum())
+
+    return {
+        "days": data.n_days,
+        "active_days": active_days,
+        "total_min": total_ms // MS_PER_MINUTE,
+        "average_active_day_min": (total_ms // active_days) // MS_PER_MINUTE if active_days else 0,
+        "productive_share": round(float(productive.sum()) * 100.0 / total_ms, 1) if total_ms else 0.0,
+        "daily": {
+            "columns": ["date", "total_min", "productive_min", "distracted_min", f"rolling_{window}d_min", f"rolling_{window}d_productive_min"],
+            "rows": [
+                [data.date_at(d), int(daily[d] // MS_PER_MINUTE), int(productive[d] // MS_PER_MINUTE),
+                 int(distracted[d] // MS_PER_MINUTE), int(rolling[d] // MS_PER_MINUTE),
+                 int(rolling_productive[d] // MS_PER_MINUTE)]
+                for d in range(data.n_days)
+            ],
+        },
+        "weekly": [
+            {
+                "week_start": week_starts[w],
+                "total_min": int(weekly[w] // MS_PER_MINUTE),
+                "change_vs_previous_week_pct": (
+                    round(float(weekly_delta[w]) * 100.0 / float(weekly[w - 1]), 1) if w and weekly[w - 1] else None
+                ),
+            }
+            for w in range(len(weekly))
+        ],
+        "peak_hours": peak_hours,
+        "busiest_weekday": WEEKDAY_NAMES[int(np.argmax(heatmap.sum(axis=1)))] if total_ms else None,
+        "heatmap_avg_min": {
+            "rows": list(WEEKDAY_NAMES),
+            "columns": list(range(24)),
+            "values": (heatmap // MS_PER_MINUTE).astype(int).tolist(),
+        },
+        "top_movers": {
+            "period_days": window,
+            "compared": f"{data.date_at(max(current[0], 0))}..{data.date_at(current[1])} vs "
+                        f"{data.date_at(max(previous[0], 0))}..{data.date_at(max(previous[1], 0))}",
+            "apps": top_movers(
+                data.apps,
+                data.period_totals(data.app, len(data.apps), *current),
+                data.period_totals(data.app, len(data.apps), *previous),
+                top_n,
+            ),
+            "categories": top_movers(
+                data.categories,
+                data.period_totals(data.category, len(data.categories), *current),
+                data.period_totals(data.category, len(data.categories), *previous),
+                top_n,
+            ),
+        } if data.n_days >= 2 * window else None,
+    }
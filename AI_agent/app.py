@@ -1,91 +1,229 @@
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from langchain.memory import ConversationBufferMemory
 
-from datetime import datetime
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
 
+# Only light modules are imported up front: LangChain / LangGraph, the provider
+# SDK and the MCP client are loaded by build_agent() after the port is bound
+# (see "Background Startup" below).
+from sessions import ConversationLeases, ConversationSessions, DEFAULT_CONVERSATION_ID, open_checkpointer
+from response_cache import get_response_cache
+from fast_path import answer_fast_path
 
-from langgraph_mcp_client import create_graph, server_params
-from mcp.client.stdio import stdio_client
-from mcp import ClientSession
+APP_IMPORTED_AT = time.perf_counter()
 
-# === FastAPI App ===
-app = FastAPI()
+# How long a request that arrives during startup waits for the agent
+AGENT_READY_TIMEOUT_S = float(os.getenv("AI_AGENT_READY_TIMEOUT_S", "120"))
 
-# Enable CORS (optional for frontend)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Worker processes serving the app (start_service.py). Each worker builds its own
+# agent and MCP session; conversations are shared through the checkpointer database.
+SERVICE_WORKERS = max(1, int(os.getenv("AI_SERVICE_WORKERS", "1")))
+
+# Endpoints are registered on the router; create_app() (see "App Factory" below)
+# builds an app around it with its own agent, MCP session and startup state
+router = APIRouter()
 
 # === Input Schema ===
 class MessageInput(BaseModel):
     message: str
+    # Clients that don't track conversations all share the default one
+    conversation_id: str = DEFAULT_CONVERSATION_ID
 
-# === Global Variables ===
+class ResetInput(BaseModel):
+    conversation_id: str = DEFAULT_CONVERSATION_ID
 
-memory = ConversationBufferMemory(return_messages=True)
-config = {"configurable": {"thread_id": 1234}}
-stdio_cm = None
-client_cm = None
+# === Background Startup ===
 
-last_reset_date = None  # Track the last date memory was reset
+@contextmanager
+def startup_stage(startup_state, name):
+    """Record a startup stage's start offset and duration (seconds since app import)."""
+    startup_state["stage"] = name
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_state["stages"][name] = {
+            "start_s": round(started - APP_IMPORTED_AT, 3),
+            "duration_s": round(time.perf_counter() - started, 3),
+        }
 
-# === Helper Function ===
-def reset_chat_memory():
-    global memory, last_reset_date
-    memory = ConversationBufferMemory(return_messages=True)
-    last_reset_date = datetime.now().date()
+def import_agent_modules():
+    """Import the LangChain / LangGraph / MCP client modules (run on a worker thread)."""
+    for name in ("langchain_core.messages", "langgraph.checkpoint.sqlite.aio", "langgraph_mcp_client"):
+        importlib.import_module(name)
+    client = sys.modules["langgraph_mcp_client"]
+    importlib.import_module("inprocess_mcp" if client.MCP_TRANSPORT == "inprocess" else "mcp_supervisor")
+    return client
 
-# === Startup Event ===
+async def build_agent(app):
+    """
+    Load the agent after the port is bound: imports, then the MCP handshake
+    overlapped with the provider SDK import and the checkpointer, then the graph.
+    """
+    startup_state = app.state.startup
 
-@app.on_event("startup")
-async def startup_event():
-    global stdio_cm, client_cm
+    with startup_stage(startup_state, "imports"):
+        client = await asyncio.to_thread(import_agent_modules)
 
-    # Setup stdio client and MCP session
-    stdio_cm = stdio_client(server_params)
-    read, write = await stdio_cm.__aenter__()
+    async def rebuild_agent(tools):
+        # A respawned MCP server exposes different tools: rebuild the graph around them
+        app.state.agent = await client.create_graph(mcp_session, checkpointer=checkpointer)
 
-    client_cm = ClientSession(read, write)
-    session = await client_cm.__aenter__()
-    await session.initialize()
+    if client.MCP_TRANSPORT == "inprocess":
+        # MCP tools called directly in this process, no subprocess
+        from inprocess_mcp import InProcessMCPSession
+        mcp_session = InProcessMCPSession()
+    else:
+        # MCP server subprocess + session, respawned in the background if it dies.
+        # The supervisor stands in for the ClientSession, so the graph outlives respawns.
+        from mcp_supervisor import MCPSupervisor
+        mcp_session = MCPSupervisor(client.server_params, on_tools_changed=rebuild_agent)
+    # One MCP session per app, so every worker process has its own
+    app.state.session = mcp_session
 
-    # Store in app state
-    app.state.session = session
-    app.state.agent = await create_graph(session)
+    async def mcp_handshake():
+        with startup_stage(startup_state, "mcp_handshake"):
+            await mcp_session.start()
 
+    async def provider_import():
+        with startup_stage(startup_state, "provider_import"):
+            provider, _ = client.get_provider_model()
+            await asyncio.to_thread(client.import_chat_model_class, provider)
 
-# === Shutdown Event ===
-@app.on_event("shutdown")
-async def shutdown_event():
-    # Clean shutdown
-    await client_cm.__aexit__(None, None, None)
-    await stdio_cm.__aexit__(None, None, None)
+    async def start_checkpointer():
+        # Conversation history lives in a local SQLite checkpointer, one thread per conversation
+        with startup_stage(startup_state, "checkpointer"):
+            app.state.checkpointer_cm = open_checkpointer()
+            return await app.state.checkpointer_cm.__aenter__()
 
-# === Main Chat Endpoint ===
-@app.post("/chat")
-async def chat(req: MessageInput):
-    global last_reset_date
+    _, _, checkpointer = await asyncio.gather(
+        mcp_handshake(), provider_import(), start_checkpointer()
+    )
+
+    with startup_stage(startup_state, "graph_build"):
+        agent = await client.create_graph(mcp_session, checkpointer=checkpointer)
+
+    # Store in app state; with several workers, conversation locks span processes
+    leases = ConversationLeases() if SERVICE_WORKERS > 1 else None
+    app.state.sessions = ConversationSessions(checkpointer, leases=leases)
+    app.state.agent = agent
+    startup_state["stage"] = "ready"
+    startup_state["ready_after_s"] = round(time.perf_counter() - APP_IMPORTED_AT, 3)
+    print(f"AI agent ready {startup_state['ready_after_s']}s after import: {startup_state['stages']}")
+
+async def require_agent(app):
+    """Wait for the background startup; 503 if it failed or takes too long."""
+    startup_state = app.state.startup
+    if not app.state.agent_task.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(app.state.agent_task), AGENT_READY_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail=f"AI agent still starting ({startup_state['stage']})")
+        except Exception:
+            pass
+    if startup_state["error"]:
+        raise HTTPException(status_code=503, detail=f"AI agent failed to start: {startup_state['error']}")
 
-    # Auto-reset memory once per day (not every request)
-    if last_reset_date != datetime.now().date():
-        reset_chat_memory()
+# === Readiness Endpoint ===
+@router.get("/ready")
+async def ready(request: Request):
+    """200 once the agent can answer, 503 while it is starting (or if it failed)."""
+    startup_state = request.app.state.startup
+    body = dict(
+        startup_state,
+        uptime_s=round(time.perf_counter() - APP_IMPORTED_AT, 3),
+        pid=os.getpid(),
+        workers=SERVICE_WORKERS,
+    )
+    return JSONResponse(body, status_code=200 if startup_state["stage"] == "ready" else 503)
 
+# === Response Cache ===
 
-    user_input = req.message
-    memory.chat_memory.add_user_message(user_input)
+async def lookup_cached_reply(message):
+    """
+    Look up a stored reply for a question about settled (past) data.
 
-    history = memory.chat_memory.messages
+    Returns:
+        (CachedQuestion or None, reply or None)
+    """
+    from langgraph_mcp_client import get_provider_model
+
+    provider, model = get_provider_model()
     try:
-        print("INPUT HISTORY: [Messages received]")  # Avoid printing potentially problematic characters
-    except:
-        pass
+        return await asyncio.to_thread(get_response_cache().lookup, message, f"{provider}:{model}")
+    except Exception as e:
+        print(f"Response cache lookup failed: {e}")
+        return None, None
+
+async def store_cached_reply(cached, reply):
+    if cached is None or cached.key is None:
+        return
+    try:
+        await asyncio.to_thread(get_response_cache().store, cached, reply)
+    except Exception as e:
+        print(f"Response cache store failed: {e}")
+
+async def record_cached_turn(app, conversation_id, message, reply):
+    """Append a turn answered without the graph (response cache or fast path) to the thread, so follow-up questions have context."""
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    await app.state.agent.aupdate_state(
+        app.state.sessions.config(conversation_id),
+        {"messages": [HumanMessage(content=message), AIMessage(content=reply)]},
+        as_node="chat_node",
+    )
+
+# === Main Chat Endpoint ===
+@router.post("/chat")
+async def chat(req: MessageInput, request: Request):
+    app = request.app
+    await require_agent(app)
+    from langchain_core.messages import HumanMessage
+
+    sessions = app.state.sessions
+    conversation_id = req.conversation_id
 
-    result = await app.state.agent.ainvoke({"messages": history}, config=config)
+    # Turns of one conversation run one at a time; other conversations run in parallel
+    async with sessions.lock(conversation_id):
+        # Auto-reset history once per day (not every request)
+        await sessions.reset_if_stale(conversation_id)
+
+        try:
+            print("INPUT HISTORY: [Messages received]")  # Avoid printing potentially problematic characters
+        except:
+            pass
+
+        # The fast path and the reply cache see only the message, not the thread's
+        # context, so only a conversation's first turn can use them
+        first_turn = not await sessions.has_turns(conversation_id)
+
+        # Simple metric questions ("how much productive today") are answered from the tools, without the LLM
+        reply = await answer_fast_path(req.message, app.state.session) if first_turn else None
+        if reply is not None:
+            await record_cached_turn(app, conversation_id, req.message, reply)
+            return {"reply": reply, "conversation_id": conversation_id, "fast_path": True}
+
+        # Repeated questions about past days are answered without running the graph
+        cached, reply = None, None
+        if first_turn:
+            cached, reply = await lookup_cached_reply(req.message)
+        if reply is not None:
+            await record_cached_turn(app, conversation_id, req.message, reply)
+            return {"reply": reply, "conversation_id": conversation_id, "cached": True}
+
+        # Only the new message is sent; the checkpointer restores the thread's history
+        result = await app.state.agent.ainvoke(
+            {"messages": [HumanMessage(content=req.message)]},
+            config=sessions.config(conversation_id),
+        )
 
     # Fix Unicode encoding issue by using safe string handling
     try:
@@ -96,13 +234,183 @@ async def chat(req: MessageInput):
         reply = result["messages"][-1].content
     except Exception as e:
         reply = f"[ERROR extracting reply]: {e}"
+    else:
+        await store_cached_reply(cached, reply)
+
+    return {"reply": reply, "conversation_id": conversation_id}
 
-    memory.chat_memory.add_ai_message(reply)
+# === Streaming Chat Endpoint ===
 
-    return {"reply": reply}
+def sse_event(event, data):
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def chunk_text(content):
+    """Text of a streamed message chunk (Gemini sends a list of parts, OpenAI a str)."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part if isinstance(part, str) else part.get("text", "")
+            for part in content
+            if isinstance(part, (str, dict))
+        )
+    return ""
+
+@router.post("/chat/stream")
+async def chat_stream(req: MessageInput, request: Request):
+    """
+    Same conversation as /chat, streamed as server-sent events while the graph runs:
+
+    - `tool_start` / `tool_end`: an MCP tool call began / finished
+    - `token`: a piece of LLM output text (tokens of tool-calling turns included)
+    - `done`: the final reply, once the whole run has finished
+    - `error`: the run failed
+
+    A reply served from the response cache or the fast path (fast_path.py) arrives
+    as one `token` event followed by `done` with `cached: true` / `fast_path: true`.
+    """
+    app = request.app
+    await require_agent(app)
+    from langchain_core.messages import HumanMessage
+
+    sessions = app.state.sessions
+    conversation_id = req.conversation_id
+
+    async def event_stream():
+        final_state = None
+        cached = None
+        try:
+            # Held for the whole stream so turns of one conversation never interleave
+            async with sessions.lock(conversation_id):
+                await sessions.reset_if_stale(conversation_id)
+
+                first_turn = not await sessions.has_turns(conversation_id)
+                reply = await answer_fast_path(req.message, app.state.session) if first_turn else None
+                if reply is not None:
+                    await record_cached_turn(app, conversation_id, req.message, reply)
+                    yield sse_event("token", {"text": reply})
+                    yield sse_event("done", {"reply": reply, "conversation_id": conversation_id, "fast_path": True})
+                    return
+
+                if first_turn:
+                    cached, reply = await lookup_cached_reply(req.message)
+                if reply is not None:
+                    await record_cached_turn(app, conversation_id, req.message, reply)
+                    yield sse_event("token", {"text": reply})
+                    yield sse_event("done", {"reply": reply, "conversation_id": conversation_id, "cached": True})
+                    return
+
+                async for event in app.state.agent.astream_events(
+                    {"messages": [HumanMessage(content=req.message)]},
+                    config=sessions.config(conversation_id),
+                    version="v2",
+                ):
+                    kind = event["event"]
+                    if kind == "on_chat_model_stream":
+                        text = chunk_text(event["data"]["chunk"].content)
+                        if text:
+                            yield sse_event("token", {"text": text})
+                    elif kind == "on_tool_start":
+                        yield sse_event("tool_start", {"name": event["name"], "input": event["data"].get("input")})
+                    elif kind == "on_tool_end":
+                        yield sse_event("tool_end", {"name": event["name"]})
+                    elif kind == "on_chain_end" and not event.get("parent_ids"):
+                        # The root graph finished: its output is the final state
+                        final_state = event["data"].get("output")
+        except Exception as e:
+            yield sse_event("error", {"message": str(e)})
+            return
+
+        try:
+            reply = final_state["messages"][-1].content
+        except Exception as e:
+            reply = f"[ERROR extracting reply]: {e}"
+        else:
+            await store_cached_reply(cached, reply)
+
+        yield sse_event("done", {"reply": reply, "conversation_id": conversation_id})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # === Manual Reset Endpoint ===
-@app.post("/reset")
-async def reset():
-    reset_chat_memory()
-    return {"message": "Chat history has been cleared."}
+@router.post("/reset")
+async def reset(request: Request, req: ResetInput | None = None):
+    await require_agent(request.app)
+    sessions = request.app.state.sessions
+    conversation_id = req.conversation_id if req else DEFAULT_CONVERSATION_ID
+    async with sessions.lock(conversation_id):
+        await sessions.reset(conversation_id)
+    return {"message": "Chat history has been cleared.", "conversation_id": conversation_id}
+
+# === Health Endpoint ===
+@router.get("/health")
+async def health(request: Request):
+    """MCP transport state and tool-call latency of the answering worker (see mcp_supervisor.py / inprocess_mcp.py)."""
+    state = request.app.state
+    if state.startup["stage"] != "ready":
+        return {"mcp": None, "startup": state.startup, "pid": os.getpid()}
+    return {"mcp": await state.session.health(), "pid": os.getpid()}
+
+# === App Factory ===
+
+def create_app():
+    """
+    The FastAPI app with its own agent, MCP session and startup state.
+
+    Single-process runs serve the module-level `app` below; with
+    AI_SERVICE_WORKERS > 1, start_service.py hands `app:create_app` to uvicorn
+    and every worker process builds its own.
+    """
+    app = FastAPI()
+
+    # Enable CORS (optional for frontend)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(router)
+
+    # Startup progress for /ready: current stage, error, and per-stage timings
+    app.state.startup = {"stage": "starting", "error": None, "stages": {}}
+    app.state.agent_task = None
+    app.state.checkpointer_cm = None
+    app.state.session = None
+
+    # === Startup Event ===
+    @app.on_event("startup")
+    async def startup_event():
+        startup_state = app.state.startup
+
+        async def run():
+            try:
+                await build_agent(app)
+            except Exception as e:
+                startup_state["stage"] = "failed"
+                startup_state["error"] = str(e)
+                print(f"AI agent failed to start: {e}", file=sys.stderr)
+                raise
+
+        # Returns at once so uvicorn binds the port; /ready reports when the agent is up
+        app.state.agent_task = asyncio.create_task(run())
+
+    # === Shutdown Event ===
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        # Clean shutdown
+        if app.state.agent_task is not None and not app.state.agent_task.done():
+            app.state.agent_task.cancel()
+        if app.state.checkpointer_cm is not None:
+            await app.state.checkpointer_cm.__aexit__(None, None, None)
+        if app.state.session is not None:
+            await app.state.session.close()
+
+    return app
+
+app = create_app()
@@ -0,0 +1,82 @@
+# benchmark_payloads.py
+"""
+Size benchmark for the MCP tool payload encodings (see payload_encoding.py).
+
+Calls the row-heavy tools through FastMCP exactly as the agent does, once with
+the default 'rows' encoding and once with 'compact', and reports the bytes of
+the text content sent over stdio (which is also what enters the LLM context) and
+a rough token count.
+
+Usage:
+    FOCUSBOOK_DB_PATH=/path/to/focusbook.db python benchmark_payloads.py
+    FOCUSBOOK_DB_PATH=/path/to/focusbook.db python benchmark_payloads.py --days 1 7 30
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import math_mcp_server
+from payload_encoding import COMPACT_ENCODING, ENCODING_ENV, ROWS_ENCODING
+from tool_cache import get_tool_cache
+
+CHARS_PER_TOKEN = 4
+
+
+def benchmark_calls(days_list):
+    """(label, tool name, arguments) for every call to measure."""
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    calls = [("get_app_usage_data yesterday", "get_app_usage_data", {"date": yesterday})]
+    for days in days_list:
+        since = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        calls += [
+            (f"get_app_usage_data_range {days}d", "get_app_usage_data_range", {"days": days}),
+            (f"get_youtube_categorized_data {days}d", "get_youtube_categorized_data", {"days": days}),
+            (
+                f"query_sql hourly rows {days}d",
+                "query_sql",
+                {"sql": "SELECT date, hour, app_name, category, domain, time_spent FROM app_usage "
+                        f"WHERE date >= '{since}' AND hour IS NOT NULL ORDER BY date, hour"},
+            ),
+        ]
+    return calls
+
+
+async def payload_bytes(tool_name, arguments, encoding):
+    """Bytes of the text content one tool call returns under an encoding."""
+    os.environ[ENCODING_ENV] = encoding
+    get_tool_cache().clear()
+    content = await math_mcp_server.mcp.call_tool(tool_name, arguments)
+    if isinstance(content, tuple):
+        content = content[0]
+    return sum(len(block.text.encode("utf-8")) for block in content if hasattr(block, "text"))
+
+
+async def run(days_list):
+    print(f"Database: {os.environ.get('FOCUSBOOK_DB_PATH', '(default path)')}")
+    print(f"{'call':<40} {'rows B':>10} {'compact B':>10} {'saved':>7} {'~tokens rows':>13} {'~tokens compact':>16}")
+
+    totals = {ROWS_ENCODING: 0, COMPACT_ENCODING: 0}
+    for label, tool_name, arguments in benchmark_calls(days_list):
+        rows = await payload_bytes(tool_name, arguments, ROWS_ENCODING)
+        compact = await payload_bytes(tool_name, arguments, COMPACT_ENCODING)
+        totals[ROWS_ENCODING] += rows
+        totals[COMPACT_ENCODING] += compact
+        saved = 100.0 * (rows - compact) / rows if rows else 0.0
+        print(f"{label:<40} {rows:>10} {compact:>10} {saved:>6.1f}% "
+              f"{rows // CHARS_PER_TOKEN:>13} {compact // CHARS_PER_TOKEN:>16}")
+
+    rows, compact = totals[ROWS_ENCODING], totals[COMPACT_ENCODING]
+    saved = 100.0 * (rows - compact) / rows if rows else 0.0
+    print(f"{'TOTAL':<40} {rows:>10} {compact:>10} {saved:>6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare MCP tool payload sizes per encoding.")
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 7, 30], help="Range lengths to measure")
+    args = parser.parse_args()
+    asyncio.run(run(args.days))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmark_prompt.py
+"""
+Token benchmark for the system prompt layout.
+
+The system message is built from a static prefix (math_mcp_server.SYSTEM_PROMPT,
+loaded once per graph) followed by the per-request parts: the rolling summary
+(chat_history.summary_prompt_suffix) and the current date and time
+(langgraph_mcp_client.prompt_context_suffix). Providers cache the longest prompt
+prefix that repeats byte for byte (OpenAI from 1024 tokens, Gemini implicitly),
+so what matters is how much of the message two requests share.
+
+Reports the token count of each part and of the whole message, and the prefix
+two requests one minute apart (and one day apart) have in common. Tokens are
+counted with tiktoken's o200k_base (the gpt-4o encoding) when it is available,
+otherwise estimated at 4 characters per token.
+
+Usage:
+    python benchmark_prompt.py
+"""
+import os
+from datetime import datetime, timedelta
+
+from chat_history import summary_prompt_suffix
+from langgraph_mcp_client import prompt_context_suffix
+from math_mcp_server import SYSTEM_PROMPT
+
+CHARS_PER_TOKEN = 4
+
+SAMPLE_SUMMARY = (
+    "The user is focused on productive time. They asked about yesterday "
+    "(3h 10m productive, 28%) and the last 7 days, and prefer short answers."
+)
+
+
+def token_counter():
+    """(count function, label) - tiktoken when its encoding loads, else a character estimate."""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return (lambda text: len(encoding.encode(text))), "tiktoken o200k_base"
+    except Exception:
+        return (lambda text: len(text) // CHARS_PER_TOKEN), f"~{CHARS_PER_TOKEN} chars/token estimate"
+
+
+def system_message(now, summary=""):
+    """The system message chat_node sends at a given moment."""
+    return SYSTEM_PROMPT + summary_prompt_suffix(summary) + prompt_context_suffix(now)
+
+
+def main():
+    count, method = token_counter()
+    now = datetime.now().replace(second=0, microsecond=0)
+    print(f"Token counts ({method})\n")
+
+    variants = [
+        ("static prefix (system_prompt)", SYSTEM_PROMPT),
+        ("dynamic suffix: context", prompt_context_suffix(now)),
+        ("dynamic suffix: summary + context", summary_prompt_suffix(SAMPLE_SUMMARY) + prompt_context_suffix(now)),
+        ("system message, no summary", system_message(now)),
+        ("system message, with summary", system_message(now, SAMPLE_SUMMARY)),
+    ]
+    print(f"{'variant':<36} {'chars':>8} {'tokens':>8}")
+    for label, text in variants:
+        print(f"{label:<36} {len(text):>8} {count(text):>8}")
+
+    print(f"\n{'cache reuse between requests':<36} {'shared tokens':>14} {'of':>6} {'share':>7}")
+    for label, later in (("one minute apart", timedelta(minutes=1)), ("one day apart", timedelta(days=1))):
+        first, second = system_message(now, SAMPLE_SUMMARY), system_message(now + later, SAMPLE_SUMMARY)
+        shared = count(os.path.commonprefix([first, second]))
+        total = count(second)
+        print(f"{label:<36} {shared:>14} {total:>6} {shared / total:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
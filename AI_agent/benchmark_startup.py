@@ -0,0 +1,124 @@
+# benchmark_startup.py
+"""
+Startup-time benchmark for the AI service.
+
+Launches the service the way Electron does (start_service.py, or the frozen
+ai_service executable with --exe), then polls it and reports:
+
+    port bound    process spawn -> the first HTTP answer (uvicorn is listening)
+    ready         process spawn -> /ready returns 200 (agent can answer /chat)
+
+plus the per-stage breakdown /ready reports, timed inside the service from the
+moment app.py was imported: imports (LangChain / LangGraph / MCP client),
+mcp_handshake (server subprocess + initialize + tool listing), provider_import
+(the chosen provider SDK), checkpointer, graph_build. The handshake, provider
+import and checkpointer stages run concurrently.
+
+No LLM request is made, so a placeholder API key is enough.
+
+Usage:
+    FOCUSBOOK_DB_PATH=/path/to/focusbook.db python benchmark_startup.py
+    python benchmark_startup.py --db /path/to/focusbook.db --runs 5 --provider gemini
+    python benchmark_startup.py --db /path/to/focusbook.db --exe dist/ai_service
+    FOCUSBOOK_MCP_TRANSPORT=inprocess python benchmark_startup.py --db ...
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+POLL_INTERVAL_S = 0.02
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_ready(port):
+    """(status code, JSON body) of GET /ready, or (None, None) if nothing is listening."""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=2) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"null")
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None, None
+
+
+def run_once(command, timeout_s):
+    """Start the service, wait for /ready, stop it. Returns the timings dictionary."""
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    bound_s = None
+    try:
+        while time.perf_counter() - started < timeout_s:
+            if process.poll() is not None:
+                raise RuntimeError(f"service exited with code {process.returncode}")
+            status, body = get_ready(command_port(command))
+            if status is not None and bound_s is None:
+                bound_s = time.perf_counter() - started
+            if status == 200:
+                return {"port_bound_s": bound_s, "ready_s": time.perf_counter() - started, "service": body}
+            if body and body.get("error"):
+                raise RuntimeError(f"agent failed to start: {body['error']}")
+            time.sleep(POLL_INTERVAL_S)
+        raise RuntimeError(f"service not ready after {timeout_s}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def command_port(command):
+    # start_service.py argv: <db path> <openai key> <port> <provider> <gemini key>
+    return int(command[-3])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.environ.get("FOCUSBOOK_DB_PATH"), help="FocusBook SQLite database")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--provider", choices=("openai", "gemini"), default="openai")
+    parser.add_argument("--exe", help="frozen ai_service executable instead of start_service.py")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+    if not args.db:
+        parser.error("--db or FOCUSBOOK_DB_PATH is required")
+
+    launcher = [args.exe] if args.exe else [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "start_service.py")]
+    print(f"Service: {' '.join(launcher)}  provider={args.provider}  "
+          f"transport={os.environ.get('FOCUSBOOK_MCP_TRANSPORT', 'stdio')}")
+
+    runs = []
+    for run in range(args.runs):
+        command = launcher + [args.db, "benchmark-placeholder-key", str(free_port()), args.provider, "benchmark-placeholder-key"]
+        result = run_once(command, args.timeout)
+        runs.append(result)
+        stages = result["service"]["stages"]
+        print(f"run {run + 1}: port bound {result['port_bound_s']:.2f}s, ready {result['ready_s']:.2f}s  "
+              + "  ".join(f"{name} {stage['duration_s']:.2f}s" for name, stage in stages.items()))
+
+    def median(values):
+        return statistics.median(values) if values else float("nan")
+
+    print(f"\nmedian of {len(runs)} runs")
+    print(f"{'port bound':<18} {median([r['port_bound_s'] for r in runs]):>7.2f}s")
+    print(f"{'ready':<18} {median([r['ready_s'] for r in runs]):>7.2f}s")
+    for name in runs[0]["service"]["stages"]:
+        durations = [r["service"]["stages"][name]["duration_s"] for r in runs if name in r["service"]["stages"]]
+        starts = [r["service"]["stages"][name]["start_s"] for r in runs if name in r["service"]["stages"]]
+        print(f"  {name:<16} {median(durations):>7.2f}s  (starts at +{median(starts):.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# benchmark_workers.py
+"""
+Throughput benchmark for the multi-worker mode (AI_SERVICE_WORKERS).
+
+Starts the service once per worker count with the local stub model
+(AI_PROVIDER=stub, see stub_llm.py), so no provider is called and what is
+measured is this service's own work per turn: request parsing, the graph
+(history node, usage prefetch, chat node), MCP tool calls and their JSON
+payloads, checkpoint writes, and serializing the prompt the way a provider
+client would. Every client thread keeps its own conversation and posts
+/chat for a fixed time; the report is requests per second and latency
+percentiles per worker count.
+
+Throughput can only scale up to the number of CPU cores; the core count is
+printed with the results.
+
+Usage:
+    FOCUSBOOK_DB_PATH=/path/to/focusbook.db python benchmark_workers.py
+    python benchmark_workers.py --db /path/to/focusbook.db --workers 1 2 4 --clients 16 --seconds 20
+    FOCUSBOOK_MCP_TRANSPORT=inprocess python benchmark_workers.py --db ...
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Goes through the graph: not a fast-path metric, and its range includes today,
+# so the response cache never answers it
+QUESTION = "Give me a breakdown of the apps I used in the last 7 days"
+
+POLL_INTERVAL_S = 0.05
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_ready(port):
+    """(status code, JSON body) of GET /ready, or (None, None) if nothing is listening."""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=2) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"null")
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None, None
+
+
+def wait_for_workers(process, port, workers, timeout_s):
+    """Poll /ready until every worker process has answered 200 once."""
+    ready_pids = set()
+    started = time.perf_counter()
+    while len(ready_pids) < workers:
+        if process.poll() is not None:
+            raise RuntimeError(f"service exited with code {process.returncode}")
+        if time.perf_counter() - started > timeout_s:
+            raise RuntimeError(f"only {len(ready_pids)} of {workers} workers ready after {timeout_s}s")
+        status, body = get_ready(port)
+        if status == 200:
+            ready_pids.add(body["pid"])
+        elif body and body.get("error"):
+            raise RuntimeError(f"agent failed to start: {body['error']}")
+        time.sleep(POLL_INTERVAL_S)
+
+
+def post_chat(port, conversation_id):
+    body = json.dumps({"message": QUESTION, "conversation_id": conversation_id}).encode()
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/chat", data=body, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=120) as response:
+        reply = json.loads(response.read())["reply"]
+    if not reply.startswith("Stub reply"):
+        raise RuntimeError(f"unexpected reply: {reply[:80]}")
+
+
+def run_load(port, clients, seconds, label):
+    """Post /chat from `clients` threads for `seconds`. Returns (latencies, errors)."""
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+
+    def client(index):
+        conversation_id = f"load-{label}-{index}"
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                post_chat(port, conversation_id)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(str(e))
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else float("nan")
+
+
+def benchmark(workers, args):
+    port = free_port()
+    env = dict(os.environ, AI_SERVICE_WORKERS=str(workers), AI_PROVIDER="stub")
+    # start_service.py argv: <db path> <openai key> <port>; the provider comes from AI_PROVIDER
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "start_service.py"),
+               args.db, "", str(port)]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_workers(process, port, workers, args.timeout)
+        run_load(port, args.clients, args.warmup, f"{workers}w-warmup")
+        latencies, errors = run_load(port, args.clients, args.seconds, f"{workers}w")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    if errors:
+        print(f"  {len(errors)} failed requests, first: {errors[0]}")
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / args.seconds,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.environ.get("FOCUSBOOK_DB_PATH"), help="FocusBook SQLite database")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client threads")
+    parser.add_argument("--seconds", type=float, default=20.0, help="measured load per worker count")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for the workers to be ready")
+    args = parser.parse_args()
+    if not args.db:
+        parser.error("--db or FOCUSBOOK_DB_PATH is required")
+
+    print(f"CPU cores: {os.cpu_count()}  clients: {args.clients}  "
+          f"transport: {os.environ.get('FOCUSBOOK_MCP_TRANSPORT', 'stdio')}  question: {QUESTION!r}")
+    print(f"{'workers':>8} {'requests':>9} {'req/s':>8} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    baseline = None
+    for workers in args.workers:
+        result = benchmark(workers, args)
+        baseline = baseline or result["rps"]
+        print(f"{workers:>8} {result['requests']:>9} {result['rps']:>8.1f} {result['rps'] / baseline:>7.2f}x "
+              f"{result['p50_ms']:>8.0f} {result['p95_ms']:>8.0f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
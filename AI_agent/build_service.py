@@ -23,7 +23,29 @@ a = Analysis(
     binaries=[],
     datas=[
         ('math_mcp_server.py', '.'),
+        ('threaded_fastmcp.py', '.'),
+        ('db_pool.py', '.'),
+        ('rollup_cache.py', '.'),
+        ('span_resolver.py', '.'),
+        ('presence.py', '.'),
+        ('interval_index.py', '.'),
+        ('focus_stats.py', '.'),
+        ('productivity.py', '.'),
+        ('analytics.py', '.'),
+        ('sessions.py', '.'),
+        ('chat_history.py', '.'),
+        ('prefetch.py', '.'),
+        ('tool_cache.py', '.'),
+        ('date_intent.py', '.'),
+        ('fast_path.py', '.'),
+        ('response_cache.py', '.'),
+        ('sql_guard.py', '.'),
+        ('payload_encoding.py', '.'),
+        ('youtube_classifier.py', '.'),
         ('langgraph_mcp_client.py', '.'),
+        ('mcp_supervisor.py', '.'),
+        ('inprocess_mcp.py', '.'),
+        ('stub_llm.py', '.'),
         ('app.py', '.')
     ],
     hiddenimports=[
@@ -43,7 +65,10 @@ a = Analysis(
         'langchain_mcp_adapters',
         'langchain_google_genai',
         'langgraph',
+        'langgraph.checkpoint.sqlite.aio',
+        'aiosqlite',
         'openai',
+        'httpx',
         'mcp',
         'sqlite3',
         'json',
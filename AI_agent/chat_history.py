@@ -0,0 +1,150 @@
+# chat_history.py
+"""
+Bounded chat history for the LangGraph agent.
+
+Conversation threads used to grow all day: every turn re-sent every earlier
+message, including the full JSON of every tool result, so prompt size (and
+latency and cost) grew linearly until the daily reset. The history node keeps
+the prompt roughly constant instead:
+
+1. Tool payloads from FINISHED turns are replaced by a one-line stub. The answer
+   that used them is still in the history, so the raw rows are dead weight.
+2. The last KEEP_TURNS turns are always kept verbatim.
+3. Once the history exceeds TOKEN_BUDGET (or grows to twice KEEP_TURNS turns),
+   every older turn is folded into a rolling summary by one LLM call and removed
+   from the thread. Folding whole turns keeps each tool call next to its result,
+   which the providers require.
+
+Token counts are estimated from characters (about 4 per token), which is plenty
+to decide WHEN to trim and costs nothing per turn.
+"""
+import json
+import os
+
+from langchain_core.messages import HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+
+TOKEN_BUDGET = int(os.getenv("AI_HISTORY_TOKEN_BUDGET", "6000"))
+KEEP_TURNS = int(os.getenv("AI_HISTORY_KEEP_TURNS", "4"))
+
+# Tool results longer than this (characters) are stubbed once their turn is over
+TOOL_PAYLOAD_LIMIT = 500
+
+CHARS_PER_TOKEN = 4
+
+STUB_PREFIX = "[tool result omitted after use"
+
+SUMMARY_INSTRUCTION = """Update the running summary of a conversation between a user and FocusBook AI, a productivity assistant.
+Keep: the topic the user is focused on (productive / unproductive / general), the dates discussed,
+key numbers already reported, and any preferences the user stated. Drop small talk.
+Answer with the updated summary only, under 150 words."""
+
+
+def message_text(message):
+    """Plain text of a message's content (str or a list of content parts)."""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part if isinstance(part, str) else str(part.get("text", ""))
+            for part in content
+            if isinstance(part, (str, dict))
+        )
+    return str(content)
+
+
+def estimate_tokens(messages):
+    """Rough token count of a message list (content plus tool-call arguments)."""
+    chars = 0
+    for message in messages:
+        chars += len(message_text(message))
+        for call in getattr(message, "tool_calls", None) or ():
+            chars += len(json.dumps(call.get("args", {}), default=str))
+    return chars // CHARS_PER_TOKEN
+
+
+def split_turns(messages):
+    """Group messages into turns, each starting at a HumanMessage."""
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+
+def stub_tool_message(message):
+    """A same-id replacement for a used tool result (add_messages replaces by id)."""
+    return ToolMessage(
+        content=f"{STUB_PREFIX}: {message.name or 'tool'} returned {len(message_text(message))} chars]",
+        id=message.id,
+        tool_call_id=message.tool_call_id,
+        name=message.name,
+    )
+
+
+def summary_prompt_suffix(summary):
+    """Text appended to the system prompt to carry the rolling summary."""
+    if not summary:
+        return ""
+    return f"\n\n=== EARLIER IN THIS CONVERSATION (summary) ===\n{summary}\n"
+
+
+class HistoryManager:
+    """Graph node that trims the thread before each turn's first LLM call."""
+
+    def __init__(self, llm, llm_slots, token_budget=TOKEN_BUDGET, keep_turns=KEEP_TURNS):
+        self.llm = llm
+        self.llm_slots = llm_slots
+        self.token_budget = token_budget
+        self.keep_turns = max(1, keep_turns)
+
+    async def __call__(self, state):
+        messages = state["messages"]
+        turns = split_turns(messages)
+        updates = []
+
+        # 1. Stub tool payloads of finished turns (everything but the current turn)
+        stubbed = {}
+        for turn in turns[:-1]:
+            for message in turn:
+                if (
+                    isinstance(message, ToolMessage)
+                    and len(message_text(message)) > TOOL_PAYLOAD_LIMIT
+                    and not message_text(message).startswith(STUB_PREFIX)
+                ):
+                    stubbed[message.id] = stub_tool_message(message)
+        updates.extend(stubbed.values())
+
+        # 2. Fold turns older than the last keep_turns into the summary when needed
+        if len(turns) > self.keep_turns:
+            trimmed = [stubbed.get(message.id, message) for message in messages]
+            over_budget = estimate_tokens(trimmed) > self.token_budget
+            if over_budget or len(turns) >= 2 * self.keep_turns:
+                old = [message for turn in turns[:-self.keep_turns] for message in turn]
+                summary = await self.summarize(state.get("summary", ""), old)
+                removals = [RemoveMessage(id=message.id) for message in old]
+                # A removed message must not also be replaced by a stub
+                updates = [u for u in updates if u.id not in {m.id for m in old}] + removals
+                return {"messages": updates, "summary": summary}
+
+        return {"messages": updates} if updates else {}
+
+    async def summarize(self, summary, messages):
+        """Fold messages into the rolling summary with one LLM call."""
+        transcript = []
+        for message in messages:
+            if isinstance(message, ToolMessage):
+                continue  # the answers already state what the tools returned
+            text = message_text(message).strip()
+            if text:
+                transcript.append(f"{message.type}: {text}")
+
+        prompt = [
+            SystemMessage(content=SUMMARY_INSTRUCTION),
+            HumanMessage(content=f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n" + "\n".join(transcript)),
+        ]
+        async with self.llm_slots:
+            response = await self.llm.ainvoke(prompt)
+        return message_text(response).strip()
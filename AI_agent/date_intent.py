@@ -0,0 +1,116 @@
+# date_intent.py
+"""
+Deterministic parsing of the date range a chat question is about.
+
+The agent's tools take a date, a start/end pair or a number of days; users say
+"yesterday", "last 7 days" or "this week". Resolving those phrases without an
+LLM lets the service key caches on the concrete range a question covers and
+decide up front whether that range is already in the past.
+
+Only unambiguous phrases are recognized; anything else returns None and the
+question goes through the agent as usual.
+"""
+import re
+from datetime import date, datetime, timedelta
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "fourteen": 14, "thirty": 30,
+}
+
+ISO_DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+# "last N days" reaching further back than this is read as the last MAX_RANGE_DAYS days
+MAX_RANGE_DAYS = 3650
+
+LAST_N = re.compile(r"\b(?:last|past|previous)\s+(\d+|" + "|".join(NUMBER_WORDS) + r")\s+(day|week|month)s?\b")
+
+
+def normalize_question(text):
+    """Lowercase, drop punctuation and collapse whitespace (dates and digits kept)."""
+    text = str(text).lower().replace("’", "'")
+    text = re.sub(r"[^\w\s'-]", " ", text)
+    return " ".join(text.split())
+
+
+def _iso(value):
+    return value.strftime("%Y-%m-%d")
+
+
+def resolve_question_range(question, today=None):
+    """
+    Resolve the date range a question asks about.
+
+    Args:
+        question: The user's message
+        today: Reference date (defaults to the local date)
+
+    Returns:
+        Inclusive ('YYYY-MM-DD', 'YYYY-MM-DD') tuple, or None when the question
+        names no recognizable period
+    """
+    today = today or datetime.now().date()
+    if isinstance(today, datetime):
+        today = today.date()
+    text = normalize_question(question)
+
+    dates = ISO_DATE.findall(text)
+    try:
+        for value in dates[:2]:
+            datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return None  # "2026-13-45" names no real day
+    if len(dates) >= 2:
+        start, end = sorted(dates[:2])
+        return start, end
+    if len(dates) == 1:
+        return dates[0], dates[0]
+
+    if "day before yesterday" in text:
+        day = today - timedelta(days=2)
+        return _iso(day), _iso(day)
+    if "yesterday" in text:
+        day = today - timedelta(days=1)
+        return _iso(day), _iso(day)
+
+    match = LAST_N.search(text)
+    if match:
+        count = match.group(1)
+        count = int(count) if count.isdigit() else NUMBER_WORDS[count]
+        days = min(count * {"day": 1, "week": 7, "month": 30}[match.group(2)], MAX_RANGE_DAYS)
+        if days < 1:
+            return None
+        return _iso(today - timedelta(days=days - 1)), _iso(today)
+
+    if re.search(r"\b(?:last|previous) week\b", text):
+        monday = today - timedelta(days=today.weekday() + 7)
+        return _iso(monday), _iso(monday + timedelta(days=6))
+    if "this week" in text:
+        return _iso(today - timedelta(days=today.weekday())), _iso(today)
+    if re.search(r"\b(?:last|previous) month\b", text):
+        last_day = today.replace(day=1) - timedelta(days=1)
+        return _iso(last_day.replace(day=1)), _iso(last_day)
+    if "this month" in text:
+        return _iso(today.replace(day=1)), _iso(today)
+
+    match = re.search(r"\blast (" + "|".join(WEEKDAYS) + r")\b", text) or re.search(
+        r"\bon (" + "|".join(WEEKDAYS) + r")\b", text
+    )
+    if match:
+        back = (today.weekday() - WEEKDAYS.index(match.group(1))) % 7 or 7
+        day = today - timedelta(days=back)
+        return _iso(day), _iso(day)
+
+    if re.search(r"\b(?:today|tonight|this morning|this afternoon|so far)\b", text):
+        return _iso(today), _iso(today)
+
+    return None
+
+
+def is_past_range(date_range, today=None):
+    """True when an inclusive range ends before today (its data is settled)."""
+    today = today or datetime.now().date()
+    if isinstance(today, (date, datetime)):
+        today = _iso(today)
+    return date_range is not None and date_range[1] < today
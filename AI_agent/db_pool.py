@@ -0,0 +1,199 @@
+# db_pool.py
+"""
+Pooled read-only SQLite connections for the MCP tools.
+
+Logs go to stderr: in the stdio MCP server, stdout is the JSON-RPC channel.
+"""
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from sqlite3 import OperationalError
+
+# Number of connections kept open. Tool calls are short and mostly sequential, so a
+# few connections are plenty; more only cost memory (each has its own page cache).
+POOL_SIZE = int(os.environ.get("FOCUSBOOK_DB_POOL_SIZE", "4"))
+
+# Prepared statements kept per connection (sqlite3's default is 128).
+STATEMENT_CACHE_SIZE = 256
+
+# Applied to every connection right after it is opened.
+# - query_only:  second line of defence on top of mode=ro
+# - mmap_size:   read pages straight from the OS page cache (256 MB window)
+# - cache_size:  ~32 MB page cache per connection (negative value = KiB)
+# - temp_store:  keep GROUP BY / ORDER BY temp b-trees in memory
+READ_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -32000",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+def get_db_path():
+    """Return the FocusBook database path set by the Electron app."""
+    db_path = os.environ.get("FOCUSBOOK_DB_PATH")
+
+    if not db_path:
+        # Log available environment variables for debugging
+        print(f"ERROR: FOCUSBOOK_DB_PATH not set. Available env vars: {list(os.environ.keys())[:10]}", file=sys.stderr)
+        raise RuntimeError("FOCUSBOOK_DB_PATH environment variable not set. Ensure the Electron app starts the AI service.")
+
+    return db_path
+
+
+def get_cache_db_path():
+    """
+    Return the path of the AI service's side cache database.
+
+    Derived data (rollups, cached verdicts) lives in its own file next to the
+    FocusBook database so the user's data file is never written by this service.
+    FOCUSBOOK_AI_CACHE_PATH overrides the location.
+    """
+    cache_path = os.environ.get("FOCUSBOOK_AI_CACHE_PATH")
+    if cache_path:
+        return cache_path
+    return os.path.join(os.path.dirname(os.path.abspath(get_db_path())), "focusbook_ai_cache.db")
+
+
+def read_only_uri(db_path):
+    """Return a `mode=ro` SQLite URI for a database file."""
+    return Path(db_path).resolve().as_uri() + "?mode=ro"
+
+
+def open_read_only(db_path):
+    """Open one read-only connection with the read pragmas applied."""
+    # Check if database file exists (mode=ro would fail with a vaguer message)
+    if not os.path.exists(db_path):
+        raise RuntimeError(f"Database file does not exist at: {db_path}")
+
+    try:
+        conn = sqlite3.connect(
+            read_only_uri(db_path),
+            uri=True,
+            check_same_thread=False,  # the pool hands connections to any thread
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+    except OperationalError as e:
+        raise RuntimeError(f"Database connection failed: {str(e)}")
+
+    conn.row_factory = sqlite3.Row  # Enable dict-like rows
+    for pragma in READ_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ReadOnlyPool:
+    """
+    A fixed-size pool of read-only connections to one database file.
+
+    Connections are created lazily up to `size` and returned LIFO, so the most
+    recently used connection (the one with the warmest page cache) is handed out
+    first. When every connection is busy, callers wait for one to be returned, or
+    for the slot of a broken one to free up.
+    """
+
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self._idle = []  # LIFO stack of returned connections
+        self._opened = 0
+        # Guards _idle / _opened; notified whenever a connection comes back or a
+        # slot frees up (a broken connection was dropped)
+        self._available = threading.Condition()
+        self._closed = False
+
+    def _acquire(self):
+        with self._available:
+            while not self._idle and self._opened >= self.size:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._opened += 1
+            opened = self._opened
+
+        try:
+            conn = open_read_only(self.db_path)
+        except Exception:
+            self._free_slot()
+            raise
+        print(f"Opened read-only database connection {opened}/{self.size} at: {self.db_path}", file=sys.stderr)
+        return conn
+
+    def _free_slot(self):
+        with self._available:
+            self._opened -= 1
+            self._available.notify()
+
+    def _release(self, conn, broken=False):
+        with self._available:
+            if not (broken or self._closed):
+                self._idle.append(conn)
+                self._available.notify()
+                return
+        try:
+            conn.close()
+        finally:
+            # A waiter opens a replacement in the freed slot
+            self._free_slot()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a `with` block."""
+        conn = self._acquire()
+        broken = False
+        try:
+            yield conn
+        except sqlite3.DatabaseError as e:
+            # Query errors leave the connection usable; anything else (corruption,
+            # I/O errors, a file swapped underneath us) gets the connection replaced.
+            broken = not isinstance(e, (OperationalError, sqlite3.ProgrammingError))
+            raise
+        finally:
+            self._release(conn, broken)
+
+    def close(self):
+        """Close every idle connection; busy ones are closed when returned."""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+            self._available.notify_all()
+        for conn in idle:
+            conn.close()
+
+
+# === Process-wide pool ===
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, (re)creating it if FOCUSBOOK_DB_PATH changed."""
+    global _pool
+    db_path = get_db_path()
+    with _pool_lock:
+        if _pool is None or _pool.db_path != db_path:
+            if _pool is not None:
+                _pool.close()
+            _pool = ReadOnlyPool(db_path)
+        return _pool
+
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled read-only connection to the FocusBook database."""
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def close_pool():
+    """Close the process-wide pool (used on shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
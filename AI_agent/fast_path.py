@@ -0,0 +1,189 @@
+# fast_path.py
+"""
+Deterministic answers to simple metric questions, without the LLM.
+
+"How much productive today?" or "time spent on YouTube this week" are pure
+aggregations (the prompt's ULTRA-BRIEF MODE), yet each one ran the whole agent:
+an LLM call to pick a tool, the tool call, and a second LLM call to phrase one
+number. The router below recognizes those questions with date_intent.py plus a
+few keyword patterns, calls the same MCP tool the agent would (whose totals are
+final and formatted with format_time_ms), and phrases the answer from a
+template: milliseconds instead of seconds.
+
+A question is only answered here when exactly one metric matches, the period
+resolves to a concrete date range, nothing negates the metric ("not productive"),
+and nothing asks for more than the number (why / breakdown / summary / compare /
+advice / a time of day ...). Everything else, including YouTube splits that
+still need the model to classify titles, returns None and goes through the
+agent as before. The router sees only the message, so app.py uses it for a
+conversation's first turn only.
+"""
+import json
+import os
+import re
+from datetime import datetime, timedelta
+
+from date_intent import normalize_question, resolve_question_range
+
+FAST_PATH_ENABLED = os.getenv("AI_FAST_PATH", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# Longer questions are rarely "just the number"
+MAX_WORDS = 14
+
+# Anything asking for more than one total goes to the agent (including the
+# prompt's DETAILED BREAKDOWN MODE triggers)
+OPEN_ENDED = re.compile(
+    r"\b(?:why|how (?:can|could|do|should)|should|tips?|advice|advise|improve|suggest\w*|recommend\w*|"
+    r"compare\w*|vs|versus|than|breakdown|break down|details?|detailed|list|which|what apps|top|most|least|"
+    r"summar\w*|reports?|show me|overview|"
+    r"trend\w*|each|per|daily|average|hour|between|morning|afternoon|evening|tonight|"
+    r"focus|session\w*|idle|away|meeting\w*|and|or|except|without|besides)\b"
+)
+
+# A negated metric ("not productive", "non-productive", "wasn't focused") is
+# not the metric it names; the agent works out what is meant
+NEGATION = re.compile(r"\b(?:not|non|never|no|dont|didnt|wasnt|werent|isnt|arent)\b|n't\b")
+
+METRIC_PATTERNS = {
+    "distracted": re.compile(r"\b(?:unproductive|distract\w*|wasted?|time wasting)\b"),
+    "productive": re.compile(r"\bproductiv(?:e|ity)\b"),
+    "youtube_educational": re.compile(r"\b(?:educational|learning) (?:youtube|videos?)\b|\byoutube (?:learning|education)\b"),
+    "youtube_entertainment": re.compile(r"\b(?:entertainment|fun) (?:youtube|videos?)\b|\byoutube entertainment\b"),
+    "youtube": re.compile(r"\byoutube\b"),
+    "screen_time": re.compile(
+        r"\b(?:screen time|total time|time tracked|tracked time|"
+        r"(?:on|at|using) (?:the|my) (?:computer|pc|laptop))\b"
+    ),
+}
+
+# A more specific metric wins over the general one it contains
+SUBSUMES = {
+    "distracted": ("productive",),
+    "youtube_educational": ("youtube",),
+    "youtube_entertainment": ("youtube",),
+}
+
+PRODUCTIVITY_METRICS = ("productive", "distracted", "screen_time")
+
+
+class FastQuestion:
+    """A question the router can answer: its metric and inclusive date range."""
+
+    def __init__(self, metric, start_date, end_date):
+        self.metric = metric
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def __repr__(self):
+        return f"FastQuestion({self.metric!r}, {self.start_date!r}, {self.end_date!r})"
+
+
+def parse_fast_question(question, today=None):
+    """
+    Recognize a single-metric question over a concrete period.
+
+    Args:
+        question: The user's message
+        today: Reference date (defaults to the local date)
+
+    Returns:
+        FastQuestion, or None when the question should go to the agent
+    """
+    text = normalize_question(question)
+    if not text or len(text.split()) > MAX_WORDS or OPEN_ENDED.search(text) or NEGATION.search(text):
+        return None
+
+    metrics = {name for name, pattern in METRIC_PATTERNS.items() if pattern.search(text)}
+    for metric in list(metrics):
+        metrics.difference_update(SUBSUMES.get(metric, ()))
+    if len(metrics) != 1:
+        return None
+
+    date_range = resolve_question_range(question, today)
+    if date_range is None:
+        return None
+    return FastQuestion(metrics.pop(), *date_range)
+
+
+def describe_period(start_date, end_date, today=None):
+    """'today', 'yesterday', 'on 2026-05-04' or 'from ... to ...' for a date range."""
+    today = today or datetime.now().date()
+    if start_date == end_date:
+        if start_date == today.strftime("%Y-%m-%d"):
+            return "today"
+        if start_date == (today - timedelta(days=1)).strftime("%Y-%m-%d"):
+            return "yesterday"
+        return f"on {start_date}"
+    return f"from {start_date} to {end_date}"
+
+
+def tool_payload(result):
+    """The dictionary a FocusBook tool returned, from its CallToolResult."""
+    if result.isError:
+        return None
+    for part in result.content:
+        if getattr(part, "type", None) == "text":
+            return json.loads(part.text)
+    return None
+
+
+def phrase_productivity(metric, summary, period):
+    total_ms = summary.get("total_ms") or 0
+    if not total_ms:
+        return f"No activity was tracked {period}."
+    if metric == "screen_time":
+        return f"Your total screen time {period} was {summary['total_formatted']}."
+    level = summary["levels"][metric]
+    if metric == "productive":
+        return (f"You were productive for {level['formatted_time']} {period} "
+                f"({level['percentage']}% of {summary['total_formatted']} tracked).")
+    return (f"You spent {level['formatted_time']} on distracting apps {period} "
+            f"({level['percentage']}% of {summary['total_formatted']} tracked).")
+
+
+def phrase_youtube(metric, youtube, period):
+    if not youtube.get("total_youtube_ms"):
+        return f"No YouTube watching was tracked {period}."
+    if metric == "youtube_educational":
+        return f"You watched {youtube['educational_formatted']} of educational YouTube {period}."
+    if metric == "youtube_entertainment":
+        return f"You watched {youtube['entertainment_formatted']} of entertainment YouTube {period}."
+    return (f"You watched {youtube['total_formatted']} of YouTube {period} "
+            f"({youtube['educational_formatted']} educational, {youtube['entertainment_formatted']} entertainment).")
+
+
+async def answer_fast_path(question, session, today=None):
+    """
+    Answer a simple metric question from the MCP tools, or return None.
+
+    Args:
+        question: The user's message
+        session: MCP session (supervisor or in-process) to call the tools on
+        today: Reference date (defaults to the local date)
+
+    Returns:
+        The reply text, or None when the agent has to answer
+    """
+    if not FAST_PATH_ENABLED:
+        return None
+    try:
+        parsed = parse_fast_question(question, today)
+        if parsed is None:
+            return None
+
+        arguments = {"start_date": parsed.start_date, "end_date": parsed.end_date}
+        period = describe_period(parsed.start_date, parsed.end_date, today)
+        if parsed.metric in PRODUCTIVITY_METRICS:
+            summary = tool_payload(await session.call_tool("get_productivity_summary", arguments))
+            if not summary or summary.get("error"):
+                return None
+            return phrase_productivity(parsed.metric, summary, period)
+
+        youtube = tool_payload(await session.call_tool("get_youtube_categorized_data", arguments))
+        # Undecided titles need the model to classify them before the split is final
+        if not youtube or youtube.get("error") or youtube.get("undecided_titles"):
+            return None
+        return phrase_youtube(parsed.metric, youtube, period)
+    except Exception as e:
+        print(f"Fast path skipped: {e}")
+        return None
@@ -0,0 +1,214 @@
+# focus_stats.py
+"""
+Focus-session statistics for the MCP tools.
+
+`focus_sessions` (one row per pomodoro-style session, with planned / actual /
+paused milliseconds and a status) and `focus_session_interruptions` (one row per
+interruption, with the app that caused it) had no tool, so every focus question
+made the agent improvise SQL through query_sql. Each statistic here is ONE
+aggregated query over a date range (focus_sessions.date, local 'YYYY-MM-DD'),
+and the tools cache the results (see tool_cache.cached_tool) with
+focus_data_version as their extra version, so edits to sessions drop them.
+
+Only 'focus' sessions are counted; short and long breaks are not focus time.
+Sessions still 'active' or 'paused' count as in progress, not as failures.
+"""
+from db_pool import db_connection
+
+FOCUS_TYPE = "focus"
+
+# Hours with fewer sessions than this are listed but not ranked as best / worst
+MIN_SESSIONS_PER_HOUR = 2
+
+# Cheap content fingerprint of both tables (a few rows per day)
+FOCUS_VERSION_SQL = """
+SELECT (SELECT COUNT(*) || ':' || COALESCE(MAX(id), 0) || ':' || COALESCE(MAX(updated_at), '') || ':' ||
+               TOTAL(COALESCE(actual_duration, 0)) || ':' || TOTAL(COALESCE(paused_duration, 0)) || ':' ||
+               COALESCE(group_concat(substr(status, 1, 2), ''), '')
+        FROM focus_sessions),
+       (SELECT COUNT(*) || ':' || COALESCE(MAX(id), 0) FROM focus_session_interruptions)
+"""
+
+SESSION_TOTALS_SQL = f"""
+SELECT COUNT(*) AS sessions,
+       TOTAL(status = 'completed') AS completed,
+       TOTAL(status = 'cancelled') AS cancelled,
+       TOTAL(status IN ('active', 'paused')) AS in_progress,
+       TOTAL(planned_duration) AS planned_ms,
+       TOTAL(COALESCE(actual_duration, 0)) AS actual_ms,
+       TOTAL(CASE WHEN status = 'completed' THEN planned_duration END) AS completed_planned_ms,
+       TOTAL(CASE WHEN status = 'completed' THEN actual_duration END) AS completed_actual_ms,
+       TOTAL(CASE WHEN status = 'cancelled' THEN planned_duration END) AS cancelled_planned_ms,
+       TOTAL(CASE WHEN status = 'cancelled' THEN actual_duration END) AS cancelled_actual_ms,
+       TOTAL(COALESCE(paused_duration, 0)) AS paused_ms,
+       TOTAL(COALESCE(paused_duration, 0) > 0) AS paused_sessions,
+       AVG(productivity) AS average_rating,
+       COUNT(DISTINCT date) AS days_with_focus
+FROM focus_sessions
+WHERE type = '{FOCUS_TYPE}' AND date BETWEEN ? AND ?
+"""
+
+# One row per app, plus the range totals on every row. Sessions without any
+# interruption join as an app group with 0 interruptions, so the totals are
+# there even when nothing interrupted the user.
+INTERRUPTION_APPS_SQL = f"""
+WITH sessions AS (
+    SELECT id, COALESCE(actual_duration, 0) AS actual_ms
+    FROM focus_sessions
+    WHERE type = '{FOCUS_TYPE}' AND date BETWEEN ? AND ?
+)
+SELECT COALESCE(NULLIF(TRIM(i.app_name), ''), '(unknown)') AS app_name,
+       COUNT(i.id) AS interruptions,
+       COUNT(DISTINCT i.focus_session_id) AS sessions_hit,
+       MAX(i.reason) AS sample_reason,
+       SUM(COUNT(i.id)) OVER () AS total_interruptions,
+       (SELECT COUNT(*) FROM sessions) AS total_sessions,
+       (SELECT COUNT(DISTINCT x.focus_session_id) FROM focus_session_interruptions x
+        WHERE x.focus_session_id IN (SELECT id FROM sessions)) AS interrupted_sessions,
+       (SELECT TOTAL(actual_ms) FROM sessions) AS focus_ms
+FROM sessions
+LEFT JOIN focus_session_interruptions i ON i.focus_session_id = sessions.id
+GROUP BY 1
+ORDER BY interruptions DESC
+"""
+
+HOURLY_SQL = f"""
+SELECT CAST(strftime('%H', s.start_time, 'localtime') AS INTEGER) AS hour,
+       COUNT(*) AS sessions,
+       TOTAL(s.status = 'completed') AS completed,
+       TOTAL(s.status = 'cancelled') AS cancelled,
+       TOTAL(s.planned_duration) AS planned_ms,
+       TOTAL(COALESCE(s.actual_duration, 0)) AS actual_ms,
+       TOTAL(COALESCE(i.interruptions, 0)) AS interruptions,
+       AVG(s.productivity) AS average_rating
+FROM focus_sessions s
+LEFT JOIN (
+    SELECT focus_session_id, COUNT(*) AS interruptions
+    FROM focus_session_interruptions
+    GROUP BY focus_session_id
+) i ON i.focus_session_id = s.id
+WHERE s.type = '{FOCUS_TYPE}' AND s.date BETWEEN ? AND ?
+GROUP BY hour
+ORDER BY hour
+"""
+
+
+def focus_data_version():
+    """Version of the focus tables, for tool_cache.cached_tool(extra_version=...)."""
+    with db_connection() as conn:
+        return tuple(conn.execute(FOCUS_VERSION_SQL).fetchone())
+
+
+def ratio(part, whole, digits=1):
+    """part / whole as a percentage, or None when whole is 0."""
+    return round(part * 100.0 / whole, digits) if whole else None
+
+
+def per_hour(count, time_ms):
+    """Events per hour of time_ms, or None without time."""
+    return round(count * 3600000.0 / time_ms, 2) if time_ms else None
+
+
+def session_totals(conn, start_date, end_date):
+    """
+    Completion rate, actual vs planned time and pause overhead of the focus sessions.
+
+    Returns:
+        Dictionary of counts, millisecond totals and percentages
+    """
+    row = dict(conn.execute(SESSION_TOTALS_SQL, (start_date, end_date)).fetchone())
+    finished = row["completed"] + row["cancelled"]
+    return {
+        "sessions": row["sessions"],
+        "completed": int(row["completed"]),
+        "cancelled": int(row["cancelled"]),
+        "in_progress": int(row["in_progress"]),
+        "completion_rate": ratio(row["completed"], finished),
+        "planned_ms": int(row["planned_ms"]),
+        "actual_ms": int(row["actual_ms"]),
+        "actual_vs_planned": ratio(row["actual_ms"], row["planned_ms"]),
+        "completed_actual_vs_planned": ratio(row["completed_actual_ms"], row["completed_planned_ms"]),
+        "cancelled_actual_vs_planned": ratio(row["cancelled_actual_ms"], row["cancelled_planned_ms"]),
+        "paused_ms": int(row["paused_ms"]),
+        "paused_sessions": int(row["paused_sessions"]),
+        # Pause time on top of the focused time: 10.0 = 6 minutes paused per focused hour
+        "pause_overhead": ratio(row["paused_ms"], row["actual_ms"]),
+        "average_rating": round(row["average_rating"], 2) if row["average_rating"] is not None else None,
+        "days_with_focus": row["days_with_focus"],
+    }
+
+
+def interruption_stats(conn, start_date, end_date, top_n=10):
+    """
+    Interruptions per focused hour and the apps that caused them.
+
+    Returns:
+        Dictionary with totals, the rate per focused hour and the top_n apps
+    """
+    rows = [dict(row) for row in conn.execute(INTERRUPTION_APPS_SQL, (start_date, end_date))]
+    first = rows[0] if rows else {}
+    total = first.get("total_interruptions", 0)
+    sessions = first.get("total_sessions", 0)
+    interrupted = first.get("interrupted_sessions", 0)
+    focus_ms = first.get("focus_ms", 0)
+    apps = [row for row in rows if row["interruptions"]]
+
+    return {
+        "sessions": sessions,
+        "interruptions": total,
+        "interrupted_sessions": interrupted,
+        "interrupted_session_share": ratio(interrupted, sessions),
+        "focus_ms": int(focus_ms),
+        "interruptions_per_hour": per_hour(total, focus_ms),
+        "interruptions_per_session": round(total / sessions, 2) if sessions else None,
+        "apps": [
+            {
+                "app_name": row["app_name"],
+                "interruptions": row["interruptions"],
+                "share": ratio(row["interruptions"], total),
+                "sessions_hit": row["sessions_hit"],
+                "sample_reason": row["sample_reason"],
+            }
+            for row in apps[:max(0, top_n)]
+        ],
+    }
+
+
+def hourly_focus(conn, start_date, end_date):
+    """
+    Focus quality per local starting hour, with the best and worst hours.
+
+    Hours are ranked by completion rate, then fewer interruptions per focused
+    hour, then more focused time; only hours with MIN_SESSIONS_PER_HOUR sessions
+    are ranked.
+
+    Returns:
+        Dictionary with per-hour rows and the ranked best / worst hours
+    """
+    hours = []
+    for row in conn.execute(HOURLY_SQL, (start_date, end_date)):
+        finished = row["completed"] + row["cancelled"]
+        hours.append({
+            "hour": row["hour"],
+            "sessions": row["sessions"],
+            "completion_rate": ratio(row["completed"], finished),
+            "actual_vs_planned": ratio(row["actual_ms"], row["planned_ms"]),
+            "actual_ms": int(row["actual_ms"]),
+            "interruptions_per_hour": per_hour(row["interruptions"], row["actual_ms"]),
+            "average_rating": round(row["average_rating"], 2) if row["average_rating"] is not None else None,
+        })
+
+    def score(hour):
+        return (
+            hour["completion_rate"] if hour["completion_rate"] is not None else -1,
+            -(hour["interruptions_per_hour"] if hour["interruptions_per_hour"] is not None else 0),
+            hour["actual_ms"],
+        )
+
+    ranked = sorted((hour for hour in hours if hour["sessions"] >= MIN_SESSIONS_PER_HOUR), key=score, reverse=True)
+    return {
+        "hours": hours,
+        "best_hours": [hour["hour"] for hour in ranked[:3]],
+        "worst_hour": ranked[-1]["hour"] if len(ranked) > 1 else None,
+        "ranked_hours": len(ranked),
+    }
@@ -0,0 +1,86 @@
+# inprocess_mcp.py
+"""
+In-process MCP transport: the FastMCP tools of math_mcp_server, called directly.
+
+In stdio mode every tool call is JSON-RPC over a pipe to a second Python process
+(`python math_mcp_server.py`, or `ai_service.exe --run-mcp-server` when frozen):
+a second interpreter at startup, a second copy of every cache in memory, and a
+serialize / parse round trip per call. With FOCUSBOOK_MCP_TRANSPORT=inprocess the
+server module is imported into the service itself and InProcessMCPSession stands
+in for the ClientSession: it has the methods langchain_mcp_adapters calls
+(call_tool, list_tools, get_prompt, ...) and answers them from the FastMCP
+instance, so load_mcp_tools / load_mcp_prompt and the graph are unchanged.
+
+The server is a ThreadedFastMCP, so each tool call runs on a worker thread
+instead of blocking the service's event loop.
+stdio stays the default: it isolates the service from a crashing tool and lets
+mcp_supervisor.py respawn the server.
+"""
+import asyncio
+import importlib
+import time
+
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.types import CallToolResult, ListPromptsResult, ListToolsResult, TextContent
+
+from mcp_supervisor import LatencyWindow
+
+def to_call_tool_result(result):
+    """CallToolResult of FastMCP.call_tool output, as the stdio server would send it."""
+    if isinstance(result, tuple):
+        content, structured = result
+        return CallToolResult(content=list(content), structuredContent=structured)
+    return CallToolResult(content=list(result))
+
+
+class InProcessMCPSession:
+    """ClientSession stand-in backed by the math_mcp_server FastMCP instance."""
+
+    def __init__(self):
+        self.server = None
+        self.tool_names = None
+        self.latency = LatencyWindow()
+        self._started_at = None
+
+    async def start(self):
+        # Imported here (off the event loop) so stdio mode never loads the server into this process
+        mcp = (await asyncio.to_thread(importlib.import_module, "math_mcp_server")).mcp
+
+        self.server = mcp
+        self.tool_names = sorted(tool.name for tool in await mcp.list_tools())
+        self._started_at = time.monotonic()
+
+    async def close(self):
+        pass
+
+    async def call_tool(self, name, arguments=None, read_timeout_seconds=None, progress_callback=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = await self.server.call_tool(name, arguments or {})
+        except ToolError as e:
+            # The stdio server reports tool failures as an error result, not a protocol error
+            self.latency.errors += 1
+            return CallToolResult(content=[TextContent(type="text", text=str(e))], isError=True)
+        self.latency.record(name, started)
+        return to_call_tool_result(result)
+
+    async def list_tools(self, cursor=None, **kwargs):
+        return ListToolsResult(tools=await self.server.list_tools())
+
+    async def get_prompt(self, name, arguments=None, **kwargs):
+        return await self.server.get_prompt(name, arguments)
+
+    async def list_prompts(self, *args, **kwargs):
+        return ListPromptsResult(prompts=await self.server.list_prompts())
+
+    async def send_ping(self):
+        pass
+
+    async def health(self):
+        return {
+            "transport": "inprocess",
+            "status": "ok" if self.server is not None else "starting",
+            "session_age_s": round(time.monotonic() - self._started_at, 1) if self._started_at else None,
+            "tool_count": len(self.tool_names or ()),
+            "tool_latency_ms": self.latency.report(),
+        }
@@ -0,0 +1,309 @@
+# interval_index.py
+"""
+In-process interval index over the activity logs, for time-of-day questions.
+
+"What was I doing between 2pm and 4pm on Tuesday", "where are the gaps in my
+day" and "longest uninterrupted coding stretch" are interval problems: overlap,
+union and merge over `span(start, end)` or `timestamps(start_time, duration)`.
+In SQL the agent had to improvise them with self-joins; here each log is held in
+memory as a start-sorted index, built once per MCP process:
+
+    starts   sorted interval starts (epoch ms)
+    ends     the matching ends
+    max_end  running maximum of ends (max_end[i] = max(ends[:i + 1]))
+
+Because max_end never decreases, the intervals overlapping [low, high) are the
+positions from bisect(max_end, low) to bisect(starts, high): an overlap query is
+two binary searches plus a scan of the candidates, even over a year of data.
+
+### Incremental refresh
+Ids only grow, so a refresh reads only the rows above the stored high-water mark
+and appends them; rows arriving in start order keep the index sorted without any
+re-sort. `timestamps` rows are rewritten as delete + insert whenever their
+app_usage row is saved, so new timestamps replace the indexed ones of the same
+app_usage row. A count of the source rows up to the high-water mark then checks
+the index; any other deletion (history cleared) makes it rebuild from scratch.
+Refreshes are rate-limited to once per REFRESH_INTERVAL_S.
+
+Only ids and raw keys are indexed. Names, categories and productivity are resolved
+when a query runs (span rules via span_resolver, app_usage rows by id), so edited
+rules and retagged categories apply immediately.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+from span_resolver import get_matcher_index
+
+SPANS = "spans"
+APP_USAGE = "app_usage"
+SOURCES = (SPANS, APP_USAGE)
+
+# Minimum seconds between two refreshes of one index (same as rollup_cache.py).
+REFRESH_INTERVAL_S = 5.0
+
+# Both productivity vocabularies map to one for filtering (span model / app_usage model)
+PRODUCTIVITY_ALIASES = {"distracted": "distracting", "unproductive": "distracting"}
+
+# Rows per `IN (...)` lookup, under SQLite's bound-parameter limit
+LOOKUP_CHUNK = 500
+
+_EPOCH_MS = "CAST(ROUND((julianday({0}) - 2440587.5) * 86400000) AS INTEGER)"
+
+# Per source: the newest id, the rows up to an id, and the rows after an id.
+# Rows without a positive duration are never indexed, on either side of the count.
+_SPAN_VALID = "julianday(end) > julianday(start)"
+_TIMESTAMP_VALID = "duration > 0 AND julianday(start_time) IS NOT NULL"
+
+SOURCE_SQL = {
+    SPANS: {
+        "max_id": "SELECT COALESCE(MAX(id), 0) FROM span",
+        "count": f"SELECT COUNT(*) FROM span WHERE id <= ? AND {_SPAN_VALID}",
+        "load": f"""
+            SELECT id, {_EPOCH_MS.format("start")} AS start_ms, {_EPOCH_MS.format("end")} AS end_ms,
+                   key_app, key_app_name, key_domain, key_path, title
+            FROM span WHERE id > ? AND {_SPAN_VALID}
+        """,
+    },
+    APP_USAGE: {
+        "max_id": "SELECT COALESCE(MAX(id), 0) FROM timestamps",
+        "count": f"SELECT COUNT(*) FROM timestamps WHERE id <= ? AND {_TIMESTAMP_VALID}",
+        "load": f"""
+            SELECT id, {_EPOCH_MS.format("start_time")} AS start_ms,
+                   {_EPOCH_MS.format("start_time")} + duration AS end_ms, app_usage_id
+            FROM timestamps WHERE id > ? AND {_TIMESTAMP_VALID}
+        """,
+    },
+}
+
+APP_USAGE_LABELS_SQL = """
+SELECT au.id, au.app_name, au.category, au.domain, c.type
+FROM app_usage au
+LEFT JOIN categories c ON c.name = au.category
+WHERE au.id IN ({placeholders})
+"""
+
+
+def canonical_productivity(value):
+    value = (value or "").strip().lower()
+    return PRODUCTIVITY_ALIASES.get(value, value)
+
+
+class IntervalIndex:
+    """Start-sorted intervals of one activity log, refreshed by id high-water mark."""
+
+    def __init__(self, source):
+        self.source = source
+        self._lock = threading.Lock()
+        self._starts = []
+        self._ends = []
+        self._keys = []
+        self._max_end = []
+        self._interned = {}
+        self._hwm_id = 0
+        self._last_refresh = 0.0
+
+    def __len__(self):
+        return len(self._starts)
+
+    def _key(self, row):
+        if self.source == SPANS:
+            key = (row["key_app"], row["key_app_name"], row["key_domain"], row["key_path"], row["title"])
+        else:
+            key = row["app_usage_id"]
+        # One shared tuple per distinct key keeps a year of spans small
+        return self._interned.setdefault(key, key)
+
+    def _clear(self):
+        self._starts, self._ends, self._keys, self._max_end = [], [], [], []
+        self._interned = {}
+        self._hwm_id = 0
+
+    def _append(self, entries):
+        """Add (start, end, key) entries, keeping the index sorted by start."""
+        entries.sort(key=lambda entry: entry[0])
+        if self._starts and entries and entries[0][0] < self._starts[-1]:
+            # Out-of-order arrivals: merge and rebuild the running maximum
+            entries = list(zip(self._starts, self._ends, self._keys)) + entries
+            entries.sort(key=lambda entry: entry[0])
+            self._starts, self._ends, self._keys, self._max_end = [], [], [], []
+
+        running = self._max_end[-1] if self._max_end else None
+        for start, end, key in entries:
+            running = end if running is None or end > running else running
+            self._starts.append(start)
+            self._ends.append(end)
+            self._keys.append(key)
+            self._max_end.append(running)
+
+    def _drop_keys(self, keys):
+        """Remove every entry whose key is in keys."""
+        kept = [entry for entry in zip(self._starts, self._ends, self._keys) if entry[2] not in keys]
+        if len(kept) == len(self._starts):
+            return
+        self._starts, self._ends, self._keys, self._max_end = [], [], [], []
+        self._append(kept)
+
+    def _load(self, conn, after_id):
+        return [
+            (row["start_ms"], row["end_ms"], self._key(row))
+            for row in conn.execute(SOURCE_SQL[self.source]["load"], (after_id,))
+        ]
+
+    def refresh(self, conn, force=False):
+        """Load rows added since the last refresh (or rebuild after deletions)."""
+        with self._lock:
+            if not force and self._last_refresh and time.monotonic() - self._last_refresh < REFRESH_INTERVAL_S:
+                return
+            sql = SOURCE_SQL[self.source]
+            max_id = conn.execute(sql["max_id"]).fetchone()[0]
+
+            if max_id != self._hwm_id:
+                entries = self._load(conn, self._hwm_id)
+                if self.source == APP_USAGE:
+                    # sqliteConnection.js rewrites a row's timestamps as delete + insert:
+                    # new timestamps for an app_usage row replace the ones indexed for it
+                    self._drop_keys({key for _, _, key in entries})
+                self._append(entries)
+                self._hwm_id = max_id
+
+            if conn.execute(sql["count"], (self._hwm_id,)).fetchone()[0] != len(self._starts):
+                # Rows were deleted some other way (e.g. history cleared): rebuild
+                self._clear()
+                self._append(self._load(conn, 0))
+                self._hwm_id = max_id
+
+            self._last_refresh = time.monotonic()
+
+    def overlapping(self, low, high):
+        """(start, end, key) of every interval overlapping [low, high), in start order."""
+        with self._lock:
+            first = bisect_right(self._max_end, low)
+            last = bisect_left(self._starts, high)
+            return [
+                (self._starts[i], self._ends[i], self._keys[i])
+                for i in range(first, last)
+                if self._ends[i] > low
+            ]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_interval_index(conn, source=SPANS):
+    """Return the process-wide index of a source, refreshed against conn."""
+    if source not in SOURCES:
+        raise ValueError(f"Unknown source '{source}'. Use one of: {', '.join(SOURCES)}")
+    with _indexes_lock:
+        index = _indexes.get(source)
+        if index is None:
+            index = _indexes[source] = IntervalIndex(source)
+    index.refresh(conn)
+    return index
+
+
+# === Labels ===
+
+def describe_keys(conn, source, keys):
+    """
+    Resolve index keys to display labels.
+
+    Returns:
+        {key: (name, category, productivity)}
+    """
+    labels = {}
+    if source == SPANS:
+        matcher = get_matcher_index(conn)
+        for key in set(keys):
+            app, app_name, domain, path, title = key
+            category, productivity, _ = matcher.resolve(app, domain, path, title)
+            labels[key] = (domain or app_name or app, category, productivity)
+        return labels
+
+    ids = list(set(keys))
+    for start in range(0, len(ids), LOOKUP_CHUNK):
+        chunk = ids[start:start + LOOKUP_CHUNK]
+        sql = APP_USAGE_LABELS_SQL.format(placeholders=", ".join("?" for _ in chunk))
+        for row in conn.execute(sql, chunk):
+            labels[row["id"]] = (row["app_name"], row["category"], row["type"] or "neutral")
+    return labels
+
+
+def labelled(conn, source, intervals):
+    """(start, end, name, category, productivity) for (start, end, key) intervals."""
+    labels = describe_keys(conn, source, [key for _, _, key in intervals])
+    unknown = (None, None, "unrated")
+    return [(start, end) + labels.get(key, unknown) for start, end, key in intervals]
+
+
+# === Interval algebra ===
+
+def local_window_ms(date, start_time=None, end_time=None):
+    """
+    Epoch-ms bounds of a local time window on one date.
+
+    Args:
+        date: 'YYYY-MM-DD'
+        start_time: 'HH:MM' (default midnight)
+        end_time: 'HH:MM' (default the next midnight); '24:00' is accepted
+    """
+    day = datetime.strptime(date, "%Y-%m-%d")
+
+    def at(value, default):
+        if not value:
+            return day + default
+        hours, _, minutes = value.strip().partition(":")
+        return day + timedelta(hours=int(hours), minutes=int(minutes or 0))
+
+    low = at(start_time, timedelta(0))
+    high = at(end_time, timedelta(days=1))
+    if high <= low:
+        raise ValueError(f"end_time {end_time} must be after start_time {start_time}")
+    return int(low.timestamp() * 1000), int(high.timestamp() * 1000)
+
+
+def clip(intervals, low, high):
+    """Intervals cut to [low, high) (all of them overlap it, as from overlapping())."""
+    return [(max(start, low), min(end, high), key) for start, end, key in intervals]
+
+
+def merge(intervals, max_gap_ms=0):
+    """
+    Union of start-sorted intervals, joining intervals at most max_gap_ms apart.
+
+    Returns:
+        List of [start, end, members] blocks; members are the input intervals
+    """
+    blocks = []
+    for interval in intervals:
+        start, end = interval[0], interval[1]
+        if blocks and start - blocks[-1][1] <= max_gap_ms:
+            block = blocks[-1]
+            block[1] = max(block[1], end)
+            block[2].append(interval)
+        else:
+            blocks.append([start, end, [interval]])
+    return blocks
+
+
+def gaps(intervals, low, high, min_gap_ms):
+    """
+    Uncovered stretches of at least min_gap_ms between the first and last activity
+    in [low, high) (time before the first and after the last interval is not a gap).
+
+    Returns:
+        List of (start, end) pairs
+    """
+    blocks = merge(clip(intervals, low, high))
+    return [
+        (previous[1], following[0])
+        for previous, following in zip(blocks, blocks[1:])
+        if following[0] - previous[1] >= min_gap_ms
+    ]
+
+
+def covered_ms(intervals):
+    """Milliseconds covered by the union of start-sorted intervals."""
+    return sum(end - start for start, end, _ in merge(intervals))
@@ -1,27 +1,27 @@
 # langgraph_mcp_client.py
 from typing import List
-from typing_extensions import TypedDict
+from typing_extensions import TypedDict, NotRequired
 from typing import Annotated
 
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import tools_condition, ToolNode
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import AnyMessage, add_messages
 
 from langchain_mcp_adapters.tools import load_mcp_tools
-from langchain_mcp_adapters.resources import load_mcp_resources
 from langchain_mcp_adapters.prompts import load_mcp_prompt
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain.memory import ConversationBufferMemory
-from langchain_google_genai import ChatGoogleGenerativeAI
 import asyncio
+import httpx
+from datetime import datetime
 import os
 import sys
 
+from chat_history import HistoryManager, summary_prompt_suffix
+from prefetch import UsagePrefetcher
+
 # Get the directory where this script is located
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -49,17 +49,96 @@ else:
         env=os.environ.copy()  # Pass all environment variables to subprocess
     )
 
-async def create_graph(session):
+# How the agent reaches the MCP tools: "stdio" runs the server above as a supervised
+# subprocess (mcp_supervisor.py); "inprocess" imports it and calls the tools
+# directly, without a second interpreter (inprocess_mcp.py).
+MCP_TRANSPORT = os.getenv("FOCUSBOOK_MCP_TRANSPORT", "stdio").strip().lower()
+
+# Upper bound on LLM requests in flight at once across all /chat requests. Extra
+# turns wait on the semaphore instead of piling requests onto the provider's
+# rate limit; MCP tool traffic is not limited by it.
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("AI_MAX_CONCURRENT_LLM_CALLS", "4"))
+
+OPENAI_MODEL = "gpt-4o"
+GEMINI_MODEL = "gemini-2.5-flash"
+
+def get_provider_model():
+    """The configured (provider, model) pair, e.g. ('openai', 'gpt-4o')."""
+    provider = os.getenv("AI_PROVIDER", "openai").lower()
+    if provider == "gemini":
+        return provider, GEMINI_MODEL
+    if provider == "stub":
+        # Local stand-in for load tests (stub_llm.py), never a default
+        return provider, "stub"
+    return "openai", OPENAI_MODEL
+
+def import_chat_model_class(provider):
+    """
+    The LangChain chat model class of a provider, imported on first use.
+
+    Each provider SDK takes about a second to import (much longer from the
+    PyInstaller onefile build), so only the configured one is ever loaded.
+    """
+    if provider == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI
+    if provider == "stub":
+        from stub_llm import StubChatModel
+        return StubChatModel
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI
+
+def http_client_limits():
+    """Connection pool limits of the provider API client (both providers)."""
+    return httpx.Limits(
+        max_connections=MAX_CONCURRENT_LLM_CALLS * 2,
+        max_keepalive_connections=MAX_CONCURRENT_LLM_CALLS,
+        keepalive_expiry=300,
+    )
+
+def create_http_async_client():
+    """
+    One pooled HTTP client for the provider API, shared across turns.
+
+    Keeping connections alive means later turns (and the chat_node -> tool_node ->
+    chat_node round trips inside one turn) skip the TCP + TLS handshake.
+    """
+    return httpx.AsyncClient(
+        limits=http_client_limits(),
+        timeout=httpx.Timeout(120.0, connect=10.0),
+    )
+
+def prompt_context_suffix(now=None):
+    """
+    Per-request end of the system prompt: today's date and the current time.
+
+    The server's system_prompt is static so providers can cache it as a prefix;
+    only this short block (and the rolling summary) differs between requests,
+    and it is rebuilt every turn, so the date stays right past midnight.
+    """
+    now = now or datetime.now()
+    return (
+        f"\n=== CURRENT CONTEXT ===\n"
+        f"Today: {now:%Y-%m-%d} ({now:%A})\n"
+        f"Current Time: {now:%H:%M}\n"
+        f"Current Hour: {now.hour}\n"
+    )
+
+async def create_graph(session, checkpointer=None):
     """
     Create LangGraph agent with AI model from environment variables.
 
+    With a checkpointer, each thread_id in the run config keeps its own message
+    history, so callers only pass the new message of a turn.
+
     Environment variables (set by Electron app via start_service.py):
-    - AI_PROVIDER: 'openai' or 'gemini' (default: 'openai')
+    - AI_PROVIDER: 'openai' or 'gemini' (default: 'openai'); 'stub' for load tests
     - OPENAI_API_KEY: API key for OpenAI
     - GEMINI_API_KEY: API key for Google Gemini
     """
     # Get AI provider from environment variable (default to 'openai')
-    provider = os.getenv("AI_PROVIDER", "openai").lower()
+    provider, model = get_provider_model()
+    chat_model_class = import_chat_model_class(provider)
 
     print(f"Initializing AI service with provider: {provider}")
 
@@ -74,12 +153,18 @@ async def create_graph(session):
                 "Please configure your API key in the Settings page."
             )
 
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
+        # The google-genai SDK builds its own httpx clients from client_args, once
+        # per model, so this gives them the same pool as the OpenAI client
+        llm = chat_model_class(
+            model=model,
             temperature=0,
-            api_key=gemini_api_key
+            api_key=gemini_api_key,
+            client_args={"limits": http_client_limits()}
         )
-        print(f"Using Gemini model: gemini-2.5-flash")
+        print(f"Using Gemini model: {model}")
+    elif provider == "stub":
+        llm = chat_model_class()
+        print("Using the local stub model (load testing only)")
     else:
         # Default to OpenAI
         # Get OpenAI API key from environment variable
@@ -91,40 +176,67 @@ async def create_graph(session):
                 "Please configure your API key in the Settings page."
             )
 
-        llm = ChatOpenAI(
-            model="gpt-4o",
+        llm = chat_model_class(
+            model=model,
             temperature=0,
-            api_key=openai_api_key
+            api_key=openai_api_key,
+            http_async_client=create_http_async_client()
         )
-        print(f"Using OpenAI model: gpt-4o")
+        print(f"Using OpenAI model: {model}")
 
     tools = await load_mcp_tools(session)
     llm_with_tool = llm.bind_tools(tools)
 
+    # Static, so it is loaded once; the per-request parts follow it, the least
+    # changing first, to keep the provider's cached prompt prefix as long as possible
     system_prompt = await load_mcp_prompt(session, "system_prompt")
+    # Literal braces in the prompt text must not be read as template variables
+    system_text = system_prompt[0].content.replace("{", "{{").replace("}", "}}")
     prompt_template = ChatPromptTemplate.from_messages([
-        ("system", system_prompt[0].content),
+        ("system", system_text + "{conversation_summary}{current_context}"),
         MessagesPlaceholder("messages")
     ])
     chat_llm = prompt_template | llm_with_tool
 
     class State(TypedDict):
         messages: Annotated[List[AnyMessage], add_messages]
+        # Rolling summary of the turns the history node folded away
+        summary: NotRequired[str]
+
+    # Created per graph so it binds to the event loop the graph runs on
+    llm_slots = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
 
-    def chat_node(state: State) -> State:
-        state["messages"] = chat_llm.invoke({"messages": state["messages"]})
-        return state
+    async def chat_node(state: State) -> State:
+        # Awaiting the provider call keeps the event loop free for other /chat
+        # requests and the MCP stdio traffic while this turn waits on the LLM
+        async with llm_slots:
+            response = await chat_llm.ainvoke({
+                "messages": state["messages"],
+                "conversation_summary": summary_prompt_suffix(state.get("summary", "")),
+                "current_context": prompt_context_suffix(),
+            })
+        return {"messages": [response]}
 
     graph_builder = StateGraph(State)
+    # Runs once per turn, before the first LLM call, to keep the prompt bounded
+    graph_builder.add_node("history_node", HistoryManager(llm, llm_slots))
+    # Fetches the usage + YouTube data of a recognized date range concurrently,
+    # saving the model the round trips of asking for them
+    graph_builder.add_node("prefetch_node", UsagePrefetcher(tools))
     graph_builder.add_node("chat_node", chat_node)
+    # ToolNode runs all tool calls of one LLM turn concurrently over the session
     graph_builder.add_node("tool_node", ToolNode(tools=tools))
-    graph_builder.add_edge(START, "chat_node")
+    graph_builder.add_edge(START, "history_node")
+    graph_builder.add_edge("history_node", "prefetch_node")
+    graph_builder.add_edge("prefetch_node", "chat_node")
     graph_builder.add_conditional_edges("chat_node", tools_condition, {"tools": "tool_node", "__end__": END})
     graph_builder.add_edge("tool_node", "chat_node")
-    graph = graph_builder.compile()  
+    graph = graph_builder.compile(checkpointer=checkpointer)
     return graph
 
 async def main():
+    from langchain.memory import ConversationBufferMemory
+
     config = {"configurable": {"thread_id": 1234}}
 
     async with stdio_client(server_params) as (read, write):
@@ -1,12 +1,30 @@
 
 # math_mcp_server.py
-from mcp.server.fastmcp import FastMCP
+from threaded_fastmcp import ThreadedFastMCP
 from datetime import datetime ,timedelta
-import sqlite3
-import os
+import re
+import textwrap
 from sqlite3 import OperationalError, ProgrammingError
 
-mcp = FastMCP("Math")
+from db_pool import db_connection
+from rollup_cache import get_rollup_cache
+from span_resolver import local_day_bounds, summarize_spans
+from presence import BUCKETS, ms_to_local, summarize_active_productivity, summarize_presence
+from interval_index import (
+    SPANS, canonical_productivity, covered_ms, clip, gaps, get_interval_index, labelled, local_window_ms, merge
+)
+from productivity import summarize_productivity
+from analytics import usage_trends
+from tool_cache import cached_tool
+from sql_guard import QueryRejected, QueryTimeout, run_guarded
+from payload_encoding import column_total, columnar, encode_columnar, encode_records
+from focus_stats import focus_data_version, hourly_focus, interruption_stats, session_totals
+from youtube_classifier import (
+    EDUCATIONAL, ENTERTAINMENT, UNDECIDED, classify_titles, clean_title, record_verdicts, verdict_data_version
+)
+
+# Tool calls run on worker threads, so the calls of one LLM turn overlap
+mcp = ThreadedFastMCP("Math")
 
 # Prompts
 @mcp.prompt()
@@ -16,20 +34,29 @@ def example_prompt(question: str) -> str:
     Question: {question}
     """
 
-@mcp.prompt()
-def system_prompt() -> str:
-    today = datetime.now().strftime("%Y-%m-%d")
-    current_time = datetime.now().strftime("%H:%M")
-    current_hour = datetime.now().hour
-    day_of_week = datetime.now().strftime("%A")
-    
-    return f"""
+def slim_prompt(text):
+    """Dedent prompt text and drop trailing spaces and repeated blank lines (whitespace is tokens too)."""
+    lines = [line.rstrip() for line in textwrap.dedent(text).splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip() + "\n"
+
+# The system prompt is static so the providers can cache it as a prompt prefix:
+# nothing in it changes between requests. The current date and time go into a
+# small suffix the agent appends per request (langgraph_mcp_client.prompt_context_suffix).
+SYSTEM_PROMPT = slim_prompt("""
         you are a smart ai assistant of productivity tracking app
     🚨 CRITICAL INSTRUCTION: For PRODUCTIVITY questions:
-    1. FIRST call the appropriate tool to get raw app data:
+    0. For productive/unproductive TIME, PERCENTAGES or TOP APPS, call get_productivity_summary FIRST (one call, single day or range).
+       Its totals, percentages and top apps are FINAL and match the FocusBook dashboard - quote them directly, do NOT re-classify or re-sum.
+       If its result for the asked date/range is already in the conversation for this question (prefetched), use it - do NOT call it again.
+       Only fall back to the steps below when the question needs data the summary does not contain.
+       When the user asks about time they were ACTUALLY at the computer (excluding idle/away time), use get_active_productivity_totals; for away, idle or meeting time use get_presence_summary.
+       For a TIME WINDOW ("between 2pm and 4pm", "this morning") use get_activity_timeline; for breaks use find_activity_gaps; for the "longest stretch" of anything use get_longest_activity_run.
+       For FOCUS SESSIONS (pomodoro) use get_focus_session_stats, get_focus_interruptions and get_best_focus_times instead of query_sql.
+       For TRENDS over time (rolling averages, week-over-week change, peak hours, rising/falling apps), call get_usage_trends - its statistics are final too.
+    1. FIRST get raw app data - call the usage tool AND get_youtube_categorized_data for the same date/range TOGETHER in one turn (they run in parallel):
        - For single day: use get_app_usage_data
        - For date ranges ("last 7 days", "this week", etc.): use get_app_usage_data_range
-    2. **MANDATORY**: If ANY YouTube entries are found in the data, IMMEDIATELY call get_youtube_categorized_data to get intelligent categorization
+    2. **MANDATORY**: If ANY YouTube entries are found in the data, use get_youtube_categorized_data for intelligent categorization
     3. **CRITICAL - PREVENT DOUBLE COUNTING**: EXCLUDE all YouTube entries from step 1 data, ONLY use YouTube data from step 2
     4. USE YOUR NATURAL AI INTELLIGENCE to classify each NON-YOUTUBE app as productive/unproductive/neutral
     5. CALCULATE time totals using: Non-YouTube apps (step 1) + YouTube categorized data (step 2)
@@ -79,11 +106,12 @@ def system_prompt() -> str:
     - Format: "ServiceName: Xh Xm" then "Total distraction time: Xh Xm"
     
     **SPECIAL YOUTUBE HANDLING - AI-DRIVEN ANALYSIS:**
-    - **NATURAL AI INTELLIGENCE**: Use get_youtube_categorized_data to get raw YouTube content, then apply YOUR semantic understanding
-    - **DYNAMIC CLASSIFICATION**: Analyze each YouTube session's title/description using your natural language understanding:
+    - **FINISHED TOTALS**: get_youtube_categorized_data returns final educational_total_ms / entertainment_total_ms - use them as-is
+    - **UNDECIDED TITLES ONLY**: If the result lists "undecided_titles", classify ONLY those using your natural language understanding:
       * Educational content (tutorials, courses, learning, skill-building) = PRODUCTIVE
       * Entertainment content (funny videos, gaming, music, leisure) = UNPRODUCTIVE
-      * Use context, intent, and semantic meaning - NO hardcoded rules
+      * Use context, intent, and semantic meaning
+      * Then call record_youtube_verdicts once with {title: verdict} and call get_youtube_categorized_data again
     - **INTEGRATED CATEGORIZATION**:
       * Productive YouTube content should be grouped WITH other productive apps, not shown separately
       * Productive YouTube → "YouTube (Educational): [time]" - include this in the main productive activities list
@@ -93,16 +121,13 @@ def system_prompt() -> str:
       * When user asks for "unproductive time" → Include YouTube (Entertainment) in unproductive category  
       * When user asks for "YouTube time" → Show total OR separate categories based on context
       * When user asks for "details" or "breakdown" → Always show both categories separately
-    - **AI-POWERED AGGREGATION**:
-      * Analyze content semantically, sum times for each category
-      * Trust your natural intelligence to classify appropriately
+    - **AGGREGATION**:
+      * The educational / entertainment totals are already summed - do not re-add individual titles
     
     You are FocusBook AI, an intelligent productivity assistant that helps users understand and improve their digital habits.
     
     === CONTEXT ===
-    Today: {today} ({day_of_week})
-    Current Time: {current_time}
-    Current Hour: {current_hour}
+    Today's date, weekday and the current time are given at the end of this prompt (=== CURRENT CONTEXT ===).
     
     You have access to detailed app usage data from FocusBook's SQLite database. Always provide:
     - Accurate, data-driven insights
@@ -330,10 +355,12 @@ def system_prompt() -> str:
     **Be helpful, intelligent, and appropriately concise based on what the user actually asks for.**
     
     🚨 **CRITICAL: For PRODUCTIVITY-SPECIFIC questions only:**
-    1. **FIRST** call appropriate tool to get raw app data:
+    0. **PREFER get_productivity_summary** - it returns final totals, percentages and top apps per level in one call; use its numbers as-is
+       - A summary already present for this question (prefetched) is current - reuse it instead of calling again
+    1. **FIRST** get raw app data - request the usage tool and get_youtube_categorized_data (same date/range) in the SAME turn:
        - Single day: get_app_usage_data  
        - Date ranges: get_app_usage_data_range
-    2. **MANDATORY YOUTUBE CHECK**: If ANY YouTube entries found in step 1, IMMEDIATELY call get_youtube_categorized_data to replace YouTube classification
+    2. **MANDATORY YOUTUBE CHECK**: If ANY YouTube entries found in step 1, use get_youtube_categorized_data to replace YouTube classification
     3. **CRITICAL - AVOID DOUBLE COUNTING**: 
        - REMOVE all YouTube entries from the original app data (step 1) 
        - ONLY use YouTube data from get_youtube_categorized_data (step 2)
@@ -348,20 +375,24 @@ def system_prompt() -> str:
        - **BREAKDOWN MODE:** Individual app lists + percentages + AI remarks when explicitly requested
     7. **YOUTUBE HANDLING (CRITICAL - AI-DRIVEN):**
        - ALWAYS use get_youtube_categorized_data when YouTube entries exist
-       - Apply YOUR natural AI intelligence to analyze each session's content
-       - Classify based on semantic understanding: educational/learning = productive, entertainment/leisure = unproductive
+       - Use its educational / entertainment totals directly; only classify "undecided_titles" (then call record_youtube_verdicts)
+       - Educational/learning = productive, entertainment/leisure = unproductive
        - Include "YouTube (Educational)" in PRODUCTIVE totals
        - Include "YouTube (Entertainment)" in UNPRODUCTIVE totals
        - Show YouTube categories integrated with other apps: "YouTube (Educational): Xm" in productive list and "YouTube (Entertainment): Xm" in unproductive list (NEVER show individual video titles)
        - **NEVER double-count YouTube time** - use ONLY the categorized data
-       - **NO hardcoded rules** - trust your natural language understanding
+       - Titles are classified once and remembered - never re-classify titles the tool already decided
     8. **Then continue** with appropriate analysis
     
     **For other questions:** Answer normally without any productivity calculations
     
     
     
-    """
+    """)
+
+@mcp.prompt()
+def system_prompt() -> str:
+    return SYSTEM_PROMPT
 
 # Resources
 @mcp.resource("greeting://{name}")
@@ -374,27 +405,36 @@ def get_config() -> str:
 
 # === SQLite Helper ===
 
+# Undecided YouTube titles handed to the agent per call (the rest follow on the next call)
+UNDECIDED_TITLE_LIMIT = 50
+
 def get_db_connection():
-    try:
-        # Get database path from environment variable (set by Electron app)
-        db_path = os.environ.get('FOCUSBOOK_DB_PATH')
+    """Borrow a pooled, read-only connection (use as a context manager)."""
+    return db_connection()
 
-        if not db_path:
-            # Log available environment variables for debugging
-            print(f"ERROR: FOCUSBOOK_DB_PATH not set. Available env vars: {list(os.environ.keys())[:10]}")
-            raise RuntimeError("FOCUSBOOK_DB_PATH environment variable not set. Ensure the Electron app starts the AI service.")
+def resolve_date_range(date=None, start_date=None, end_date=None, days=None):
+    """Resolve the tools' date arguments into an inclusive (start_date, end_date)."""
+    if days:
+        end_date = datetime.now().strftime("%Y-%m-%d")
+        start_date = (datetime.now() - timedelta(days=days-1)).strftime("%Y-%m-%d")
+    elif date:
+        start_date = end_date = date
+    elif not start_date or not end_date:
+        start_date = end_date = datetime.now().strftime("%Y-%m-%d")
+    return start_date, end_date
 
-        print(f"Connecting to database at: {db_path}")
+# Range of the trend tools (usage trends, best focus times) when no dates are given
+TREND_DEFAULT_DAYS = 30
 
-        # Check if database file exists
-        if not os.path.exists(db_path):
-            raise RuntimeError(f"Database file does not exist at: {db_path}")
+def resolve_trend_range(date=None, start_date=None, end_date=None, days=None):
+    """resolve_date_range, defaulting to the last TREND_DEFAULT_DAYS days instead of today."""
+    if not (days or date or (start_date and end_date)):
+        days = TREND_DEFAULT_DAYS
+    return resolve_date_range(date, start_date, end_date, days)
 
-        return sqlite3.connect(db_path)
-    except OperationalError as e:
-        raise RuntimeError(f"Database connection failed: {str(e)}")
 @mcp.tool()
-def query_sql(sql: str) -> list[dict] | dict:
+@cached_tool()
+def query_sql(sql: str, cursor: str = None) -> dict | str:
     """
     Execute intelligent SQL queries on FocusBook's usage database with enhanced analysis.
 
@@ -433,46 +473,67 @@ def query_sql(sql: str) -> list[dict] | dict:
     - Peak hours: GROUP BY hour for time-of-day patterns  
     - App trends: Compare across date ranges
     - Focus sessions: Identify extended usage periods
+
+    ## Limits:
+    - Queries that would scan every row of a large table are rejected: filter it on
+      its date/time column with =, <, >, BETWEEN or IN (not !=, LIKE or substr())
+    - Queries are stopped after a few seconds
+    - At most 200 rows are returned per call. When more exist the result has
+      "truncated": true and a "next_cursor"; call query_sql again with the SAME sql
+      and cursor=next_cursor for the next rows (or aggregate instead). Without an
+      ORDER BY, rows come back sorted by their columns
+
+    ## Result format (columnar):
+    {"columns": ["app_name", "total_time"], "rows": [["Code", 5400000], ...], "row_count": 1}
+    Each row lists its values in the order of "columns".
+
+    Args:
+        sql: A single SELECT statement
+        cursor: next_cursor from a previous truncated result (omit for the first page)
     """
     if not sql.strip().lower().startswith("select"):
         raise ValueError("Only SELECT queries are allowed.")
 
-    conn = None
     try:
-        conn = get_db_connection()
-        conn.row_factory = sqlite3.Row  # Enable dict-like rows
-        cur = conn.cursor()
-        cur.execute(sql)
-        rows = cur.fetchall()
-        result = [dict(row) for row in rows]
-
-        if not result:
+        with get_db_connection() as conn:
+            columns, rows, next_cursor = run_guarded(conn, sql, cursor)
+
+        if not rows:
             return "No data found for this query. Try a different time period or condition."
 
+        result = encode_columnar(columnar(columns, rows))
+        if next_cursor:
+            result.update({
+                "truncated": True,
+                "next_cursor": next_cursor,
+                "message": f"Only {len(rows)} rows returned. Call query_sql again with the same sql and cursor=next_cursor for more, or aggregate with GROUP BY / SUM."
+            })
+
         # If `time_spent` or `total_time` column exists in the results, calculate total and format it
         time_column = None
-        if "time_spent" in result[0]:
+        if "time_spent" in columns:
             time_column = "time_spent"
-        elif "total_time" in result[0]:
+        elif "total_time" in columns:
             time_column = "total_time"
             
         if time_column:
             # Ensure accurate calculation with proper integer conversion
-            total_ms = sum(int(row[time_column]) for row in result if row[time_column] is not None)
+            total_ms = column_total(columns, rows, time_column)
             formatted = format_time_ms(total_ms)
 
-            return {
-                "summary": {
-                    "total_time_ms": total_ms,
-                    "formatted_total_time": formatted,
-                    "entry_count": len(result),
-                    "calculation_verified": True
-                },
-                "results": result
+            result["summary"] = {
+                "total_time_ms": total_ms,
+                "formatted_total_time": formatted,
+                "entry_count": len(rows),
+                # A truncated page only sums the rows it contains
+                "calculation_verified": not next_cursor
             }
 
         return result
 
+    except (QueryRejected, QueryTimeout):
+        raise
+
     except ProgrammingError as e:
         raise RuntimeError(f"SQL error: {str(e)}")
 
@@ -482,49 +543,43 @@ def query_sql(sql: str) -> list[dict] | dict:
     except Exception as e:
         raise RuntimeError(f"Unexpected error: {str(e)}")
 
-    finally:
-        if conn:
-            conn.close()
-
 @mcp.tool()
-def get_youtube_categorized_data(date: str = None, start_date: str = None, end_date: str = None, days: int = None) -> dict:
+@cached_tool(resolve_range=resolve_date_range, extra_version=verdict_data_version)
+def get_youtube_categorized_data(date: str = None, start_date: str = None, end_date: str = None, days: int = None, top_n: int = 10) -> dict:
     """
-    Get YouTube usage data with intelligent categorization into productive and unproductive sessions.
+    Get FINISHED educational vs entertainment YouTube totals for a day or date range.
+    
+    Each video title is classified once (stored verdicts, then keyword rules) and
+    the verdict is remembered, so educational_total_ms and entertainment_total_ms
+    are final. Titles the rules cannot decide are listed in "undecided_titles":
+    classify those yourself and call record_youtube_verdicts once, then call this
+    tool again for the final split.
     
     Args:
         date: Specific date in 'YYYY-MM-DD' format (for single day)
         start_date: Start date for range analysis
         end_date: End date for range analysis
         days: Number of days from today (e.g., 7 for last 7 days)
+        top_n: Number of top titles to list per verdict (default 10)
     
     Returns:
         Dictionary with YouTube data categorized as educational vs entertainment
     """
-    # Determine date range
-    if days:
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        start_date = (datetime.now() - timedelta(days=days-1)).strftime("%Y-%m-%d")
-    elif date:
-        start_date = end_date = date
-    elif not start_date or not end_date:
-        start_date = end_date = datetime.now().strftime("%Y-%m-%d")
+    # Same resolution as the cache key (cached_tool), so both see one range
+    start_date, end_date = resolve_date_range(date, start_date, end_date, days)
     
-    conn = None
     try:
-        conn = get_db_connection()
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        
-        # Query to get all YouTube-related entries
+        # YouTube time per window title in the range
         query = """
-        SELECT app_name, time_spent, category, description, domain, date, hour
+        SELECT description, app_name, SUM(time_spent) AS time_ms, COUNT(*) AS session_count
         FROM app_usage 
         WHERE date BETWEEN ? AND ? AND hour IS NOT NULL 
         AND (LOWER(domain) LIKE '%youtube%' OR LOWER(description) LIKE '%youtube%' OR LOWER(app_name) LIKE '%youtube%')
+        GROUP BY description, app_name
         """
         
-        cur.execute(query, (start_date, end_date))
-        rows = cur.fetchall()
+        with get_db_connection() as conn:
+            rows = conn.execute(query, (start_date, end_date)).fetchall()
         
         if not rows:
             return {
@@ -538,42 +593,53 @@ def get_youtube_categorized_data(date: str = None, start_date: str = None, end_d
                 "message": f"No YouTube data found between {start_date} and {end_date}"
             }
         
-        # Return raw YouTube data for AI to analyze and categorize intelligently
-        youtube_sessions = []
-        total_youtube_ms = 0
-        
+        # Merge rows that differ only in browser suffixes into one entry per title
+        titles = {}
+        session_count = 0
         for row in rows:
-            # Get content analysis data (not predetermined classification)
-            content_analysis = analyze_youtube_content_productivity(
-                row['description'] or '', 
-                row['app_name'] or '', 
-                row['domain'] or ''
-            )
-            
-            session_data = {
-                'app_name': row['app_name'],
-                'description': row['description'],
-                'domain': row['domain'],
-                'time_ms': row['time_spent'],
-                'formatted_time': format_time_ms(row['time_spent']),
-                'date': row['date'],
-                'hour': row['hour'],
-                'content_analysis': content_analysis
-            }
-            
-            youtube_sessions.append(session_data)
-            total_youtube_ms += row['time_spent']
+            title = clean_title(row['description'], row['app_name'])
+            titles[title] = titles.get(title, 0) + (row['time_ms'] or 0)
+            session_count += row['session_count']
         
-        return {
+        verdicts = classify_titles(titles)
+        totals = {EDUCATIONAL: 0, ENTERTAINMENT: 0, UNDECIDED: 0}
+        listed = {EDUCATIONAL: [], ENTERTAINMENT: [], UNDECIDED: []}
+        for title, time_ms in sorted(titles.items(), key=lambda item: -item[1]):
+            verdict, _ = verdicts[title]
+            totals[verdict] += time_ms
+            listed[verdict].append({
+                'title': title,
+                'time_ms': time_ms,
+                'formatted_time': format_time_ms(time_ms)
+            })
+        
+        total_youtube_ms = sum(totals.values())
+        result = {
             "start_date": start_date,
             "end_date": end_date,
-            "youtube_sessions": youtube_sessions,
+            "educational_total_ms": totals[EDUCATIONAL],
+            "educational_formatted": format_time_ms(totals[EDUCATIONAL]),
+            "entertainment_total_ms": totals[ENTERTAINMENT],
+            "entertainment_formatted": format_time_ms(totals[ENTERTAINMENT]),
             "total_youtube_ms": total_youtube_ms,
             "total_formatted": format_time_ms(total_youtube_ms),
-            "total_count": len(rows),
-            "instruction": "Use your natural AI intelligence to analyze each YouTube session's content and classify as productive (educational, learning, tutorials) or unproductive (entertainment, leisure) based on semantic understanding. Then calculate totals for each category."
+            "youtube_educational": encode_records(listed[EDUCATIONAL][:max(0, top_n)]),
+            "youtube_entertainment": encode_records(listed[ENTERTAINMENT][:max(0, top_n)]),
+            "title_count": len(titles),
+            "total_count": session_count
         }
         
+        if listed[UNDECIDED]:
+            result.update({
+                "undecided_total_ms": totals[UNDECIDED],
+                "undecided_formatted": format_time_ms(totals[UNDECIDED]),
+                "undecided_titles": [entry['title'] for entry in listed[UNDECIDED][:UNDECIDED_TITLE_LIMIT]],
+                "instruction": "Classify each undecided title as educational or entertainment by its meaning, call record_youtube_verdicts once with {title: verdict}, then call get_youtube_categorized_data again for the final totals."
+            })
+        else:
+            result["instruction"] = "Totals are final: educational = productive, entertainment = unproductive."
+        return result
+        
     except Exception as e:
         return {
             "start_date": start_date,
@@ -585,11 +651,38 @@ def get_youtube_categorized_data(date: str = None, start_date: str = None, end_d
             "total_youtube_ms": 0,
             "error": f"Error analyzing YouTube data: {str(e)}"
         }
-    finally:
-        if conn:
-            conn.close()
 
 @mcp.tool()
+def record_youtube_verdicts(verdicts: dict[str, str]) -> dict:
+    """
+    Remember educational / entertainment verdicts for YouTube titles.
+
+    Call this once with the "undecided_titles" returned by get_youtube_categorized_data,
+    after classifying each title by its meaning. Verdicts are stored permanently,
+    so the same title is never asked about again.
+
+    Args:
+        verdicts: Mapping of title to "educational" or "entertainment"
+
+    Returns:
+        Dictionary with the recorded and ignored titles
+    """
+    try:
+        # Cached YouTube totals depend on the store's version, so they are recomputed
+        recorded, ignored = record_verdicts(verdicts)
+        return {
+            "recorded": len(recorded),
+            "ignored": ignored,
+            "message": "Verdicts saved. Call get_youtube_categorized_data again for the final totals."
+        }
+    except Exception as e:
+        return {
+            "recorded": 0,
+            "error": f"Error recording YouTube verdicts: {str(e)}"
+        }
+
+@mcp.tool()
+@cached_tool(resolve_range=resolve_date_range)
 def get_app_usage_data_range(start_date: str = None, end_date: str = None, days: int = None) -> dict:
     """
     Get raw app usage data for a date range for AI to analyze and classify intelligently.
@@ -602,29 +695,13 @@ def get_app_usage_data_range(start_date: str = None, end_date: str = None, days:
     Returns:
         Dictionary with raw app data for AI analysis across date range
     """
-    if days:
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        start_date = (datetime.now() - timedelta(days=days-1)).strftime("%Y-%m-%d")
-    elif not start_date or not end_date:
-        # Default to today if no parameters
-        start_date = end_date = datetime.now().strftime("%Y-%m-%d")
+    # Same resolution as the cache key (cached_tool), so both see one range
+    start_date, end_date = resolve_date_range(start_date=start_date, end_date=end_date, days=days)
     
-    conn = None
     try:
-        conn = get_db_connection()
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        
-        # Query to get all app usage data for date range
-        query = """
-        SELECT app_name, SUM(time_spent) as total_time, category, description, domain 
-        FROM app_usage 
-        WHERE date BETWEEN ? AND ? AND hour IS NOT NULL 
-        GROUP BY app_name
-        """
-        
-        cur.execute(query, (start_date, end_date))
-        rows = cur.fetchall()
+        # Per-app totals for the range come from the hourly rollup, so a long range
+        # costs about the same as a single day
+        rows = get_rollup_cache().app_totals(start_date, end_date)
         
         if not rows:
             return {
@@ -649,7 +726,7 @@ def get_app_usage_data_range(start_date: str = None, end_date: str = None, days:
         return {
             "start_date": start_date,
             "end_date": end_date,
-            "apps": app_data,
+            "apps": encode_records(app_data),
             "total_apps": len(app_data),
             "instruction": "Use your AI intelligence to classify each app as productive/unproductive/neutral based on semantic understanding"
         }
@@ -661,11 +738,9 @@ def get_app_usage_data_range(start_date: str = None, end_date: str = None, days:
             "apps": [],
             "error": f"Error fetching app usage data: {str(e)}"
         }
-    finally:
-        if conn:
-            conn.close()
 
 @mcp.tool()
+@cached_tool(resolve_range=resolve_date_range)
 def get_app_usage_data(date: str = None) -> dict:
     """
     Get raw app usage data for AI to analyze and classify intelligently.
@@ -679,25 +754,11 @@ def get_app_usage_data(date: str = None) -> dict:
     Returns:
         Dictionary with raw app data for AI analysis
     """
-    if not date:
-        date = datetime.now().strftime("%Y-%m-%d")
+    date, _ = resolve_date_range(date)
     
-    conn = None
     try:
-        conn = get_db_connection()
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        
-        # Query to get all app usage data
-        query = """
-        SELECT app_name, SUM(time_spent) as total_time, category, description, domain 
-        FROM app_usage 
-        WHERE date = ? AND hour IS NOT NULL 
-        GROUP BY app_name, category
-        """
-        
-        cur.execute(query, (date,))
-        rows = cur.fetchall()
+        # Per-app totals for the day come from the hourly rollup
+        rows = get_rollup_cache().app_totals(date, date, by_category=True)
         
         if not rows:
             return {
@@ -720,7 +781,7 @@ def get_app_usage_data(date: str = None) -> dict:
         
         return {
             "date": date,
-            "apps": app_data,
+            "apps": encode_records(app_data),
             "total_apps": len(app_data),
             "instruction": "Use your AI intelligence to classify each app as productive/unproductive/neutral based on semantic understanding"
         }
@@ -731,31 +792,791 @@ def get_app_usage_data(date: str = None) -> dict:
             "apps": [],
             "error": f"Error fetching app usage data: {str(e)}"
         }
-    finally:
-        if conn:
-            conn.close()
 
-def analyze_youtube_content_productivity(description, app_name, domain):
+def percentage_of(part_ms, total_ms):
+    """Share of total_ms as a percentage rounded to one decimal (0 when empty)."""
+    return round(part_ms * 100.0 / total_ms, 1) if total_ms else 0.0
+
+@mcp.tool()
+def get_span_category_totals(date: str = None, start_date: str = None, end_date: str = None, days: int = None) -> dict:
     """
-    Return content data for AI to intelligently analyze using natural reasoning.
-    
+    Get time per category and per productivity level from the span activity log.
+
+    Spans are categorized with the user's CURRENT rules (most specific rule wins),
+    the same way the FocusBook dashboards do, so edited rules apply to past days too.
+    Totals are already summed - no further classification or arithmetic is needed.
+
     Args:
-        description: The description/title of the YouTube content
-        app_name: The app name (usually contains video title)
-        domain: The domain (youtube.com)
-    
+        date: Specific date in 'YYYY-MM-DD' format (for single day)
+        start_date: Start date for range analysis
+        end_date: End date for range analysis
+        days: Number of days from today (e.g., 7 for last 7 days)
+
     Returns:
-        Dictionary with content data for AI analysis (no predetermined classification)
+        Dictionary with categories (sorted by time) and productivity totals
     """
-    # Simply return the raw content for AI to analyze
-    content_text = f"{description} {app_name}".strip()
-    
+    start_date, end_date = resolve_date_range(date, start_date, end_date, days)
+
+    try:
+        start_iso, end_iso = local_day_bounds(start_date, end_date)
+        with get_db_connection() as conn:
+            summary = summarize_spans(conn, start_iso, end_iso)
+
+        total_ms = summary["total_ms"]
+        categories = [
+            {
+                'category': name,
+                'productivity': bucket['productivity'],
+                'time_ms': bucket['total_ms'],
+                'formatted_time': format_time_ms(bucket['total_ms']),
+                'percentage': percentage_of(bucket['total_ms'], total_ms),
+                'span_count': bucket['span_count']
+            }
+            for name, bucket in sorted(summary["categories"].items(), key=lambda item: -item[1]['total_ms'])
+        ]
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "categories": categories,
+            "productivity": format_productivity_totals(summary["productivity"], total_ms),
+            "total_ms": total_ms,
+            "total_formatted": format_time_ms(total_ms),
+            "span_count": summary["span_count"]
+        }
+
+    except Exception as e:
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "categories": [],
+            "error": f"Error resolving span categories: {str(e)}"
+        }
+
+@mcp.tool()
+def get_span_productivity_totals(date: str = None, start_date: str = None, end_date: str = None, days: int = None) -> dict:
+    """
+    Get productive / neutral / distracting / unrated time from the span activity log.
+
+    A smaller answer than get_span_category_totals for questions that only need
+    the productivity split. Totals and percentages are final.
+
+    Args:
+        date: Specific date in 'YYYY-MM-DD' format (for single day)
+        start_date: Start date for range analysis
+        end_date: End date for range analysis
+        days: Number of days from today (e.g., 7 for last 7 days)
+
+    Returns:
+        Dictionary with time and percentage per productivity level
+    """
+    start_date, end_date = resolve_date_range(date, start_date, end_date, days)
+
+    try:
+        start_iso, end_iso = local_day_bounds(start_date, end_date)
+        with get_db_connection() as conn:
+            summary = summarize_spans(conn, start_iso, end_iso)
+
+        total_ms = summary["total_ms"]
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "productivity": format_productivity_totals(summary["productivity"], total_ms),
+            "total_ms": total_ms,
+            "total_formatted": format_time_ms(total_ms)
+        }
+
+    except Exception as e:
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "productivity": {},
+            "error": f"Error resolving span productivity: {str(e)}"
+        }
+
+# Meetings listed individually by get_presence_summary (most recent first)
+MEETING_LIST_LIMIT = 20
+
+def format_presence_buckets(bucket, total_ms):
+    """Add formatted time and percentage to the presence buckets of one productivity level."""
+    return {
+        name: {
+            'time_ms': bucket[name],
+            'formatted_time': format_time_ms(bucket[name]),
+            'percentage': percentage_of(bucket[name], total_ms)
+        }
+        for name in BUCKETS
+    }
+
+@mcp.tool()
+def get_active_productivity_totals(date: str = None, start_date: str = None, end_date: str = None, days: int = None) -> dict:
+    """
+    Get productive / neutral / distracting time counting ONLY time the user was present.
+
+    Every activity span is intersected with the presence log (active / idle /
+    locked / suspended / unknown), so a tab left open during lunch is not counted
+    as work. Per productivity level the time is split into:
+    - active: the user was at the computer
+    - credited_absence: away, but the user labelled that absence 'working' or 'meeting'
+    - away: idle / locked / asleep, or an absence labelled 'break'
+    - no_presence_data: no presence record (older data)
+
+    Use active_only_ms for "real" productive time; credited_ms adds labelled
+    work absences. Totals and percentages are final.
+
+    Args:
+        date: Specific date in 'YYYY-MM-DD' format (for single day)
+        start_date: Start date for range analysis
+        end_date: End date for range analysis
+        days: Number of days from today (e.g., 7 for last 7 days)
+
+    Returns:
+        Dictionary with per-productivity-level presence buckets and active-only totals
+    """
+    start_date, end_date = resolve_date_range(date, start_date, end_date, days)
+
+    try:
+        start_iso, end_iso = local_day_bounds(start_date, end_date)
+        with get_db_connection() as conn:
+            summary = summarize_active_productivity(conn, start_iso, end_iso)
+
+        totals = summary["totals"]
+        active_ms = totals["active"]
+        productivity = {}
+        for level, bucket in summary["productivity"].items():
+            level_total = sum(bucket[name] for name in BUCKETS)
+            productivity[level] = {
+                'active_only_ms': bucket['active'],
+                'active_only_formatted': format_time_ms(bucket['active']),
+                'active_only_percentage': percentage_of(bucket['active'], active_ms),
+                'credited_ms': bucket['active'] + bucket['credited_absence'],
+                'credited_formatted': format_time_ms(bucket['active'] + bucket['credited_absence']),
+                'recorded_ms': level_total,
+                'presence': format_presence_buckets(bucket, level_total),
+                'span_count': bucket['span_count']
+            }
+
+        recorded_ms = sum(totals[name] for name in BUCKETS)
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "productivity": productivity,
+            "active_ms": active_ms,
+            "active_formatted": format_time_ms(active_ms),
+            "recorded_ms": recorded_ms,
+            "recorded_formatted": format_time_ms(recorded_ms),
+            "presence": format_presence_buckets(totals, recorded_ms),
+            "span_count": totals["span_count"]
+        }
+
+    except Exception as e:
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "productivity": {},
+            "error": f"Error computing active productivity: {str(e)}"
+        }
+
+@mcp.tool()
+def get_presence_summary(date: str = None, start_date: str = None, end_date: str = None, days: int = None) -> dict:
+    """
+    Get present vs away time from the presence log, with idle time broken down.
+
+    Returns time per presence type (active, idle, locked, suspended, unknown),
+    absence time per user label ('working', 'meeting', 'break', unlabelled),
+    annotated meeting time with the most recent meetings, and how many long
+    absences the user has not labelled yet. Use it for "how long was I away",
+    "how much time in meetings", "how much idle time" questions.
+
+    Args:
+        date: Specific date in 'YYYY-MM-DD' format (for single day)
+        start_date: Start date for range analysis
+        end_date: End date for range analysis
+        days: Number of days from today (e.g., 7 for last 7 days)
+
+    Returns:
+        Dictionary with presence type totals, absence label totals and meetings
+    """
+    start_date, end_date = resolve_date_range(date, start_date, end_date, days)
+
+    try:
+        start_iso, end_iso = local_day_bounds(start_date, end_date)
+        with get_db_connection() as conn:
+            summary = summarize_presence(conn, start_iso, end_iso)
+
+        logged_ms = summary["logged_ms"]
+        if not logged_ms:
+            return {
+                "start_date": start_date,
+                "end_date": end_date,
+                "logged_ms": 0,
+                "message": f"No presence data found between {start_date} and {end_date}"
+            }
+
+        def with_time(buckets, total_ms):
+            return {
+                name: {
+                    'time_ms': bucket['total_ms'],
+                    'formatted_time': format_time_ms(bucket['total_ms']),
+                    'percentage': percentage_of(bucket['total_ms'], total_ms),
+                    'span_count': bucket['span_count']
+                }
+                for name, bucket in buckets.items()
+            }
+
+        meetings = summary["meetings"]
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "presence_types": with_time(summary["types"], logged_ms),
+            "absence_labels": with_time(summary["absence_labels"], summary["absent_ms"]),
+            "active_ms": summary["active_ms"],
+            "active_formatted": format_time_ms(summary["active_ms"]),
+            "absent_ms": summary["absent_ms"],
+            "absent_formatted": format_time_ms(summary["absent_ms"]),
+            "credited_ms": summary["credited_ms"],
+            "credited_formatted": format_time_ms(summary["credited_ms"]),
+            "meeting_ms": summary["meeting_ms"],
+            "meeting_formatted": format_time_ms(summary["meeting_ms"]),
+            "meeting_count": len(meetings),
+            "recent_meetings": [
+                dict(meeting, formatted_time=format_time_ms(meeting['duration_ms']))
+                for meeting in meetings[::-1][:MEETING_LIST_LIMIT]
+            ],
+            "unlabelled_long_absences": summary["unlabelled_long_absences"],
+            "logged_ms": logged_ms,
+            "logged_formatted": format_time_ms(logged_ms)
+        }
+
+    except Exception as e:
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "presence_types": {},
+            "error": f"Error summarizing presence: {str(e)}"
+        }
+
+# Pieces of the same app closer than this are shown as one timeline entry
+TIMELINE_JOIN_MS = 60000
+
+def local_clock(time_ms):
+    """Local 'HH:MM' of epoch milliseconds."""
+    return ms_to_local(time_ms)[11:]
+
+def range_days(start_date, end_date):
+    """Every 'YYYY-MM-DD' of an inclusive date range."""
+    first = datetime.strptime(start_date, "%Y-%m-%d")
+    count = (datetime.strptime(end_date, "%Y-%m-%d") - first).days + 1
+    return [(first + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(max(count, 0))]
+
+@mcp.tool()
+def get_activity_timeline(date: str = None, start_time: str = None, end_time: str = None, source: str = SPANS, limit: int = 40) -> dict:
+    """
+    Get what the user was doing in a time window of one day ("between 2pm and 4pm on Tuesday").
+
+    Answers from an in-memory interval index, clipped exactly to the window: a
+    chronological timeline, time per app / site, time per productivity level and
+    how much of the window had no tracked activity.
+
+    Args:
+        date: Day in 'YYYY-MM-DD' format (default today)
+        start_time: Local window start 'HH:MM' 24h (default 00:00)
+        end_time: Local window end 'HH:MM' 24h (default end of day)
+        source: 'spans' (activity log with rule categories, default) or 'app_usage'
+        limit: Maximum timeline entries to return (totals always cover the whole window)
+
+    Returns:
+        Dictionary with timeline entries, per-app and per-productivity totals and coverage
+    """
+    date = date or datetime.now().strftime("%Y-%m-%d")
+
+    try:
+        low, high = local_window_ms(date, start_time, end_time)
+        with get_db_connection() as conn:
+            intervals = clip(get_interval_index(conn, source).overlapping(low, high), low, high)
+            pieces = labelled(conn, source, intervals)
+
+        timeline = []
+        apps = {}
+        productivity = {}
+        for start, end, name, category, level in pieces:
+            apps.setdefault(name, {'time_ms': 0, 'category': category, 'productivity': level})['time_ms'] += end - start
+            productivity[level] = productivity.get(level, 0) + end - start
+            previous = timeline[-1] if timeline else None
+            if previous and previous['name'] == name and start - previous['end_ms'] <= TIMELINE_JOIN_MS:
+                previous['end_ms'] = max(previous['end_ms'], end)
+                previous['time_ms'] += end - start
+            else:
+                timeline.append({'start_ms': start, 'end_ms': end, 'time_ms': end - start, 'name': name,
+                                 'category': category, 'productivity': level})
+
+        covered = covered_ms(intervals)
+        window_ms = high - low
+        return {
+            "date": date,
+            "window": f"{local_clock(low)}-{local_clock(high)}",
+            "timeline": [
+                {
+                    'start': local_clock(entry['start_ms']),
+                    'end': local_clock(entry['end_ms']),
+                    'name': entry['name'],
+                    'category': entry['category'],
+                    'productivity': entry['productivity'],
+                    'formatted_time': format_time_ms(entry['time_ms'])
+                }
+                for entry in timeline[:max(0, limit)]
+            ],
+            "timeline_truncated": len(timeline) > max(0, limit),
+            "apps": encode_records([
+                {
+                    'name': name,
+                    'category': app['category'],
+                    'productivity': app['productivity'],
+                    'time_ms': app['time_ms'],
+                    'formatted_time': format_time_ms(app['time_ms'])
+                }
+                for name, app in sorted(apps.items(), key=lambda item: -item[1]['time_ms'])
+            ]),
+            "productivity": {
+                level: {'time_ms': time_ms, 'formatted_time': format_time_ms(time_ms)}
+                for level, time_ms in sorted(productivity.items(), key=lambda item: -item[1])
+            },
+            "tracked_ms": covered,
+            "tracked_formatted": format_time_ms(covered),
+            "untracked_ms": window_ms - covered,
+            "untracked_formatted": format_time_ms(window_ms - covered)
+        }
+
+    except Exception as e:
+        return {
+            "date": date,
+            "timeline": [],
+            "error": f"Error building activity timeline: {str(e)}"
+        }
+
+@mcp.tool()
+def find_activity_gaps(date: str = None, start_date: str = None, end_date: str = None, days: int = None, min_gap_minutes: int = 15, start_time: str = None, end_time: str = None, source: str = SPANS, limit: int = 20) -> dict:
+    """
+    Find breaks: stretches with NO tracked activity between the first and last activity of each day.
+
+    Args:
+        date: Specific date in 'YYYY-MM-DD' format (for single day)
+        start_date: Start date for range analysis
+        end_date: End date for range analysis
+        days: Number of days from today (e.g., 7 for last 7 days)
+        min_gap_minutes: Shortest gap to report (default 15)
+        start_time: Only look after this local time each day, 'HH:MM' (optional)
+        end_time: Only look before this local time each day, 'HH:MM' (optional)
+        source: 'spans' (default) or 'app_usage'
+        limit: Maximum gaps to list, longest first (totals cover all gaps)
+
+    Returns:
+        Dictionary with the longest gaps, gap count and total gap time
+    """
+    start_date, end_date = resolve_date_range(date, start_date, end_date, days)
+    min_gap_ms = max(0, min_gap_minutes) * 60000
+
+    try:
+        found = []
+        with get_db_connection() as conn:
+            index = get_interval_index(conn, source)
+            for day in range_days(start_date, end_date):
+                low, high = local_window_ms(day, start_time, end_time)
+                found.extend(gaps(index.overlapping(low, high), low, high, min_gap_ms))
+
+        total_ms = sum(end - start for start, end in found)
+        longest = sorted(found, key=lambda gap: gap[0] - gap[1])
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "min_gap_minutes": min_gap_minutes,
+            "gap_count": len(found),
+            "total_gap_ms": total_ms,
+            "total_gap_formatted": format_time_ms(total_ms),
+            "longest_gaps": [
+                {
+                    'start': ms_to_local(start),
+                    'end': local_clock(end),
+                    'duration_ms': end - start,
+                    'formatted_time': format_time_ms(end - start)
+                }
+                for start, end in longest[:max(0, limit)]
+            ]
+        }
+
+    except Exception as e:
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "longest_gaps": [],
+            "error": f"Error finding activity gaps: {str(e)}"
+        }
+
+@mcp.tool()
+def get_longest_activity_run(date: str = None, start_date: str = None, end_date: str = None, days: int = None, app: str = None, category: str = None, productivity: str = None, max_break_minutes: int = 2, source: str = SPANS, top_n: int = 3) -> dict:
+    """
+    Find the longest uninterrupted stretches of matching activity ("longest coding stretch").
+
+    Matching activity intervals are merged into runs; a run continues across
+    interruptions of at most max_break_minutes. Without filters, any tracked
+    activity counts.
+
+    Args:
+        date: Specific date in 'YYYY-MM-DD' format (for single day)
+        start_date: Start date for range analysis
+        end_date: End date for range analysis
+        days: Number of days from today (e.g., 7 for last 7 days)
+        app: Only activity whose app / site name contains this text (case-insensitive)
+        category: Only activity in this category (e.g. 'Coding')
+        productivity: Only 'productive', 'neutral' or 'distracting' activity
+        max_break_minutes: Longest interruption a run survives (default 2)
+        source: 'spans' (default) or 'app_usage'
+        top_n: Number of runs to return (default 3)
+
+    Returns:
+        Dictionary with the longest runs (start, end, duration, main apps)
+    """
+    start_date, end_date = resolve_date_range(date, start_date, end_date, days)
+
+    try:
+        low, _ = local_window_ms(start_date)
+        _, high = local_window_ms(end_date)
+        with get_db_connection() as conn:
+            pieces = labelled(conn, source, clip(get_interval_index(conn, source).overlapping(low, high), low, high))
+
+        app_filter = (app or "").strip().lower()
+        category_filter = (category or "").strip().lower()
+        productivity_filter = canonical_productivity(productivity)
+        matching = [
+            piece for piece in pieces
+            if (not app_filter or app_filter in (piece[2] or "").lower())
+            and (not category_filter or category_filter == (piece[3] or "").lower())
+            and (not productivity_filter or productivity_filter == canonical_productivity(piece[4]))
+        ]
+
+        runs = sorted(merge(matching, max(0, max_break_minutes) * 60000), key=lambda run: run[0] - run[1])
+
+        def describe(run):
+            start, end, members = run
+            names = {}
+            for member in members:
+                names[member[2]] = names.get(member[2], 0) + member[1] - member[0]
+            active_ms = covered_ms(members)
+            return {
+                'start': ms_to_local(start),
+                'end': ms_to_local(end),
+                'duration_ms': end - start,
+                'formatted_time': format_time_ms(end - start),
+                'active_ms': active_ms,
+                'breaks_ms': end - start - active_ms,
+                'main_apps': [name for name, _ in sorted(names.items(), key=lambda item: -item[1])[:3]]
+            }
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "filters": {"app": app, "category": category, "productivity": productivity},
+            "max_break_minutes": max_break_minutes,
+            "run_count": len(runs),
+            "longest_runs": [describe(run) for run in runs[:max(0, top_n)]]
+        }
+
+    except Exception as e:
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "longest_runs": [],
+            "error": f"Error finding activity runs: {str(e)}"
+        }
+
+@mcp.tool()
+@cached_tool(resolve_range=resolve_date_range, extra_version=focus_data_version)
+def get_focus_session_stats(date: str = None, start_date: str = None, end_date: str = None, days: int = None) -> dict:
+    """
+    Get finished focus-session (pomodoro) statistics for a day or date range.
+
+    Counts only 'focus' sessions (not breaks). Completion rate is completed /
+    (completed + cancelled); sessions still running are reported as in_progress.
+    actual_vs_planned is focused time as a percentage of planned time, and
+    pause_overhead is paused time as a percentage of focused time.
+
+    Args:
+        date: Specific date in 'YYYY-MM-DD' format (for single day)
+        start_date: Start date for range analysis
+        end_date: End date for range analysis
+        days: Number of days from today (e.g., 7 for last 7 days)
+
+    Returns:
+        Dictionary with session counts, completion rate, planned / actual / paused time
+    """
+    start_date, end_date = resolve_date_range(date, start_date, end_date, days)
+
+    try:
+        with get_db_connection() as conn:
+            stats = session_totals(conn, start_date, end_date)
+
+        if not stats["sessions"]:
+            return {
+                "start_date": start_date,
+                "end_date": end_date,
+                "sessions": 0,
+                "message": f"No focus sessions found between {start_date} and {end_date}"
+            }
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            **stats,
+            "planned_formatted": format_time_ms(stats["planned_ms"]),
+            "actual_formatted": format_time_ms(stats["actual_ms"]),
+            "paused_formatted": format_time_ms(stats["paused_ms"])
+        }
+
+    except Exception as e:
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "error": f"Error computing focus session stats: {str(e)}"
+        }
+
+@mcp.tool()
+@cached_tool(resolve_range=resolve_date_range, extra_version=focus_data_version)
+def get_focus_interruptions(date: str = None, start_date: str = None, end_date: str = None, days: int = None, top_n: int = 10) -> dict:
+    """
+    Get how often focus sessions were interrupted and which apps caused it.
+
+    Args:
+        date: Specific date in 'YYYY-MM-DD' format (for single day)
+        start_date: Start date for range analysis
+        end_date: End date for range analysis
+        days: Number of days from today (e.g., 7 for last 7 days)
+        top_n: Number of interrupting apps to list (default 10)
+
+    Returns:
+        Dictionary with interruptions per focused hour / per session and the top apps
+    """
+    start_date, end_date = resolve_date_range(date, start_date, end_date, days)
+
+    try:
+        with get_db_connection() as conn:
+            stats = interruption_stats(conn, start_date, end_date, top_n=top_n)
+
+        if not stats["sessions"]:
+            return {
+                "start_date": start_date,
+                "end_date": end_date,
+                "sessions": 0,
+                "message": f"No focus sessions found between {start_date} and {end_date}"
+            }
+
+        apps = stats.pop("apps")
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            **stats,
+            "focus_formatted": format_time_ms(stats["focus_ms"]),
+            "apps": encode_records(apps)
+        }
+
+    except Exception as e:
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "apps": [],
+            "error": f"Error computing focus interruptions: {str(e)}"
+        }
+
+@mcp.tool()
+@cached_tool(resolve_range=resolve_trend_range, extra_version=focus_data_version)
+def get_best_focus_times(date: str = None, start_date: str = None, end_date: str = None, days: int = None) -> dict:
+    """
+    Get the best time of day to focus, from how focus sessions went per starting hour (default: last 30 days).
+
+    Hours are ranked by completion rate, then fewest interruptions per focused
+    hour; hours with fewer than 2 sessions are listed but not ranked.
+
+    Args:
+        date: Specific date in 'YYYY-MM-DD' format (for single day)
+        start_date: Start date for range analysis
+        end_date: End date for range analysis
+        days: Number of days from today (e.g., 90 for last 90 days)
+
+    Returns:
+        Dictionary with per-hour focus statistics, the best hours and the worst hour
+    """
+    start_date, end_date = resolve_trend_range(date, start_date, end_date, days)
+
+    try:
+        with get_db_connection() as conn:
+            stats = hourly_focus(conn, start_date, end_date)
+
+        if not stats["hours"]:
+            return {
+                "start_date": start_date,
+                "end_date": end_date,
+                "hours": [],
+                "message": f"No focus sessions found between {start_date} and {end_date}"
+            }
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            **stats,
+            "hours": encode_records(stats["hours"])
+        }
+
+    except Exception as e:
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "hours": [],
+            "error": f"Error computing best focus times: {str(e)}"
+        }
+
+@mcp.tool()
+@cached_tool(resolve_range=resolve_date_range)
+def get_productivity_summary(date: str = None, start_date: str = None, end_date: str = None, days: int = None, top_n: int = 5) -> dict:
+    """
+    Get finished productive / neutral / distracted totals for a day or date range.
+
+    Apps are classified server-side with the user's own category settings
+    (categories.type) and work-modes (modes.rollup), exactly like the FocusBook
+    dashboard. Totals and percentages are final - use them as-is instead of
+    classifying and summing app rows yourself.
+
+    Args:
+        date: Specific date in 'YYYY-MM-DD' format (for single day)
+        start_date: Start date for range analysis
+        end_date: End date for range analysis
+        days: Number of days from today (e.g., 7 for last 7 days)
+        top_n: Number of top apps to list per productivity level (default 5)
+
+    Returns:
+        Dictionary with per-level totals, percentages and top apps, plus per-mode totals
+    """
+    start_date, end_date = resolve_date_range(date, start_date, end_date, days)
+
+    try:
+        summary = summarize_productivity(start_date, end_date, top_n=max(0, top_n))
+        total_ms = summary["total_ms"]
+
+        if not total_ms:
+            return {
+                "start_date": start_date,
+                "end_date": end_date,
+                "total_ms": 0,
+                "message": f"No data found between {start_date} and {end_date}"
+            }
+
+        levels = {}
+        for verdict, bucket in summary["verdicts"].items():
+            levels[verdict] = {
+                'time_ms': bucket['total_ms'],
+                'formatted_time': format_time_ms(bucket['total_ms']),
+                'percentage': percentage_of(bucket['total_ms'], total_ms),
+                'app_count': bucket['app_count'],
+                'top_apps': [
+                    {
+                        'app_name': app['app_name'],
+                        'description': app['description'],
+                        'domain': app['domain'],
+                        'category': app['category'],
+                        'time_ms': app['time_ms'],
+                        'formatted_time': format_time_ms(app['time_ms']),
+                        'percentage': percentage_of(app['time_ms'], total_ms)
+                    }
+                    for app in bucket['top_apps']
+                ]
+            }
+
+        modes = [
+            {
+                'mode': mode['mode'],
+                'rollup': mode['rollup'],
+                'time_ms': mode['time_ms'],
+                'formatted_time': format_time_ms(mode['time_ms']),
+                'percentage': percentage_of(mode['time_ms'], total_ms)
+            }
+            for mode in summary["modes"]
+        ]
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "total_ms": total_ms,
+            "total_formatted": format_time_ms(total_ms),
+            "levels": levels,
+            "modes": modes
+        }
+
+    except Exception as e:
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "levels": {},
+            "error": f"Error summarizing productivity: {str(e)}"
+        }
+
+@mcp.tool()
+@cached_tool(resolve_range=resolve_trend_range)
+def get_usage_trends(date: str = None, start_date: str = None, end_date: str = None, days: int = None, window: int = 7, top_n: int = 5) -> dict:
+    """
+    Get finished TREND statistics for a date range (default: last 30 days).
+
+    Computed server-side over the whole range at once: daily totals with rolling
+    averages, weekly totals with week-over-week change, peak hours, the busiest
+    weekday, an average weekday x hour heatmap and the apps / categories that
+    rose or fell most in the last `window` days versus the `window` days before.
+    Use it for "trend", "compared to last week", "peak hours", "when am I most
+    active" questions instead of pulling raw rows.
+
+    Args:
+        date: Specific date in 'YYYY-MM-DD' format (for single day)
+        start_date: Start date for range analysis
+        end_date: End date for range analysis
+        days: Number of days from today (e.g., 90 for last 90 days)
+        window: Days per rolling average and top-movers period (default 7)
+        top_n: Number of rising / falling apps and categories to list (default 5)
+
+    Returns:
+        Dictionary of trend series and statistics; durations are whole minutes
+    """
+    start_date, end_date = resolve_trend_range(date, start_date, end_date, days)
+
+    try:
+        trends = usage_trends(start_date, end_date, window=window, top_n=max(0, top_n))
+        if not trends["total_min"]:
+            return {
+                "start_date": start_date,
+                "end_date": end_date,
+                "total_min": 0,
+                "message": f"No data found between {start_date} and {end_date}"
+            }
+        trends["daily"] = encode_columnar(trends["daily"])
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "total_formatted": format_time_ms(trends["total_min"] * 60000),
+            **trends
+        }
+
+    except Exception as e:
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "error": f"Error computing usage trends: {str(e)}"
+        }
+
+def format_productivity_totals(productivity, total_ms):
+    """Add formatted time and percentage to per-productivity span totals."""
     return {
-        'content': content_text,
-        'description': description,
-        'app_name': app_name,
-        'domain': domain,
-        'instruction': 'Use your natural AI intelligence to determine if this YouTube content is productive (educational, learning, skill-building) or unproductive (entertainment, leisure, time-wasting) based on semantic understanding of the content.'
+        level: {
+            'time_ms': bucket['total_ms'],
+            'formatted_time': format_time_ms(bucket['total_ms']),
+            'percentage': percentage_of(bucket['total_ms'], total_ms),
+            'span_count': bucket['span_count']
+        }
+        for level, bucket in productivity.items()
     }
 
 def format_time_ms(time_ms):
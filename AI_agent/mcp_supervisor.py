@@ -0,0 +1,415 @@
+# mcp_supervisor.py
+"""
+Supervised MCP client session: the math_mcp_server subprocess, respawned (from a
+warm spare) when it dies, behind the ClientSession methods the agent calls.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from datetime import timedelta
+
+import anyio
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import ClientSession
+from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+# How long a call waits for a (re)starting server before failing.
+READY_TIMEOUT_S = float(os.getenv("FOCUSBOOK_MCP_READY_TIMEOUT_S", "15"))
+
+# A tool call that takes longer than this is treated as a hung server.
+TOOL_CALL_TIMEOUT_S = float(os.getenv("FOCUSBOOK_MCP_TOOL_TIMEOUT_S", "60"))
+
+# Keep an initialized spare subprocess for instant failover (0 = respawn cold)
+WARM_SPARE = os.getenv("FOCUSBOOK_MCP_WARM_SPARE", "1") != "0"
+
+# Liveness ping of an idle session.
+PING_INTERVAL_S = 5.0
+PING_TIMEOUT_S = 2.0
+
+# Delay before respawning after consecutive failed starts: 0, 0.25, 0.5, 1, 2, 4, 5, 5 ...
+RESPAWN_BACKOFF_S = (0.0, 0.25, 0.5, 1.0, 2.0, 4.0, 5.0)
+
+# Tool calls remembered for the latency report
+LATENCY_WINDOW = 200
+
+REQUEST_TIMEOUT = 408  # McpError code of a timed-out request
+
+
+class MCPUnavailable(RuntimeError):
+    """No live MCP session within READY_TIMEOUT_S."""
+
+
+class ServerLost(RuntimeError):
+    """The server a request was sent to was lost before it answered."""
+
+
+def is_transport_error(error):
+    """True when a request failed because the session/subprocess is gone or hung."""
+    if isinstance(error, ServerLost):
+        return True
+    if isinstance(error, McpError):
+        return error.error.code in (CONNECTION_CLOSED, REQUEST_TIMEOUT)
+    return isinstance(error, (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream))
+
+
+def describe_error(error):
+    return f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class LatencyWindow:
+    """Latencies of the last LATENCY_WINDOW tool calls, for /health."""
+
+    def __init__(self):
+        self._calls = deque(maxlen=LATENCY_WINDOW)
+        self.errors = 0
+
+    def record(self, name, started):
+        self._calls.append((name, (time.perf_counter() - started) * 1000))
+
+    def report(self):
+        latencies = sorted(ms for _, ms in self._calls)
+        slowest = sorted(self._calls, key=lambda entry: -entry[1])[:3]
+        return {
+            "calls": len(latencies),
+            "errors": self.errors,
+            "p50": round(percentile(latencies, 0.5), 2) if latencies else None,
+            "p95": round(percentile(latencies, 0.95), 2) if latencies else None,
+            "max": round(latencies[-1], 2) if latencies else None,
+            "slowest": [{"tool": name, "ms": round(ms, 2)} for name, ms in slowest],
+        }
+
+
+async def ping(session):
+    """MCP ping that fails after PING_TIMEOUT_S instead of waiting on a hung server."""
+    with anyio.fail_after(PING_TIMEOUT_S):
+        await session.send_ping()
+
+
+class ServerProcess:
+    """
+    One math_mcp_server subprocess and its initialized ClientSession.
+
+    A dedicated task enters and exits the stdio_client / ClientSession contexts
+    (anyio requires both in the same task) and keeps them open until stop().
+    `lost` is set when the process exits or the supervisor gives up on it.
+    """
+
+    def __init__(self, server_params):
+        self.server_params = server_params
+        self.session = None
+        self.lost = asyncio.Event()
+        self.on_lost = None
+        self._initialized = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task = None
+        self._error = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._own())
+        initialized = asyncio.create_task(self._initialized.wait())
+        await asyncio.wait({initialized, self._task}, timeout=READY_TIMEOUT_S, return_when=asyncio.FIRST_COMPLETED)
+        initialized.cancel()
+        if self.session is None:
+            raise self._error or MCPUnavailable(f"MCP server did not initialize within {READY_TIMEOUT_S:g}s")
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=10)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+
+    def mark_lost(self, reason):
+        if self.lost.is_set():
+            return
+        self.lost.set()
+        if self.on_lost is not None:
+            self.on_lost(self, reason)
+
+    async def request(self, method, *args, **kwargs):
+        """Call a session method; raises ServerLost if the server is lost meanwhile."""
+        call = asyncio.create_task(getattr(self.session, method)(*args, **kwargs))
+        lost = asyncio.create_task(self.lost.wait())
+        try:
+            await asyncio.wait({call, lost}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            lost.cancel()
+            if not call.done():
+                call.cancel()
+        if not call.done() or call.cancelled():
+            raise ServerLost(f"MCP server lost during {method}")
+        return call.result()
+
+    async def _own(self):
+        try:
+            async with stdio_client(self.server_params) as (read, write):
+                # Pump the subprocess's stdout into the session so end-of-stream
+                # (the process exited) is seen the moment it happens
+                pump_send, pump_receive = anyio.create_memory_object_stream(0)
+                async with anyio.create_task_group() as tasks:
+                    tasks.start_soon(self._pump, read, pump_send)
+                    async with ClientSession(pump_receive, write) as session:
+                        await session.initialize()
+                        self.session = session
+                        self._initialized.set()
+                        await self._stop.wait()
+                    tasks.cancel_scope.cancel()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.lost.set()
+
+    async def _pump(self, source, sink):
+        async with sink:
+            try:
+                async for message in source:
+                    await sink.send(message)
+            except (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream):
+                pass
+        self.mark_lost("MCP subprocess exited")
+
+
+class MCPSupervisor:
+    """Owns the MCP server subprocess (and a warm spare) and replaces it when it dies."""
+
+    def __init__(self, server_params, on_tools_changed=None):
+        self.server_params = server_params
+        # Awaited with the new LangChain tools when a respawned server lists different tools
+        self.on_tools_changed = on_tools_changed
+
+        self._server = None
+        self._ready = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._closing = False
+        self._runner = None
+        self._refresh = None
+        self._stopping = set()
+
+        self.tool_names = None
+        self.restarts = 0
+        self.failed_starts = 0
+        self.last_error = None
+        self.last_recovery_ms = None
+        self._lost_at = None
+        self._ready_at = None
+        self.latency = LatencyWindow()
+
+    # === Lifecycle ===
+
+    async def start(self, timeout=READY_TIMEOUT_S):
+        """Spawn the subprocess and wait for the first session."""
+        self._runner = asyncio.create_task(self._run(), name="mcp-supervisor")
+        await self.wait_ready(timeout)
+
+    async def close(self):
+        self._closing = True
+        self._lost.set()
+        if self._runner is not None:
+            try:
+                await asyncio.wait_for(self._runner, timeout=15)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._runner.cancel()
+
+    async def wait_ready(self, timeout=READY_TIMEOUT_S):
+        """The live ServerProcess, waiting for a respawn if needed."""
+        if self._server is None or not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                raise MCPUnavailable(
+                    f"MCP server not available after {timeout:g}s"
+                    + (f" (last error: {self.last_error})" if self.last_error else "")
+                )
+        return self._server
+
+    def _on_server_lost(self, server, reason):
+        if server is not self._server:
+            return
+        print(f"MCP session lost: {reason}")
+        self._lost_at = time.monotonic()
+        self.last_error = reason
+        self._ready.clear()
+        self._lost.set()
+
+    async def _run(self):
+        spare = None
+        while not self._closing:
+            server = await spare if spare is not None else None
+            spare = None
+            if server is None or server.lost.is_set():
+                if server is not None:
+                    self._stop_later(server)
+                delay = RESPAWN_BACKOFF_S[min(self.failed_starts, len(RESPAWN_BACKOFF_S) - 1)]
+                if delay:
+                    await asyncio.sleep(delay)
+                server = await self._spawn()
+                if server is None or server.lost.is_set():
+                    # Never promote a server that already died
+                    if server is not None:
+                        self._stop_later(server)
+                    self.failed_starts += 1
+                    continue
+            self.failed_starts = 0
+
+            self._lost.clear()
+            self._promote(server)
+            if WARM_SPARE and not self._closing:
+                spare = asyncio.create_task(self._spawn())
+            # In the background: it goes through wait_ready, which needs this loop to
+            # keep running if the new server is lost as well
+            if self._refresh is not None:
+                self._refresh.cancel()
+            self._refresh = asyncio.create_task(self._refresh_tools())
+            await self._watch(server)
+
+            self._server = None
+            self._ready.clear()
+            # The lost server is torn down in the background; the spare is already up
+            self._stop_later(server)
+
+        if self._refresh is not None:
+            self._refresh.cancel()
+        if spare is not None:
+            server = await spare
+            if server is not None:
+                self._stop_later(server)
+        await asyncio.gather(*self._stopping, return_exceptions=True)
+
+    async def _spawn(self):
+        """Start a subprocess with an initialized session; None if that failed."""
+        server = ServerProcess(self.server_params)
+        try:
+            await server.start()
+        except Exception as e:
+            self.last_error = describe_error(e)
+            print(f"Starting the MCP server failed: {self.last_error}")
+            await server.stop()
+            return None
+        return server
+
+    def _stop_later(self, server):
+        task = asyncio.create_task(server.stop())
+        self._stopping.add(task)
+        task.add_done_callback(self._stopping.discard)
+
+    def _promote(self, server):
+        self._server = server
+        server.on_lost = self._on_server_lost
+        self._ready_at = time.monotonic()
+        self._ready.set()
+        if self._lost_at is not None:
+            self.restarts += 1
+            self.last_recovery_ms = round((self._ready_at - self._lost_at) * 1000, 1)
+            self._lost_at = None
+            print(f"MCP session restored in {self.last_recovery_ms} ms")
+
+    async def _watch(self, server):
+        """Return once the server is lost; pings it while idle."""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._lost.wait(), PING_INTERVAL_S)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await ping(server.session)
+            except Exception as e:
+                server.mark_lost(f"ping failed: {describe_error(e)}")
+                return
+
+    async def _refresh_tools(self):
+        """Re-run load_mcp_tools against the new session; report a changed tool list."""
+        try:
+            tools = await load_mcp_tools(self)
+        except Exception as e:
+            print(f"Reloading MCP tools failed: {e}")
+            return
+        names = sorted(tool.name for tool in tools)
+        changed = self.tool_names is not None and names != self.tool_names
+        self.tool_names = names
+        if changed and self.on_tools_changed is not None:
+            print("MCP tool list changed after respawn; rebuilding the agent")
+            await self.on_tools_changed(tools)
+
+    # === ClientSession interface used by langchain_mcp_adapters ===
+
+    async def _request(self, method, *args, **kwargs):
+        """Call a session method, retrying once on a fresh server after a transport failure."""
+        for attempt in (1, 2):
+            server = await self.wait_ready()
+            try:
+                return await server.request(method, *args, **kwargs)
+            except Exception as e:
+                if attempt == 2 or not is_transport_error(e):
+                    raise
+                server.mark_lost(f"{method} failed: {describe_error(e)}")
+
+    async def call_tool(self, name, arguments=None, read_timeout_seconds=None, progress_callback=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = await self._request(
+                "call_tool",
+                name,
+                arguments,
+                read_timeout_seconds=read_timeout_seconds or timedelta(seconds=TOOL_CALL_TIMEOUT_S),
+                progress_callback=progress_callback,
+                **kwargs,
+            )
+        except Exception:
+            self.latency.errors += 1
+            raise
+        self.latency.record(name, started)
+        return result
+
+    async def list_tools(self, *args, **kwargs):
+        return await self._request("list_tools", *args, **kwargs)
+
+    async def get_prompt(self, *args, **kwargs):
+        return await self._request("get_prompt", *args, **kwargs)
+
+    async def list_prompts(self, *args, **kwargs):
+        return await self._request("list_prompts", *args, **kwargs)
+
+    async def list_resources(self, *args, **kwargs):
+        return await self._request("list_resources", *args, **kwargs)
+
+    async def read_resource(self, *args, **kwargs):
+        return await self._request("read_resource", *args, **kwargs)
+
+    # === Health ===
+
+    async def health(self):
+        """Session state, restarts, a live ping and recent tool-call latencies."""
+        ping_ms = None
+        server = self._server if self._ready.is_set() else None
+        if server is not None:
+            started = time.perf_counter()
+            try:
+                await ping(server.session)
+                ping_ms = round((time.perf_counter() - started) * 1000, 2)
+            except Exception as e:
+                server.mark_lost(f"health ping failed: {describe_error(e)}")
+                server = None
+
+        return {
+            "transport": "stdio",
+            "status": "ok" if server is not None else ("down" if self.failed_starts > 1 else "reconnecting"),
+            "ping_ms": ping_ms,
+            "session_age_s": round(time.monotonic() - self._ready_at, 1) if server is not None else None,
+            "warm_spare": WARM_SPARE,
+            "restarts": self.restarts,
+            "last_recovery_ms": self.last_recovery_ms,
+            "last_error": self.last_error,
+            "tool_count": len(self.tool_names or ()),
+            "tool_latency_ms": self.latency.report(),
+        }
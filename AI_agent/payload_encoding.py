@@ -0,0 +1,138 @@
+# payload_encoding.py
+"""
+Compact, bounded tool payloads.
+
+Row-returning tools used to `fetchall()` a result, turn every sqlite3.Row into a
+dict and serialize the lot, so memory and the bytes sent over stdio grew with the
+number of rows, and every row repeated every column name. Here rows are read
+from the cursor in FETCH_CHUNK-sized `fetchmany` batches, only up to the page
+size, and returned in columnar form: the column names once, then one value
+array per row.
+
+    {"columns": ["app_name", "time_ms"], "rows": [["Code", 5400000], ...]}
+
+### Compact mode (opt-in)
+With FOCUSBOOK_TOOL_ENCODING=compact the tools go further:
+
+- record lists (e.g. the `apps` of get_app_usage_data) become columnar too
+- text columns whose values repeat (category, domain, video titles over several
+  hours, ...) are dictionary-encoded: the distinct values are listed once under
+  "dictionaries" and the rows hold indices into that list
+- derived fields the client can compute (formatted_time from time_ms) are left out
+
+    {"columns": ["app_name", "category", "time_ms"],
+     "rows": [["Code", 0, 5400000], ["Slack", 1, 900000]],
+     "dictionaries": {"category": ["Code", "Communication"]}}
+
+benchmark_payloads.py measures both modes against a database.
+"""
+import os
+
+# Rows pulled from the SQLite cursor per fetchmany call.
+FETCH_CHUNK = 100
+
+ENCODING_ENV = "FOCUSBOOK_TOOL_ENCODING"
+ROWS_ENCODING = "rows"
+COMPACT_ENCODING = "compact"
+
+# Fields left out in compact mode because they are computed from other fields
+DERIVED_FIELDS = ("formatted_time",)
+
+# A text column is dictionary-encoded when it has at most this share of distinct values
+DICTIONARY_MAX_DISTINCT_RATIO = 0.5
+
+COMPACT_NOTE = (
+    "Values are in column order. For a column listed in dictionaries, the row holds an "
+    "index into that list. Times are milliseconds."
+)
+
+
+def fetch_page(cursor, limit):
+    """
+    Read at most `limit` rows from an executed cursor, in fetchmany chunks.
+
+    Args:
+        cursor: A cursor whose SELECT has been executed
+        limit: Page size
+
+    Returns:
+        (columns, rows, has_more) - rows are value lists in column order; has_more
+        is True when the cursor had at least one more row
+    """
+    columns = [description[0] for description in cursor.description]
+    rows = []
+    while len(rows) <= limit:
+        chunk = cursor.fetchmany(min(FETCH_CHUNK, limit + 1 - len(rows)))
+        if not chunk:
+            break
+        rows.extend(list(row) for row in chunk)
+    return columns, rows[:limit], len(rows) > limit
+
+
+def columnar(columns, rows):
+    """Columnar payload: column names once, then one value array per row."""
+    return {"columns": list(columns), "rows": rows, "row_count": len(rows)}
+
+
+def column_total(columns, rows, name):
+    """Sum of an integer column over the rows (None values skipped)."""
+    index = columns.index(name)
+    return sum(int(row[index]) for row in rows if row[index] is not None)
+
+
+def get_encoding():
+    """The configured payload encoding: 'rows' (default) or 'compact'."""
+    encoding = os.getenv(ENCODING_ENV, ROWS_ENCODING).strip().lower()
+    return COMPACT_ENCODING if encoding == COMPACT_ENCODING else ROWS_ENCODING
+
+
+def dictionary_encode(payload):
+    """
+    Dictionary-encode the repetitive text columns of a columnar payload.
+
+    Returns:
+        A new payload; the input is not modified
+    """
+    columns, rows = payload["columns"], payload["rows"]
+    dictionaries = {}
+    encoded_rows = [list(row) for row in rows]
+
+    for index, name in enumerate(columns):
+        values = [row[index] for row in rows]
+        if not values or not all(value is None or isinstance(value, str) for value in values):
+            continue
+        distinct = list(dict.fromkeys(values))
+        if len(distinct) > len(values) * DICTIONARY_MAX_DISTINCT_RATIO:
+            continue
+        positions = {value: position for position, value in enumerate(distinct)}
+        for row in encoded_rows:
+            row[index] = positions[row[index]]
+        dictionaries[name] = distinct
+
+    encoded = dict(payload, rows=encoded_rows)
+    if dictionaries:
+        encoded["dictionaries"] = dictionaries
+    encoded["encoding"] = COMPACT_NOTE
+    return encoded
+
+
+def encode_columnar(payload):
+    """Apply the configured encoding to a columnar payload."""
+    if get_encoding() == COMPACT_ENCODING:
+        return dictionary_encode(payload)
+    return payload
+
+
+def encode_records(records):
+    """
+    Apply the configured encoding to a list of same-shaped dicts.
+
+    Returns:
+        The records unchanged ('rows'), or a dictionary-encoded columnar payload
+        without the derived fields ('compact')
+    """
+    if get_encoding() != COMPACT_ENCODING or not records:
+        return records
+    columns = [name for name in records[0] if name not in DERIVED_FIELDS]
+    rows = [[record.get(name) for name in columns] for record in records]
+    return dictionary_encode(columnar(columns, rows))
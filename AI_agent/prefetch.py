@@ -0,0 +1,91 @@
+# prefetch.py
+"""
+Usage-data prefetch for the LangGraph agent.
+
+For a productivity question the system prompt has the model call
+get_productivity_summary for the asked-about range first. That step used to be
+a full LLM round trip (chat_node -> tool_node -> chat_node) before the model
+could even start on the answer.
+
+When the question names a range date_intent.py can resolve ("yesterday", "last
+7 days", "this week") and is about usage, the prefetch node runs the summary
+before the first LLM call and adds it to the turn as an ordinary tool call +
+result, exactly as if the model had asked for it. The model then answers
+straight away (or asks only for what is still missing).
+
+Anything the node cannot resolve, and any tool failure, leaves the turn
+untouched; the model fetches the data itself as before.
+"""
+import asyncio
+import os
+import re
+import uuid
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from chat_history import message_text
+from date_intent import normalize_question, resolve_question_range
+
+PREFETCH_ENABLED = os.getenv("AI_PREFETCH_USAGE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# Questions these words appear in are answered from the productivity summary
+USAGE_QUESTION = re.compile(
+    r"\b(?:productiv\w*|unproductive|usage|used|spen[dt]|spending|screen time|apps?|"
+    r"youtube|distract\w*|wast\w*|time on|hours?|minutes?|breakdown|summary)\b"
+)
+
+
+def is_usage_question(question):
+    """True when a question is about app usage / productive time."""
+    return bool(USAGE_QUESTION.search(normalize_question(question)))
+
+
+def prefetch_calls(question, today=None):
+    """
+    Tool calls (name, args) to prefetch for a question, or [] when none apply.
+
+    Args:
+        question: The user's message
+        today: Reference date (defaults to today)
+
+    Returns:
+        List of (tool name, arguments) pairs: the get_productivity_summary call
+        the prompt has the model make first
+    """
+    if not is_usage_question(question):
+        return []
+    date_range = resolve_question_range(question, today)
+    if date_range is None:
+        return []
+    start, end = date_range
+    if start == end:
+        return [("get_productivity_summary", {"date": start})]
+    return [("get_productivity_summary", {"start_date": start, "end_date": end})]
+
+
+class UsagePrefetcher:
+    """Graph node that fetches a question's usage data before the first LLM call."""
+
+    def __init__(self, tools, enabled=PREFETCH_ENABLED):
+        self.tools = {tool.name: tool for tool in tools}
+        self.enabled = enabled
+
+    async def __call__(self, state):
+        messages = state["messages"]
+        # Only at the start of a turn: the new question is the last message
+        if not self.enabled or not messages or not isinstance(messages[-1], HumanMessage):
+            return {}
+
+        try:
+            calls = [
+                {"name": name, "args": args, "id": f"prefetch_{uuid.uuid4().hex[:12]}", "type": "tool_call"}
+                for name, args in prefetch_calls(message_text(messages[-1]))
+                if name in self.tools
+            ]
+            if not calls:
+                return {}
+            results = await asyncio.gather(*(self.tools[call["name"]].ainvoke(call) for call in calls))
+        except Exception as e:
+            print(f"Usage prefetch skipped: {e}")
+            return {}
+        return {"messages": [AIMessage(content="", tool_calls=calls), *results]}
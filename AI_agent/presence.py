@@ -0,0 +1,235 @@
+# presence.py
+"""
+Presence-aware time for the MCP tools: what ran while the user was actually there.
+
+`span` records WHAT ran; `presence_span` records WHETHER THE USER WAS PRESENT as
+gapless, typed intervals (active / idle / locked / suspended / unknown); and
+`span_annotation` holds the user's interpretation of an absence ('working',
+'meeting', 'break', free text), joined at query time exactly like
+presenceService.getResolvedPresence does. See docs/PRESENCE_AND_IDLE_ENGINE.md.
+
+Productive time from `span` alone credits a browser tab left open over lunch as
+work. Here every activity span is intersected with the presence log in ONE
+sort-merge sweep: both logs come out of SQLite ordered by start, and a single
+presence pointer only ever moves forward, so a range costs O(n log n) for the
+sorts plus O(n + m) for the merge, even over a year of spans.
+
+Each piece of an activity span then lands in one of four buckets:
+
+    active            overlaps an 'active' presence span
+    credited_absence  overlaps an absence the user labelled 'working' / 'meeting'
+    away              overlaps any other absence (idle, locked, ... or a 'break')
+    no_presence_data  not covered by the presence log (e.g. before it existed)
+"""
+from datetime import datetime, timezone
+
+from span_resolver import UNRATED, VALID_PRODUCTIVITY, get_matcher_index
+
+ACTIVE = "active"
+ABSENCE_TYPES = ("idle", "locked", "suspended", "unknown")
+PRESENCE_TYPES = (ACTIVE,) + ABSENCE_TYPES
+
+# span_annotation labels that credit an absence as work time
+MEETING_LABEL = "meeting"
+CREDITED_LABELS = ("working", MEETING_LABEL)
+UNLABELLED = "unlabelled"
+
+# Absences at least this long are the ones the return prompt asks about
+# (AWAY_PROMPT_MIN_MS in src/main/index.js)
+AWAY_PROMPT_MIN_MS = 5 * 60 * 1000
+
+BUCKETS = ("active", "credited_absence", "away", "no_presence_data")
+
+# Epoch milliseconds computed by SQLite, so the sweep never parses timestamps
+_EPOCH_MS = "CAST(ROUND((julianday({0}) - 2440587.5) * 86400000) AS INTEGER)"
+
+ACTIVITY_SQL = f"""
+SELECT key_app, key_domain, key_path, title,
+       {_EPOCH_MS.format("start")} AS start_ms,
+       {_EPOCH_MS.format("end")} AS end_ms
+FROM span
+WHERE start >= ? AND start < ?
+ORDER BY start_ms
+"""
+
+# Presence spans overlapping [?, ?) with their latest annotation
+PRESENCE_SQL = f"""
+SELECT ps.type,
+       {_EPOCH_MS.format("ps.start")} AS start_ms,
+       {_EPOCH_MS.format("ps.end")} AS end_ms,
+       (SELECT sa.user_label FROM span_annotation sa
+        WHERE sa.presence_span_id = ps.id
+        ORDER BY sa.answered_at DESC, sa.id DESC LIMIT 1) AS user_label
+FROM presence_span ps
+WHERE ps.start < ? AND ps.end > ?
+ORDER BY start_ms
+"""
+
+
+def iso_to_ms(value):
+    """Epoch milliseconds of a span-table ISO timestamp ('...T..:..:..sssZ')."""
+    return int(datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def ms_to_iso(value):
+    """Span-table ISO timestamp of epoch milliseconds."""
+    moment = datetime.fromtimestamp(value / 1000, timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value % 1000:03d}Z"
+
+
+def ms_to_local(value):
+    """Local 'YYYY-MM-DD HH:MM' of epoch milliseconds, for display."""
+    return datetime.fromtimestamp(value / 1000).strftime("%Y-%m-%d %H:%M")
+
+
+def normalize_label(label):
+    label = (label or "").strip().lower()
+    return label or None
+
+
+def load_presence(conn, start_iso, end_iso):
+    """Presence spans overlapping [start_iso, end_iso) as (start_ms, end_ms, type, label), by start."""
+    return [
+        (row["start_ms"], row["end_ms"], row["type"], normalize_label(row["user_label"]))
+        for row in conn.execute(PRESENCE_SQL, (end_iso, start_iso))
+        if row["end_ms"] > row["start_ms"]
+    ]
+
+
+def presence_bucket(span):
+    """Bucket of time that overlaps a presence span (see module docstring)."""
+    if span is None:
+        return "no_presence_data"
+    _, _, presence_type, label = span
+    if presence_type == ACTIVE:
+        return "active"
+    return "credited_absence" if label in CREDITED_LABELS else "away"
+
+
+def sweep(intervals, presence):
+    """
+    Sort-merge intersection of intervals with the presence log.
+
+    Args:
+        intervals: (start_ms, end_ms) pairs sorted by start (may overlap each other)
+        presence: load_presence() output, sorted by start
+
+    Yields:
+        (interval index, overlap ms, presence span or None) for every piece of every
+        interval; None marks a piece no presence span covers
+    """
+    first = 0
+    count = len(presence)
+    for index, (start, end) in enumerate(intervals):
+        # Presence spans ending before this interval can't touch any later one either
+        while first < count and presence[first][1] <= start:
+            first += 1
+
+        position = start
+        k = first
+        while position < end:
+            if k < count and presence[k][0] < end:
+                span = presence[k]
+                if span[0] > position:
+                    yield index, span[0] - position, None
+                    position = span[0]
+                overlap_end = min(end, span[1])
+                if overlap_end > position:
+                    yield index, overlap_end - position, span
+                    position = overlap_end
+                k += 1
+            else:
+                yield index, end - position, None
+                break
+
+
+def summarize_presence(conn, start_iso, end_iso):
+    """
+    Time per presence type in [start_iso, end_iso), with absences split by user label.
+
+    Returns:
+        Dictionary with per-type totals, per-label absence totals, annotated meetings,
+        the credited total (active + absences labelled working/meeting) and the number
+        of long absences nobody has labelled yet
+    """
+    low, high = iso_to_ms(start_iso), iso_to_ms(end_iso)
+
+    types = {name: {"total_ms": 0, "span_count": 0} for name in PRESENCE_TYPES}
+    labels = {}
+    meetings = []
+    unlabelled_long = 0
+
+    for start, end, presence_type, label in load_presence(conn, start_iso, end_iso):
+        clipped = min(end, high) - max(start, low)
+        if clipped <= 0:
+            continue
+        bucket = types.setdefault(presence_type, {"total_ms": 0, "span_count": 0})
+        bucket["total_ms"] += clipped
+        bucket["span_count"] += 1
+        if presence_type == ACTIVE:
+            continue
+
+        name = label or UNLABELLED
+        entry = labels.setdefault(name, {"total_ms": 0, "span_count": 0})
+        entry["total_ms"] += clipped
+        entry["span_count"] += 1
+        if label == MEETING_LABEL:
+            meetings.append({"start": ms_to_local(start), "end": ms_to_local(end), "duration_ms": clipped})
+        elif label is None and end - start >= AWAY_PROMPT_MIN_MS:
+            unlabelled_long += 1
+
+    absent_ms = sum(types[name]["total_ms"] for name in types if name != ACTIVE)
+    credited_ms = types[ACTIVE]["total_ms"] + sum(labels.get(label, {}).get("total_ms", 0) for label in CREDITED_LABELS)
+    return {
+        "types": types,
+        "absence_labels": labels,
+        "meetings": meetings,
+        "meeting_ms": sum(meeting["duration_ms"] for meeting in meetings),
+        "active_ms": types[ACTIVE]["total_ms"],
+        "absent_ms": absent_ms,
+        "credited_ms": credited_ms,
+        "logged_ms": types[ACTIVE]["total_ms"] + absent_ms,
+        "unlabelled_long_absences": unlabelled_long,
+    }
+
+
+def summarize_active_productivity(conn, start_iso, end_iso):
+    """
+    Productivity of the activity spans starting in [start_iso, end_iso), split by presence.
+
+    Returns:
+        Dictionary with, per productivity level and overall, the milliseconds in each
+        of BUCKETS plus the span count
+    """
+    index = get_matcher_index(conn)
+
+    verdicts = []
+    intervals = []
+    for row in conn.execute(ACTIVITY_SQL, (start_iso, end_iso)):
+        start, end = row["start_ms"], row["end_ms"]
+        if start is None or end is None or end <= start:
+            continue
+        _, verdict, _ = index.resolve(row["key_app"], row["key_domain"], row["key_path"], row["title"])
+        verdicts.append(verdict)
+        intervals.append((start, end))
+
+    def empty():
+        return dict({bucket: 0 for bucket in BUCKETS}, span_count=0)
+
+    productivity = {name: empty() for name in VALID_PRODUCTIVITY + (UNRATED,)}
+    totals = empty()
+    for verdict in verdicts:
+        productivity[verdict]["span_count"] += 1
+    totals["span_count"] = len(verdicts)
+
+    if intervals:
+        # Activity spans can outlast the range; load the presence they reach into
+        horizon_iso = max(end_iso, ms_to_iso(max(end for _, end in intervals)))
+        presence = load_presence(conn, start_iso, horizon_iso)
+
+        for position, overlap_ms, span in sweep(intervals, presence):
+            bucket = presence_bucket(span)
+            productivity[verdicts[position]][bucket] += overlap_ms
+            totals[bucket] += overlap_ms
+
+    return {"productivity": productivity, "totals": totals}
@@ -0,0 +1,132 @@
+# productivity.py
+"""
+Server-side productivity aggregation over the hourly usage rollup.
+
+Instead of shipping every app row to the LLM with an instruction to classify and
+sum it, the verdicts come from the same tables the dashboard uses:
+
+- Level 1 (productive / distracted / neutral) is `categories.type` for the row's
+  category; categories missing from the table count as neutral
+- Level 2 (work-mode) is the row's stored `mode`, falling back to the category's
+  `default_mode`, then to FALLBACK_CATEGORY_MODE and finally to 'Break', and each
+  mode rolls up to a Level-1 verdict through `modes.rollup`, then
+  FALLBACK_MODE_ROLLUP
+
+This mirrors getProductivityTotals / getModeTotals in
+src/renderer/src/utils/dataProcessor.js, so the agent quotes the same numbers the
+user sees on the dashboard.
+"""
+from rollup_cache import get_rollup_cache
+
+# Same fallbacks as dataProcessor.js (DEFAULT_MODE / DEFAULT_MODE_ROLLUP).
+DEFAULT_VERDICT = "neutral"
+DEFAULT_MODE = "Break"
+
+# Copies of dataProcessor.js's FALLBACK_MODE_ROLLUP / FALLBACK_CATEGORY_MODE, used
+# when the modes table or a category's default_mode has no answer. Keep in sync.
+FALLBACK_MODE_ROLLUP = {
+    "Deep work": "productive",
+    "Creative": "productive",
+    "Collaboration": "productive",
+    "Break": "neutral",
+    "Distraction": "distracted",
+}
+FALLBACK_CATEGORY_MODE = {
+    # Legacy category names
+    "Code": "Deep work",
+    "Learning": "Deep work",
+    "Browsing": "Deep work",
+    "Communication": "Collaboration",
+    "Utilities": "Break",
+    "Entertainment": "Distraction",
+    "Social Media": "Distraction",
+    "Miscellaneous": "Break",
+    # Span-model taxonomy
+    "Coding": "Deep work",
+    "Social": "Distraction",
+    "Uncategorized": "Break",
+}
+
+VERDICTS = ("productive", "neutral", "distracted")
+
+
+def _values_sql(mapping):
+    """A mapping as the rows of a SQL VALUES clause (constants, quoted as literals)."""
+    def literal(value):
+        return "'" + value.replace("'", "''") + "'"
+    return ", ".join(f"({literal(key)}, {literal(value)})" for key, value in mapping.items())
+
+
+USAGE_VERDICTS_SQL = f"""
+WITH fallback_category_mode (category, mode) AS (VALUES {_values_sql(FALLBACK_CATEGORY_MODE)}),
+     fallback_mode_rollup (mode, rollup) AS (VALUES {_values_sql(FALLBACK_MODE_ROLLUP)}),
+     usage AS (
+         SELECT r.app_name, r.description, r.domain, r.category, r.time_spent,
+                COALESCE(c.type, '{DEFAULT_VERDICT}') AS verdict,
+                COALESCE(r.mode, c.default_mode, f.mode, '{DEFAULT_MODE}') AS mode
+         FROM usage_rollup r
+         LEFT JOIN src.categories c ON c.name = r.category
+         LEFT JOIN fallback_category_mode f ON f.category = r.category
+         WHERE r.date BETWEEN ? AND ?
+     )
+SELECT u.app_name,
+       MAX(u.description) AS description,
+       NULLIF(MAX(u.domain), '') AS domain,
+       u.category,
+       MAX(u.verdict) AS verdict,
+       u.mode,
+       COALESCE(m.rollup, f.rollup, '{DEFAULT_VERDICT}') AS mode_rollup,
+       SUM(u.time_spent) AS total_time
+FROM usage u
+LEFT JOIN src.modes m ON m.name = u.mode
+LEFT JOIN fallback_mode_rollup f ON f.mode = u.mode
+GROUP BY u.app_name, u.category, u.mode
+"""
+
+
+def summarize_productivity(start_date, end_date, top_n=5):
+    """
+    Aggregate usage in an inclusive date range into finished productivity totals.
+
+    Returns:
+        Dictionary with total_ms, per-verdict totals with their top_n apps, and
+        per-mode totals with each mode's rollup verdict. Times are milliseconds.
+    """
+    rows = get_rollup_cache().execute(USAGE_VERDICTS_SQL, (start_date, end_date))
+
+    total_ms = 0
+    buckets = {verdict: {"total_ms": 0, "apps": {}} for verdict in VERDICTS}
+    modes = {}
+
+    for row in rows:
+        time_ms = row["total_time"] or 0
+        total_ms += time_ms
+
+        bucket = buckets.setdefault(row["verdict"], {"total_ms": 0, "apps": {}})
+        bucket["total_ms"] += time_ms
+        app = bucket["apps"].get(row["app_name"])
+        if app is None:
+            app = bucket["apps"][row["app_name"]] = {
+                "app_name": row["app_name"],
+                "description": row["description"],
+                "domain": row["domain"],
+                "category": row["category"],
+                "time_ms": 0,
+            }
+        app["time_ms"] += time_ms
+
+        mode = modes.get(row["mode"])
+        if mode is None:
+            mode = modes[row["mode"]] = {"mode": row["mode"], "rollup": row["mode_rollup"], "time_ms": 0}
+        mode["time_ms"] += time_ms
+
+    for bucket in buckets.values():
+        apps = sorted(bucket.pop("apps").values(), key=lambda app: -app["time_ms"])
+        bucket["app_count"] = len(apps)
+        bucket["top_apps"] = apps[:top_n]
+
+    return {
+        "total_ms": total_ms,
+        "verdicts": buckets,
+        "modes": sorted(modes.values(), key=lambda mode: -mode["time_ms"]),
+    }
@@ -0,0 +1,158 @@
+# response_cache.py
+"""
+Persistent cache of agent replies to first-turn questions about past date ranges.
+
+Keyed on the normalized question, its date range, a fingerprint of that range's data and the model.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from date_intent import is_past_range, normalize_question, resolve_question_range
+from db_pool import db_connection, get_cache_db_path
+from span_resolver import RULE_CONTEXT_VERSION_SQL, local_day_bounds
+from tool_cache import CLASSIFICATION_FINGERPRINT_SQL
+
+# Bump when the prompt or the agent's answering rules change, so replies written
+# under the old behavior are not served anymore.
+RESPONSE_CACHE_VERSION = 3
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("FOCUSBOOK_RESPONSE_CACHE_SIZE", "500"))
+
+RESPONSE_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS response_cache (
+    key TEXT PRIMARY KEY,
+    question TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    model TEXT NOT NULL,
+    reply TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+USAGE_FINGERPRINT_SQL = """
+SELECT COUNT(*), COALESCE(SUM(time_spent), 0),
+       MAX(replace(substr(updated_at, 1, 19), 'T', ' ')),
+       group_concat(DISTINCT category)
+FROM app_usage
+WHERE date BETWEEN ? AND ? AND hour IS NOT NULL
+"""
+
+SPAN_FINGERPRINT_SQL = "SELECT COUNT(*), MAX(end), MAX(id) FROM span WHERE start >= ? AND start < ?"
+
+
+def data_fingerprint(start_date, end_date):
+    """Digest of everything an answer about [start_date, end_date] depends on."""
+    start_iso, end_iso = local_day_bounds(start_date, end_date)
+    with db_connection() as conn:
+        parts = [
+            tuple(conn.execute(USAGE_FINGERPRINT_SQL, (start_date, end_date)).fetchone()),
+            tuple(conn.execute(CLASSIFICATION_FINGERPRINT_SQL).fetchone()),
+            tuple(conn.execute(SPAN_FINGERPRINT_SQL, (start_iso, end_iso)).fetchone()),
+            tuple(conn.execute(RULE_CONTEXT_VERSION_SQL).fetchone()),
+        ]
+    return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+
+class CachedQuestion:
+    """A question resolved to its cache key (None when it is not cacheable)."""
+
+    def __init__(self, question, model):
+        self.question = normalize_question(question)
+        self.model = model
+        self.date_range = resolve_question_range(question)
+        self.key = None
+
+        if self.question and is_past_range(self.date_range):
+            fingerprint = data_fingerprint(*self.date_range)
+            material = [RESPONSE_CACHE_VERSION, self.question, list(self.date_range), fingerprint, model]
+            self.key = hashlib.sha256(json.dumps(material).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Replies by CachedQuestion key, stored in the side cache database."""
+
+    def __init__(self, cache_path, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.cache_path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(RESPONSE_CACHE_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, question, model):
+        """
+        Resolve a question and look up its reply.
+
+        Returns:
+            (CachedQuestion, reply) - reply is None on a miss or when the
+            question is not cacheable (CachedQuestion.key is None then)
+        """
+        cached = CachedQuestion(question, model)
+        if cached.key is None:
+            return cached, None
+
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT reply FROM response_cache WHERE key = ?", (cached.key,)).fetchone()
+            if row is None:
+                return cached, None
+            with conn:
+                conn.execute(
+                    "UPDATE response_cache SET last_used_at = ?, hit_count = hit_count + 1 WHERE key = ?",
+                    (time.time(), cached.key),
+                )
+        return cached, row[0]
+
+    def store(self, cached, reply):
+        """Remember the reply for a cacheable question (evicting least recently used)."""
+        if cached.key is None or not isinstance(reply, str) or not reply.strip():
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO response_cache "
+                    "(key, question, start_date, end_date, model, reply, created_at, last_used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (cached.key, cached.question, cached.date_range[0], cached.date_range[1],
+                     cached.model, reply, now, now),
+                )
+                conn.execute(
+                    "DELETE FROM response_cache WHERE key IN ("
+                    "SELECT key FROM response_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(get_cache_db_path())
+        return _response_cache
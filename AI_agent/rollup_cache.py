@@ -0,0 +1,224 @@
+# rollup_cache.py
+"""
+Incremental hourly rollup of `app_usage`, kept in the AI service's side cache database.
+
+The FocusBook database is attached read-only; changed dates are re-aggregated on refresh.
+"""
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from db_pool import get_db_path, get_cache_db_path, read_only_uri
+
+# Bump when the rollup table layout changes; the cache is rebuilt from scratch.
+ROLLUP_SCHEMA_VERSION = 1
+
+# Minimum seconds between two refreshes while the source keeps changing.
+REFRESH_INTERVAL_S = 5.0
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_rollup (
+    date TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    app_name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    domain TEXT NOT NULL DEFAULT '', -- '' stands in for NULL so it can be in the key
+    mode TEXT,
+    description TEXT,
+    time_spent INTEGER NOT NULL,     -- milliseconds, summed over the source rows
+    entry_count INTEGER NOT NULL,
+    PRIMARY KEY (date, hour, app_name, category, domain)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollup_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# updated_at is written both as CURRENT_TIMESTAMP ('YYYY-MM-DD HH:MM:SS') and as a
+# JS ISO string ('YYYY-MM-DDTHH:MM:SS.sssZ'); both are UTC, so normalizing the
+# separator makes them compare correctly as text.
+NORMALIZED_UPDATED_AT = "replace(substr(updated_at, 1, 19), 'T', ' ')"
+
+AGGREGATE_DATES_SQL = """
+INSERT INTO usage_rollup
+    (date, hour, app_name, category, domain, mode, description, time_spent, entry_count)
+SELECT date, hour, app_name, category, COALESCE(domain, ''),
+       MAX(mode), MAX(description), SUM(time_spent), COUNT(*)
+FROM src.app_usage
+WHERE hour IS NOT NULL {where}
+GROUP BY date, hour, app_name, category, COALESCE(domain, '')
+"""
+
+SOURCE_MARKS_SQL = f"""
+SELECT COALESCE(MAX(id), 0), MAX({NORMALIZED_UPDATED_AT}), COUNT(*)
+FROM src.app_usage WHERE hour IS NOT NULL
+"""
+
+CHANGED_DATES_SQL = f"""
+SELECT DISTINCT date FROM src.app_usage
+WHERE hour IS NOT NULL AND (id > ? OR {NORMALIZED_UPDATED_AT} >= ?)
+"""
+
+NEW_ROW_COUNT_SQL = "SELECT COUNT(*) FROM src.app_usage WHERE hour IS NOT NULL AND id > ?"
+
+# Kept in rollup_state, not in memory, so every process sharing the cache file
+# sees a bump made by whichever one refreshed.
+BUMP_HISTORY_GENERATION_SQL = """
+INSERT INTO rollup_state (key, value) VALUES ('history_generation', '1')
+ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+"""
+
+APP_TOTALS_SQL = """
+SELECT app_name, SUM(time_spent) AS total_time, MAX(category) AS category,
+       MAX(description) AS description, NULLIF(MAX(domain), '') AS domain
+FROM usage_rollup
+WHERE date BETWEEN ? AND ?
+GROUP BY app_name
+"""
+
+APP_CATEGORY_TOTALS_SQL = """
+SELECT app_name, SUM(time_spent) AS total_time, category,
+       MAX(description) AS description, NULLIF(MAX(domain), '') AS domain
+FROM usage_rollup
+WHERE date BETWEEN ? AND ?
+GROUP BY app_name, category
+"""
+
+
+class RollupCache:
+    """The hourly rollup for one FocusBook database, kept in one cache file."""
+
+    def __init__(self, db_path, cache_path):
+        self.db_path = db_path
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._data_version = None
+        self._last_refresh = 0.0
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+
+        conn = sqlite3.connect(self.cache_path, check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("ATTACH DATABASE ? AS src", (read_only_uri(self.db_path),))
+        conn.executescript(ROLLUP_SCHEMA)
+
+        if self._get_state(conn, "schema_version") != str(ROLLUP_SCHEMA_VERSION):
+            with conn:
+                conn.execute("DELETE FROM usage_rollup")
+                conn.execute("DELETE FROM rollup_state")
+                self._set_state(conn, "schema_version", ROLLUP_SCHEMA_VERSION)
+
+        self._conn = conn
+        return conn
+
+    @staticmethod
+    def _get_state(conn, key):
+        row = conn.execute("SELECT value FROM rollup_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_state(conn, key, value):
+        conn.execute(
+            "INSERT OR REPLACE INTO rollup_state (key, value) VALUES (?, ?)",
+            (key, None if value is None else str(value)),
+        )
+
+    def refresh(self, force=False):
+        """Bring the rollup up to date with `app_usage` (cheap when nothing changed)."""
+        with self._lock:
+            conn = self._connect()
+
+            data_version = conn.execute("PRAGMA src.data_version").fetchone()[0]
+            if not force and data_version == self._data_version:
+                return
+            if not force and time.monotonic() - self._last_refresh < REFRESH_INTERVAL_S:
+                return
+
+            hwm_id = int(self._get_state(conn, "hwm_id") or 0)
+            hwm_updated = self._get_state(conn, "hwm_updated_at")
+            known_rows = int(self._get_state(conn, "source_rows") or 0)
+
+            max_id, max_updated, source_rows = conn.execute(SOURCE_MARKS_SQL).fetchone()
+            new_rows = conn.execute(NEW_ROW_COUNT_SQL, (hwm_id,)).fetchone()[0]
+
+            today = datetime.now().strftime("%Y-%m-%d")
+            with conn:
+                if hwm_updated is None or source_rows != known_rows + new_rows:
+                    # First build, or rows were deleted: re-aggregate everything.
+                    conn.execute("DELETE FROM usage_rollup")
+                    conn.execute(AGGREGATE_DATES_SQL.format(where=""))
+                    conn.execute(BUMP_HISTORY_GENERATION_SQL)
+                else:
+                    dates = [r[0] for r in conn.execute(CHANGED_DATES_SQL, (hwm_id, hwm_updated))]
+                    if any(date < today for date in dates):
+                        conn.execute(BUMP_HISTORY_GENERATION_SQL)
+                    if dates:
+                        placeholders = ", ".join("?" for _ in dates)
+                        conn.execute(f"DELETE FROM usage_rollup WHERE date IN ({placeholders})", dates)
+                        conn.execute(
+                            AGGREGATE_DATES_SQL.format(where=f"AND date IN ({placeholders})"),
+                            dates,
+                        )
+
+                self._set_state(conn, "hwm_id", max_id)
+                self._set_state(conn, "hwm_updated_at", max_updated or "")
+                self._set_state(conn, "source_rows", source_rows)
+
+            self._data_version = data_version
+            self._last_refresh = time.monotonic()
+
+    def history_generation(self):
+        """
+        A counter that changes whenever `app_usage` rows dated before today change
+        (late writes, category retags, deletions). Results computed only from past
+        dates stay valid for as long as it is unchanged.
+        """
+        self.refresh()
+        with self._lock:
+            return int(self._get_state(self._conn, "history_generation") or 0)
+
+    def app_totals(self, start_date, end_date, by_category=False):
+        """Per-app totals for an inclusive date range, refreshed first."""
+        self.refresh()
+        sql = APP_CATEGORY_TOTALS_SQL if by_category else APP_TOTALS_SQL
+        with self._lock:
+            return self._conn.execute(sql, (start_date, end_date)).fetchall()
+
+    def execute(self, sql, params=()):
+        """Run a read query against the (refreshed) rollup table."""
+        self.refresh()
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# === Process-wide rollup ===
+
+_rollup = None
+_rollup_lock = threading.Lock()
+
+
+def get_rollup_cache():
+    """Return the process-wide rollup, (re)creating it if the database path changed."""
+    global _rollup
+    db_path = get_db_path()
+    with _rollup_lock:
+        if _rollup is None or _rollup.db_path != db_path:
+            if _rollup is not None:
+                _rollup.close()
+            _rollup = RollupCache(db_path, get_cache_db_path())
+        return _rollup
@@ -0,0 +1,210 @@
+# sessions.py
+"""
+Per-conversation chat state for the FastAPI service.
+
+Each conversation is a LangGraph thread (thread_id = conversation_id) whose
+messages are persisted by a local SQLite checkpointer, so a request only sends
+its new user message and the graph restores the rest of the history itself.
+
+Requests for the SAME conversation are serialized with a per-conversation lock
+(two overlapping turns would otherwise fork the thread's history); requests for
+different conversations never wait on each other. With several worker processes
+(AI_SERVICE_WORKERS) the checkpointer database is shared by all of them, and the
+lock also takes a lease row in it, so a conversation's turns stay serialized
+whichever worker receives them.
+
+A conversation's history still starts fresh every day, like the old global
+memory did: the first request of a new day deletes the thread before running.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from db_pool import get_cache_db_path
+
+DEFAULT_CONVERSATION_ID = "default"
+
+# Seconds a writer waits on another worker's lock of the sessions database
+SQLITE_BUSY_TIMEOUT_S = 30
+
+# A held lease is renewed every LEASE_TTL_S / 3 while its turn runs; a crashed
+# worker's leases expire LEASE_TTL_S after their last renewal
+LEASE_TTL_S = float(os.getenv("AI_CONVERSATION_LEASE_S", "300"))
+LEASE_POLL_S = 0.05
+
+LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversation_leases (
+    conversation_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+def get_sessions_db_path():
+    """Checkpointer database, next to the AI cache (FOCUSBOOK_AI_SESSIONS_PATH overrides)."""
+    sessions_path = os.environ.get("FOCUSBOOK_AI_SESSIONS_PATH")
+    if sessions_path:
+        return sessions_path
+    return os.path.join(os.path.dirname(os.path.abspath(get_cache_db_path())), "focusbook_ai_sessions.db")
+
+
+@asynccontextmanager
+async def open_checkpointer(path=None):
+    """
+    AsyncSqliteSaver on the sessions database, with its tables created.
+
+    The connection waits on a busy database instead of failing at once, so
+    several worker processes can write their conversations to the same file.
+    """
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    async with aiosqlite.connect(path or get_sessions_db_path(), timeout=SQLITE_BUSY_TIMEOUT_S) as conn:
+        checkpointer = AsyncSqliteSaver(conn)
+        # Create the tables now: /reset on a fresh database runs before any checkpoint is written
+        await checkpointer.setup()
+        yield checkpointer
+
+
+class ConversationLeases:
+    """Conversation locks shared by worker processes: one lease row per conversation."""
+
+    def __init__(self, path=None):
+        self.path = path or get_sessions_db_path()
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_S, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(LEASE_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def try_acquire(self, conversation_id):
+        """Take the conversation's lease unless another live owner holds it."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "DELETE FROM conversation_leases WHERE conversation_id = ? AND expires_at < ?",
+                (conversation_id, now),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO conversation_leases (conversation_id, owner, expires_at) VALUES (?, ?, ?)",
+                (conversation_id, self.owner, now + LEASE_TTL_S),
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, conversation_id):
+        """Push this owner's lease expiry out again; False when the lease is no longer ours."""
+        with self._lock:
+            cursor = self._connect().execute(
+                "UPDATE conversation_leases SET expires_at = ? WHERE conversation_id = ? AND owner = ?",
+                (time.time() + LEASE_TTL_S, conversation_id, self.owner),
+            )
+            return cursor.rowcount == 1
+
+    async def _keep_alive(self, conversation_id):
+        """Renew a held lease until cancelled, so a long turn never outlives it."""
+        while True:
+            await asyncio.sleep(LEASE_TTL_S / 3)
+            try:
+                renewed = await asyncio.to_thread(self.renew, conversation_id)
+            except sqlite3.Error as e:
+                print(f"Renewing the lease of conversation {conversation_id} failed: {e}")
+                continue
+            if not renewed:
+                print(f"Lease of conversation {conversation_id} was lost during its turn")
+                return
+
+    def release(self, conversation_id):
+        with self._lock:
+            self._connect().execute(
+                "DELETE FROM conversation_leases WHERE conversation_id = ? AND owner = ?",
+                (conversation_id, self.owner),
+            )
+
+    @asynccontextmanager
+    async def hold(self, conversation_id):
+        """Hold the conversation's lease, polling while another worker has it."""
+        while not await asyncio.to_thread(self.try_acquire, conversation_id):
+            await asyncio.sleep(LEASE_POLL_S)
+        heartbeat = asyncio.create_task(self._keep_alive(conversation_id))
+        try:
+            yield
+        finally:
+            heartbeat.cancel()
+            await asyncio.to_thread(self.release, conversation_id)
+
+
+class ConversationSessions:
+    """Locks, graph config and daily reset for every conversation thread."""
+
+    def __init__(self, checkpointer, leases=None):
+        self.checkpointer = checkpointer
+        # Set when other worker processes share the checkpointer database
+        self.leases = leases
+        # Locks disappear once no request holds or waits on them
+        self._locks = weakref.WeakValueDictionary()
+        self._active_dates = {}
+
+    @asynccontextmanager
+    async def lock(self, conversation_id):
+        """Serialize turns of one conversation (across workers when leases are set)."""
+        lock = self._locks.get(conversation_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[conversation_id] = lock
+        async with lock:
+            if self.leases is None:
+                yield
+            else:
+                async with self.leases.hold(conversation_id):
+                    yield
+
+    @staticmethod
+    def config(conversation_id):
+        """Graph config selecting the conversation's checkpointed thread."""
+        return {"configurable": {"thread_id": conversation_id}}
+
+    async def has_turns(self, conversation_id):
+        """True when the conversation's thread already holds messages."""
+        checkpoint = await self.checkpointer.aget_tuple(self.config(conversation_id))
+        return bool(checkpoint and checkpoint.checkpoint.get("channel_values", {}).get("messages"))
+
+    async def reset(self, conversation_id):
+        """Delete the conversation's history."""
+        await self.checkpointer.adelete_thread(conversation_id)
+        self._active_dates[conversation_id] = datetime.now().date()
+
+    async def reset_if_stale(self, conversation_id):
+        """Start a fresh history when the conversation was last used on another day."""
+        today = datetime.now().date()
+        last_date = self._active_dates.get(conversation_id)
+
+        if last_date != today:
+            # Unknown in this process (e.g. after a restart), or from an earlier
+            # day: ask the checkpointer, another worker may already have started
+            # today's history
+            last_date = None
+            checkpoint = await self.checkpointer.aget_tuple(self.config(conversation_id))
+            if checkpoint is not None:
+                saved_at = datetime.fromisoformat(checkpoint.checkpoint["ts"])
+                if saved_at.tzinfo is None:
+                    saved_at = saved_at.replace(tzinfo=timezone.utc)
+                last_date = saved_at.astimezone().date()
+
+        if last_date is not None and last_date != today:
+            await self.checkpointer.adelete_thread(conversation_id)
+
+        self._active_dates[conversation_id] = today
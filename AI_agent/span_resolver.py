@@ -0,0 +1,303 @@
+# span_resolver.py
+"""
+Bulk span categorization for the MCP tools (Python port of resolver.js).
+
+The `span` table records WHAT HAPPENED; the `rule` table records what we currently
+believe it means. Category + productivity are resolved at QUERY time, most-specific
+rule wins, exactly as src/main/classification/resolver.js does for the dashboards.
+The semantics here must stay identical to that module:
+
+- specificity is derived from matcher_type:
+  title_contains < app < domain < domain_path_prefix < domain_path_regex
+- at equal specificity a user rule beats a built-in one, then the earlier rule wins
+- productivity = productivity_override, else category.default_productivity,
+  else 'unrated' (also 'unrated' when nothing matched)
+
+Where resolver.js scans every rule for every span, this module compiles the rule set
+once into a MatcherIndex and checks the matcher types from most to least specific,
+stopping at the first type that matches:
+
+- app / domain:        hash maps keyed by the normalized value
+- domain_path_prefix:  one path trie per domain
+- domain_path_regex:   compiled patterns per domain (compiled once, not per span)
+- title_contains:      substring scan, only reached when nothing better matched
+
+Resolution is also memoized per distinct span key within a pass, so a range with
+thousands of spans costs one dict lookup per span after the first few.
+"""
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+# Matcher types in ASCENDING specificity. The index IS the specificity score.
+MATCHER_SPECIFICITY = (
+    "title_contains",
+    "app",
+    "domain",
+    "domain_path_prefix",
+    "domain_path_regex",
+)
+
+UNRATED = "unrated"
+VALID_PRODUCTIVITY = ("productive", "neutral", "distracting")
+
+# Bucket name for spans no rule matched (kept apart from the real 'Uncategorized'
+# category, which is a rated, user-assignable category).
+UNMATCHED_CATEGORY = "Unrated"
+
+# Distinct span keys remembered by the memo before it is cleared.
+MEMO_LIMIT = 50000
+
+RULES_SQL = "SELECT id, matcher_type, matcher_value, category_id, is_user_rule FROM rule ORDER BY id"
+CATEGORIES_SQL = "SELECT id, name, default_productivity FROM category"
+OVERRIDES_SQL = "SELECT category_id, productivity FROM productivity_override"
+
+# Cheap probe of the three rule-context tables; the compiled index is rebuilt only
+# when this changes (rules are edited rarely, spans are read constantly).
+RULE_CONTEXT_VERSION_SQL = """
+SELECT (SELECT COUNT(*) || ':' || COALESCE(MAX(id), 0) || ':' || COALESCE(MAX(updated_at), '') FROM rule),
+       (SELECT COUNT(*) || ':' || COALESCE(MAX(updated_at), '') FROM category),
+       (SELECT COUNT(*) || ':' || COALESCE(MAX(updated_at), '') FROM productivity_override)
+"""
+
+# Spans starting in [start, end), with the duration computed by SQLite so the Python
+# loop never parses timestamps. Same selection as SpanService.getSpansInRange.
+SPANS_IN_RANGE_SQL = """
+SELECT key_source, key_app, key_app_name, key_domain, key_path, title,
+       CAST(ROUND(MAX(0, julianday(end) - julianday(start)) * 86400000) AS INTEGER) AS duration_ms
+FROM span
+WHERE start >= ? AND start < ?
+"""
+
+
+def _app_base(value):
+    # Whole-token app match: 'code' matches 'code.exe' but not 'vscode.exe'.
+    value = value.lower()
+    return value[:-4] if value.endswith(".exe") else value
+
+
+def _better(incumbent, candidate):
+    """Pick between two matching rules of EQUAL specificity (user rule, then order)."""
+    if incumbent is None:
+        return candidate
+    user_incumbent = bool(incumbent["is_user_rule"])
+    user_candidate = bool(candidate["is_user_rule"])
+    if user_incumbent != user_candidate:
+        return candidate if user_candidate else incumbent
+    return candidate if candidate["_order"] < incumbent["_order"] else incumbent
+
+
+class PathTrie:
+    """Character trie of path prefixes for one domain; every node may hold a rule."""
+
+    __slots__ = ("children", "rule")
+
+    def __init__(self):
+        self.children = {}
+        self.rule = None
+
+    def insert(self, prefix, rule):
+        node = self
+        for ch in prefix:
+            node = node.children.setdefault(ch, PathTrie())
+        node.rule = _better(node.rule, rule)
+
+    def best_match(self, path):
+        """Best rule among all prefixes of `path` (prefixes are equally specific)."""
+        best = self.rule
+        node = self
+        for ch in path:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            if node.rule is not None:
+                best = _better(best, node.rule)
+        return best
+
+
+class MatcherIndex:
+    """A rule set compiled for fast, repeated resolution."""
+
+    def __init__(self, rules, categories, overrides):
+        self.categories = categories
+        self.overrides = overrides
+        self.app = {}
+        self.domain = {}
+        self.path_prefix = {}
+        self.path_regex = {}
+        self.title = []
+
+        # _better keeps the earlier rule on a true tie, which is the same stable
+        # answer resolver.js gives when iterating the same rule list.
+        for order, rule in enumerate(rules):
+            rule = dict(rule, _order=order)
+            value = str(rule["matcher_value"] or "").lower()
+            if not value:
+                continue
+            matcher_type = rule["matcher_type"]
+
+            if matcher_type == "app":
+                key = _app_base(value)
+                self.app[key] = _better(self.app.get(key), rule)
+            elif matcher_type == "domain":
+                self.domain[value] = _better(self.domain.get(value), rule)
+            elif matcher_type == "domain_path_prefix":
+                # 'domain/prefix'; a value without '/' is a degenerate domain-only
+                # rule, i.e. the empty prefix that matches every path.
+                domain, slash, prefix = value.partition("/")
+                trie = self.path_prefix.setdefault(domain, PathTrie())
+                trie.insert(slash + prefix if slash else "", rule)
+            elif matcher_type == "domain_path_regex":
+                domain, slash, pattern = value.partition("/")
+                if not slash:
+                    continue  # no pattern part: never matches
+                try:
+                    compiled = re.compile(pattern)
+                except re.error:
+                    continue  # a malformed rule never matches, never throws
+                self.path_regex.setdefault(domain, []).append((compiled, rule))
+            elif matcher_type == "title_contains":
+                self.title.append((value, rule))
+
+        self._memo = {}
+
+    def winning_rule(self, app, domain, path, title):
+        """The most specific matching rule for a span key, or None."""
+        if domain:
+            path = path or "/"
+
+            best = None
+            for compiled, rule in self.path_regex.get(domain, ()):
+                if compiled.search(path):
+                    best = _better(best, rule)
+            if best is not None:
+                return best
+
+            trie = self.path_prefix.get(domain)
+            if trie is not None:
+                best = trie.best_match(path)
+                if best is not None:
+                    return best
+
+            best = self.domain.get(domain)
+            if best is not None:
+                return best
+
+        if app:
+            best = self.app.get(_app_base(app))
+            if best is not None:
+                return best
+
+        if title and self.title:
+            lowered = title.lower()
+            best = None
+            for value, rule in self.title:
+                if value in lowered:
+                    best = _better(best, rule)
+            return best
+
+        return None
+
+    def resolve(self, app, domain, path, title):
+        """Resolve a span key to (category, productivity, winning_rule), memoized."""
+        memo_key = (app, domain, path, title)
+        hit = self._memo.get(memo_key)
+        if hit is not None:
+            return hit
+        if len(self._memo) >= MEMO_LIMIT:
+            self._memo.clear()
+
+        winner = self.winning_rule(app, domain, path, title)
+        if winner is None:
+            result = (None, UNRATED, None)
+        else:
+            category = self.categories.get(winner["category_id"])
+            productivity = self.overrides.get(winner["category_id"])
+            if productivity is None and category is not None:
+                productivity = category["default_productivity"]
+            if productivity not in VALID_PRODUCTIVITY:
+                productivity = UNRATED
+            result = (category["name"] if category else None, productivity, winner)
+
+        self._memo[memo_key] = result
+        return result
+
+
+def load_matcher_index(conn):
+    """Compile the current rule / category / productivity_override tables."""
+    rules = [dict(r) for r in conn.execute(RULES_SQL)]
+    categories = {r["id"]: dict(r) for r in conn.execute(CATEGORIES_SQL)}
+    overrides = {r["category_id"]: r["productivity"] for r in conn.execute(OVERRIDES_SQL)}
+    return MatcherIndex(rules, categories, overrides)
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_matcher_index(conn):
+    """Return the compiled index, recompiling only when the rule context changed."""
+    global _index, _index_version
+    version = tuple(conn.execute(RULE_CONTEXT_VERSION_SQL).fetchone())
+    with _index_lock:
+        if _index is None or version != _index_version:
+            _index = load_matcher_index(conn)
+            _index_version = version
+        return _index
+
+
+def local_day_bounds(start_date, end_date):
+    """
+    Convert an inclusive local 'YYYY-MM-DD' range into span-table bounds.
+
+    Span timestamps are stored as UTC ISO strings (JS toISOString), so the local
+    midnights are converted to UTC in the same format; the end bound is exclusive.
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d").astimezone(timezone.utc)
+    end = (datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).astimezone(timezone.utc)
+    return _to_iso(start), _to_iso(end)
+
+
+def _to_iso(value):
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+
+
+def summarize_spans(conn, start_iso, end_iso):
+    """
+    Resolve every span starting in [start_iso, end_iso) in one pass.
+
+    Returns:
+        Dictionary with per-category and per-productivity totals (milliseconds and
+        span counts) plus the span count and total time for the range.
+    """
+    index = get_matcher_index(conn)
+
+    categories = {}
+    productivity = {name: {"total_ms": 0, "span_count": 0} for name in VALID_PRODUCTIVITY + (UNRATED,)}
+    total_ms = 0
+    span_count = 0
+
+    for row in conn.execute(SPANS_IN_RANGE_SQL, (start_iso, end_iso)):
+        category, verdict, _ = index.resolve(row["key_app"], row["key_domain"], row["key_path"], row["title"])
+        duration_ms = row["duration_ms"] or 0
+
+        name = category or UNMATCHED_CATEGORY
+        bucket = categories.get(name)
+        if bucket is None:
+            bucket = categories[name] = {"total_ms": 0, "span_count": 0, "productivity": verdict}
+        bucket["total_ms"] += duration_ms
+        bucket["span_count"] += 1
+
+        productivity[verdict]["total_ms"] += duration_ms
+        productivity[verdict]["span_count"] += 1
+
+        total_ms += duration_ms
+        span_count += 1
+
+    return {
+        "categories": categories,
+        "productivity": productivity,
+        "total_ms": total_ms,
+        "span_count": span_count,
+    }
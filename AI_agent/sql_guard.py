@@ -0,0 +1,252 @@
+# sql_guard.py
+"""
+Guarded execution of the SELECTs the agent writes for `query_sql`.
+
+The LLM's SQL used to run as-is: no plan check, no timeout, no row limit. One
+`SELECT * FROM app_usage` (or a cross join on `timestamps`) could keep the MCP
+subprocess busy for seconds and push megabytes back through stdio. Every query
+now goes through three checks:
+
+1. Plan check: `EXPLAIN QUERY PLAN` is inspected and a SCAN of a large table is
+   rejected. The large tables are indexed on their date/time column, so a query
+   bounded to a period plans as a SEARCH instead. Scans of a covering index are
+   allowed (COUNT(*) and friends stay cheap).
+2. Time budget: a progress handler interrupts the query once it has run for
+   TIME_BUDGET_S seconds.
+3. Row cap: at most MAX_ROWS rows come back per call. The rest is reachable with
+   an opaque continuation cursor that encodes the next offset; a query without
+   its own ORDER BY is paged in the order of all its columns, so pages never
+   overlap or skip rows.
+"""
+import base64
+import hashlib
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from sqlite3 import SQLITE_OK, SQLITE_READ, OperationalError
+
+from payload_encoding import fetch_page
+
+MAX_ROWS = int(os.getenv("FOCUSBOOK_QUERY_MAX_ROWS", "200"))
+TIME_BUDGET_S = float(os.getenv("FOCUSBOOK_QUERY_TIME_BUDGET_S", "5"))
+
+# Tables with more rows than this count as large for the plan check.
+LARGE_TABLE_ROWS = int(os.getenv("FOCUSBOOK_QUERY_LARGE_TABLE_ROWS", "5000"))
+
+# SQLite VM instructions between two checks of the deadline.
+PROGRESS_STEPS = 10000
+
+FROM_KEYWORD = re.compile(r"\bFROM\b", re.IGNORECASE)
+# Where a FROM clause ends (a subquery's clause ends at its closing parenthesis)
+FROM_CLAUSE_END = re.compile(
+    r"\b(?:WHERE|GROUP|ORDER|LIMIT|HAVING|UNION|EXCEPT|INTERSECT|WINDOW)\b|[()]", re.IGNORECASE
+)
+# Separators between the tables of a FROM clause
+FROM_ITEM_SEPARATOR = re.compile(
+    r",|\b(?:NATURAL\s+)?(?:(?:LEFT|RIGHT|FULL)\s+(?:OUTER\s+)?|INNER\s+|CROSS\s+)?JOIN\b", re.IGNORECASE
+)
+FROM_ITEM = re.compile(r"^[\"`\[]?(\w+)[\"`\]]?(?:\s+(?:AS\s+)?[\"`\[]?(\w+)[\"`\]]?)?", re.IGNORECASE)
+
+# Words that can follow a table name without being its alias.
+NOT_ALIASES = {
+    "where", "join", "inner", "left", "right", "full", "outer", "cross", "natural", "on", "using",
+    "group", "order", "limit", "having", "union", "except", "intersect", "window", "as",
+}
+
+# 'SCAN b', 'SCAN app_usage USING INDEX ...' (older SQLite: 'SCAN TABLE app_usage AS b')
+SCAN_DETAIL = re.compile(r"^SCAN (?:TABLE )?([^\s(]\S*)(?: AS \S+)?( USING COVERING INDEX)?")
+# Subqueries and CTEs the plan builds first; scanning them reads no base table
+DERIVED_DETAIL = re.compile(r"^(?:MATERIALIZE|CO-ROUTINE) (\S+)")
+
+# String literals, quoted identifiers and comments, blanked before looking for keywords
+SQL_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|--[^\n]*|/\*.*?\*/", re.DOTALL)
+ORDER_BY_OR_PAREN = re.compile(r"[()]|\bORDER\s+BY\b", re.IGNORECASE)
+
+
+class QueryRejected(ValueError):
+    """The query was refused before running (plan check or bad cursor)."""
+
+
+class QueryTimeout(RuntimeError):
+    """The query ran past the time budget and was interrupted."""
+
+
+def table_aliases(sql):
+    """Map every alias (and table name) in FROM / JOIN clauses to its table."""
+    aliases = {}
+    for keyword in FROM_KEYWORD.finditer(sql):
+        end = FROM_CLAUSE_END.search(sql, keyword.end())
+        clause = sql[keyword.end():end.start() if end else len(sql)]
+        for item in FROM_ITEM_SEPARATOR.split(clause):
+            match = FROM_ITEM.match(item.strip())
+            if not match:
+                continue
+            table, alias = match.group(1).lower(), (match.group(2) or "").lower()
+            aliases[table] = table
+            if alias and alias not in NOT_ALIASES:
+                aliases[alias] = table
+    return aliases
+
+
+def table_row_estimate(conn, table):
+    """Upper bound of a table's row count from its largest rowid (0 if unknown)."""
+    try:
+        return conn.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM "{table}"').fetchone()[0]
+    except OperationalError:
+        return 0  # views, CTE names, WITHOUT ROWID tables
+
+
+def query_plan(conn, sql, params=()):
+    """
+    EXPLAIN QUERY PLAN of a statement.
+
+    Returns:
+        (plan detail strings, names of the tables the statement reads); the
+        tables come from the authorizer while the statement is prepared
+    """
+    tables = set()
+
+    def authorize(action, table, *_):
+        if action == SQLITE_READ and table:
+            tables.add(table.lower())
+        return SQLITE_OK
+
+    conn.set_authorizer(authorize)
+    try:
+        details = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    finally:
+        conn.set_authorizer(None)
+    return details, tables
+
+
+def full_scans(conn, sql, params=()):
+    """
+    Tables the plan reads in full (a covering-index scan does not count).
+
+    A scanned name that is neither an alias from the FROM clauses nor a table
+    stands for every table the statement reads, so an alias the FROM parser
+    misses cannot hide a scan.
+    """
+    details, tables = query_plan(conn, sql, params)
+    aliases = table_aliases(sql)
+    derived = {match.group(1).lower() for match in map(DERIVED_DETAIL.match, details) if match}
+    scanned = set()
+    for detail in details:
+        match = SCAN_DETAIL.match(detail)
+        if not match or match.group(2) or detail.startswith("SCAN CONSTANT ROW"):
+            continue
+        name = match.group(1).lower()
+        table = aliases.get(name, name)
+        if name in derived or table in derived:
+            continue
+        scanned.update([table] if table in tables else tables)
+    return sorted(scanned)
+
+
+def check_plan(conn, sql, params=()):
+    """Raise QueryRejected when the plan scans every row of a large table."""
+    large = [table for table in full_scans(conn, sql, params) if table_row_estimate(conn, table) > LARGE_TABLE_ROWS]
+    if large:
+        raise QueryRejected(
+            f"Query rejected: it would scan every row of {', '.join(large)}. "
+            "Add a date filter (e.g. WHERE date BETWEEN 'YYYY-MM-DD' AND 'YYYY-MM-DD') "
+            "or use get_app_usage_data_range / get_productivity_summary for totals."
+        )
+
+
+def has_order_by(sql):
+    """True when the statement itself (not a subquery or window) has an ORDER BY."""
+    depth = 0
+    for match in ORDER_BY_OR_PAREN.finditer(SQL_QUOTED.sub(" ", sql)):
+        token = match.group(0)
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0:
+            return True
+    return False
+
+
+def paged_query(conn, sql):
+    """
+    `sql` wrapped for LIMIT / OFFSET paging in a stable order.
+
+    SQLite returns an unordered query's rows in whatever order its plan visits
+    them, which can differ between two pages, so such a query is ordered by
+    every result column.
+    """
+    if has_order_by(sql):
+        return f"SELECT * FROM ({sql}) LIMIT ? OFFSET ?"
+    column_count = len(conn.execute(f"SELECT * FROM ({sql}) LIMIT 0").description)
+    order = ", ".join(str(position) for position in range(1, column_count + 1))
+    return f"SELECT * FROM ({sql}) ORDER BY {order} LIMIT ? OFFSET ?"
+
+
+def _sql_digest(sql):
+    return hashlib.sha1(sql.encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(sql, offset):
+    """Opaque continuation token for the rows of `sql` starting at `offset`."""
+    payload = json.dumps({"q": _sql_digest(sql), "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(sql, cursor):
+    """Offset encoded in a cursor; the cursor must belong to the same query."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset = int(payload["o"])
+        digest = payload["q"]
+    except Exception:
+        raise QueryRejected("Invalid cursor: pass the next_cursor value from the previous result unchanged.")
+    if digest != _sql_digest(sql) or offset < 0:
+        raise QueryRejected("This cursor belongs to a different query: repeat the original arguments with it.")
+    return offset
+
+
+@contextmanager
+def time_budget(conn, seconds):
+    """Interrupt any statement on conn that runs longer than `seconds`."""
+    deadline = time.monotonic() + seconds
+    conn.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, PROGRESS_STEPS)
+    try:
+        yield
+    except OperationalError as e:
+        if "interrupted" in str(e).lower():
+            raise QueryTimeout(
+                f"Query stopped after {seconds:g}s. Narrow the date range or aggregate with GROUP BY / SUM."
+            ) from e
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def run_guarded(conn, sql, cursor=None, max_rows=MAX_ROWS, budget_s=TIME_BUDGET_S):
+    """
+    Plan-check and run a SELECT, returning at most max_rows rows.
+
+    Args:
+        conn: Read-only connection
+        sql: The SELECT to run (a trailing ';' is ignored)
+        cursor: Continuation cursor from a previous call, or None for the first page
+        max_rows: Page size
+        budget_s: Time budget in seconds for planning plus execution
+
+    Returns:
+        (columns, rows, next_cursor) - rows are value lists in column order;
+        next_cursor is None when no rows are left
+    """
+    sql = sql.strip().rstrip(";").strip()
+    offset = decode_cursor(sql, cursor) if cursor else 0
+    params = (max_rows + 1, offset)
+
+    with time_budget(conn, budget_s):
+        check_plan(conn, sql)
+        columns, rows, has_more = fetch_page(conn.execute(paged_query(conn, sql), params), max_rows)
+
+    return columns, rows, encode_cursor(sql, offset + max_rows) if has_more else None
@@ -6,7 +6,6 @@ This script is called by the Electron main process to start the AI service.
 
 import os
 import sys
-import asyncio
 import multiprocessing
 import uvicorn
 from pathlib import Path
@@ -88,12 +87,28 @@ def main():
         port = setup_environment()
         
         # Import the FastAPI app after environment setup
-        from app import app
+        from app import app, SERVICE_WORKERS
         
         print(f"Starting AI service on port {port}")
         print(f"Database path: {os.environ.get('FOCUSBOOK_DB_PATH', 'Not set')}")
         print(f"AI Provider: {os.environ.get('AI_PROVIDER', 'openai')}")
         
+        if SERVICE_WORKERS > 1:
+            # Multi-worker mode (AI_SERVICE_WORKERS): uvicorn spawns the workers, each
+            # builds its own app, agent and MCP session via the factory; they share
+            # the listening socket and the conversation checkpointer database
+            print(f"Workers: {SERVICE_WORKERS}")
+            uvicorn.run(
+                "app:create_app",
+                factory=True,
+                workers=SERVICE_WORKERS,
+                host="127.0.0.1",
+                port=port,
+                log_level="info",
+                access_log=False
+            )
+            return
+
         # Run the FastAPI server
         uvicorn.run(
             app,
@@ -0,0 +1,62 @@
+# stub_llm.py
+"""
+Local stand-in for the provider chat model, for load tests (AI_PROVIDER=stub).
+
+It answers instantly, without a network call, but still does the work a real
+provider client does in this process: the agent's messages (system prompt,
+history, tool payloads) are converted to the provider's message format and
+serialized to a request body. With tools bound, a new question gets one
+get_productivity_summary call first (unless the prefetch node already fetched
+data), then a short reply, so a turn runs the whole graph: history node,
+prefetch, chat node, tool node, chat node.
+
+Never selected unless AI_PROVIDER=stub is set explicitly.
+"""
+import json
+import uuid
+from typing import List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, convert_to_openai_messages
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+STUB_TOOL = "get_productivity_summary"
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model that replies from the conversation itself, instantly."""
+
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self):
+        return "focusbook-stub"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"tool_names": [tool.name for tool in tools]})
+
+    def reply(self, messages):
+        # The request body a provider client would send
+        request_body = json.dumps({"messages": convert_to_openai_messages(messages)}, default=str)
+
+        if self.tool_names and isinstance(messages[-1], HumanMessage) and STUB_TOOL in self.tool_names:
+            return AIMessage(content="", tool_calls=[
+                {"name": STUB_TOOL, "args": {"days": 7}, "id": f"stub_{uuid.uuid4().hex[:12]}", "type": "tool_call"}
+            ])
+
+        turn = []
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            turn.append(message)
+        tool_chars = sum(len(str(message.content)) for message in turn if isinstance(message, ToolMessage))
+        return AIMessage(content=(
+            f"Stub reply: {len(messages)} messages, {tool_chars} characters of tool data, "
+            f"{len(request_body)} byte request."
+        ))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=self.reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return self._generate(messages, stop=stop, **kwargs)
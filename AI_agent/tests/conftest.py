@@ -0,0 +1,146 @@
+# conftest.py
+"""Shared fixtures: the AI_agent modules on sys.path and a small FocusBook database."""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FOCUSBOOK_SCHEMA = """
+CREATE TABLE app_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    hour INTEGER CHECK (hour >= 0 AND hour <= 23),
+    app_name TEXT NOT NULL,
+    time_spent INTEGER NOT NULL DEFAULT 0,
+    category TEXT NOT NULL,
+    mode TEXT,
+    description TEXT,
+    domain TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_app_usage_date ON app_usage(date);
+CREATE TABLE categories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    type TEXT NOT NULL,
+    default_mode TEXT
+);
+CREATE TABLE modes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    rollup TEXT NOT NULL
+);
+CREATE TABLE span (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key_source TEXT NOT NULL,
+    key_app TEXT NOT NULL,
+    key_app_name TEXT,
+    key_domain TEXT,
+    key_path TEXT,
+    title TEXT,
+    start DATETIME NOT NULL,
+    end DATETIME NOT NULL
+);
+CREATE TABLE rule (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    matcher_type TEXT NOT NULL,
+    matcher_value TEXT NOT NULL,
+    category_id INTEGER NOT NULL,
+    is_user_rule INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE category (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    default_productivity TEXT NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE productivity_override (
+    category_id INTEGER PRIMARY KEY,
+    productivity TEXT NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE timestamps (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_usage_id INTEGER NOT NULL,
+    start_time DATETIME NOT NULL,
+    duration INTEGER NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE presence_span (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL CHECK (type IN ('active', 'idle', 'locked', 'suspended', 'unknown')),
+    start DATETIME NOT NULL,
+    end DATETIME NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE span_annotation (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    presence_span_id INTEGER NOT NULL,
+    user_label TEXT NOT NULL,
+    answered_at DATETIME NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE focus_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL CHECK (type IN ('focus', 'shortBreak', 'longBreak')),
+    start_time DATETIME NOT NULL,
+    end_time DATETIME,
+    planned_duration INTEGER NOT NULL,
+    actual_duration INTEGER,
+    status TEXT NOT NULL CHECK (status IN ('active', 'paused', 'completed', 'cancelled')) DEFAULT 'active',
+    paused_at DATETIME,
+    paused_duration INTEGER DEFAULT 0,
+    notes TEXT,
+    productivity INTEGER CHECK (productivity >= 1 AND productivity <= 5),
+    date TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE focus_session_interruptions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    focus_session_id INTEGER NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    reason TEXT,
+    app_name TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class FocusbookDb:
+    """A writable FocusBook database file, standing in for the Electron app's writer."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(FOCUSBOOK_SCHEMA)
+
+    def add_usage(self, date, hour, app_name, time_spent, category="Code", domain=None):
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO app_usage (date, hour, app_name, time_spent, category, domain) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (date, hour, app_name, time_spent, category, domain),
+            )
+        return cursor.lastrowid
+
+    def execute(self, sql, params=()):
+        with self.conn:
+            return self.conn.execute(sql, params)
+
+
+@pytest.fixture
+def focusbook_db(tmp_path, monkeypatch):
+    """A fresh FocusBook database with FOCUSBOOK_DB_PATH / the cache path pointing at it."""
+    db = FocusbookDb(str(tmp_path / "focusbook.db"))
+    monkeypatch.setenv("FOCUSBOOK_DB_PATH", db.path)
+    monkeypatch.setenv("FOCUSBOOK_AI_CACHE_PATH", str(tmp_path / "focusbook_ai_cache.db"))
+    yield db
+    db.conn.close()
@@ -0,0 +1,44 @@
+# test_date_intent.py
+"""Date ranges resolved from the wording of a question."""
+from datetime import date
+
+import pytest
+
+from date_intent import MAX_RANGE_DAYS, is_past_range, resolve_question_range
+
+TODAY = date(2026, 5, 13)  # a Wednesday
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("how productive was I yesterday", ("2026-05-12", "2026-05-12")),
+    ("usage the day before yesterday", ("2026-05-11", "2026-05-11")),
+    ("screen time last 7 days", ("2026-05-07", "2026-05-13")),
+    ("screen time past two weeks", ("2026-04-30", "2026-05-13")),
+    ("productive time last week", ("2026-05-04", "2026-05-10")),
+    ("productive time this week", ("2026-05-11", "2026-05-13")),
+    ("productive time last month", ("2026-04-01", "2026-04-30")),
+    ("what did I do on monday", ("2026-05-11", "2026-05-11")),
+    ("usage between 2026-05-03 and 2026-05-01", ("2026-05-01", "2026-05-03")),
+    ("how am I doing so far", ("2026-05-13", "2026-05-13")),
+])
+def test_recognized_periods(question, expected):
+    assert resolve_question_range(question, TODAY) == expected
+
+
+def test_unrecognized_or_empty_periods_resolve_to_none():
+    assert resolve_question_range("how can I focus better", TODAY) is None
+    assert resolve_question_range("usage last 0 days", TODAY) is None
+    assert resolve_question_range("usage on 2026-13-45", TODAY) is None
+    assert resolve_question_range("usage between 2026-05-01 and 2026-02-30", TODAY) is None
+
+
+def test_huge_day_counts_are_capped_instead_of_overflowing():
+    start, end = resolve_question_range("usage last 1000000 days", TODAY)
+    assert end == "2026-05-13"
+    assert (TODAY - date.fromisoformat(start)).days == MAX_RANGE_DAYS - 1
+
+
+def test_is_past_range():
+    assert is_past_range(("2026-05-01", "2026-05-12"), TODAY)
+    assert not is_past_range(("2026-05-01", "2026-05-13"), TODAY)
+    assert not is_past_range(None, TODAY)
@@ -0,0 +1,62 @@
+# test_db_pool.py
+"""Reuse, waiting and broken-connection replacement in the read-only pool."""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from db_pool import ReadOnlyPool
+
+
+@pytest.fixture
+def pool(focusbook_db):
+    pool = ReadOnlyPool(focusbook_db.path, size=2)
+    yield pool
+    pool.close()
+
+
+def test_returned_connection_is_reused_first(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as again:
+        assert again is first
+
+
+def test_query_errors_keep_the_connection(pool):
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection() as conn:
+            conn.execute("SELECT * FROM no_such_table")
+    with pool.connection() as again:
+        assert again is conn
+
+
+def test_waiter_gets_a_new_connection_when_every_connection_breaks(pool):
+    holding, release = threading.Barrier(3), threading.Event()
+    waiter_conn = []
+
+    def break_connection():
+        with pytest.raises(sqlite3.DatabaseError):
+            with pool.connection():
+                holding.wait()
+                release.wait()
+                raise sqlite3.DatabaseError("file is not a database")
+
+    def wait_for_connection():
+        with pool.connection() as conn:
+            waiter_conn.append(conn.execute("SELECT 1").fetchone()[0])
+
+    holders = [threading.Thread(target=break_connection, daemon=True) for _ in range(2)]
+    for thread in holders:
+        thread.start()
+    holding.wait()
+
+    waiter = threading.Thread(target=wait_for_connection, daemon=True)
+    waiter.start()
+    time.sleep(0.2)  # let the waiter block on the full pool first
+    release.set()
+    for thread in (*holders, waiter):
+        thread.join(timeout=5)
+
+    assert not waiter.is_alive()
+    assert waiter_conn == [1]
@@ -0,0 +1,70 @@
+# test_fast_path.py
+"""Which questions the fast path answers itself and which go to the agent."""
+import asyncio
+from datetime import date
+
+import pytest
+
+import fast_path
+from fast_path import answer_fast_path, describe_period, parse_fast_question
+
+TODAY = date(2026, 5, 13)  # a Wednesday
+
+
+@pytest.mark.parametrize("question, metric, start, end", [
+    ("How much productive today?", "productive", "2026-05-13", "2026-05-13"),
+    ("today's productive time", "productive", "2026-05-13", "2026-05-13"),
+    ("How much time did I waste yesterday?", "distracted", "2026-05-12", "2026-05-12"),
+    ("screen time yesterday", "screen_time", "2026-05-12", "2026-05-12"),
+    ("time spent on youtube yesterday", "youtube", "2026-05-12", "2026-05-12"),
+    ("educational videos yesterday", "youtube_educational", "2026-05-12", "2026-05-12"),
+])
+def test_single_metric_questions_take_the_fast_path(question, metric, start, end):
+    parsed = parse_fast_question(question, TODAY)
+    assert (parsed.metric, parsed.start_date, parsed.end_date) == (metric, start, end)
+
+
+@pytest.mark.parametrize("question", [
+    # DETAILED BREAKDOWN MODE in the prompt
+    "productivity summary for yesterday",
+    "give me a productivity report for yesterday",
+    "show me my productive time yesterday",
+    "productive time breakdown yesterday",
+    "which apps were productive yesterday",
+    # More than one number, or advice
+    "productive and distracted time yesterday",
+    "why was I less productive yesterday",
+    "productive time yesterday morning",
+    # Negated metrics are not the metric they name
+    "how much time was I not productive today",
+    "non-productive time yesterday",
+    "time I wasn't productive today",
+    "time I wasnt productive today",
+    "never productive yesterday",
+    # No concrete period, or no single metric
+    "how productive am I",
+    "what did I do yesterday",
+    "productive time on 2026-13-45",
+])
+def test_other_questions_go_to_the_agent(question):
+    assert parse_fast_question(question, TODAY) is None
+
+
+def test_describe_period():
+    assert describe_period("2026-05-13", "2026-05-13", TODAY) == "today"
+    assert describe_period("2026-05-12", "2026-05-12", TODAY) == "yesterday"
+    assert describe_period("2026-05-04", "2026-05-04", TODAY) == "on 2026-05-04"
+    assert describe_period("2026-05-11", "2026-05-13", TODAY) == "from 2026-05-11 to 2026-05-13"
+
+
+class FailingSession:
+    async def call_tool(self, name, arguments=None):
+        raise AssertionError("the agent should have answered")
+
+
+def test_a_failing_parse_falls_back_to_the_agent(monkeypatch):
+    def unresolvable(question, today=None):
+        raise OverflowError("date value out of range")
+
+    monkeypatch.setattr(fast_path, "resolve_question_range", unresolvable)
+    assert asyncio.run(answer_fast_path("How much productive today?", FailingSession(), TODAY)) is None
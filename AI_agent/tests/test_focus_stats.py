@@ -0,0 +1,116 @@
+# test_focus_stats.py
+"""Session totals, interruption rates and the hourly ranking of focus sessions."""
+from datetime import datetime, timezone
+
+import pytest
+
+import focus_stats
+from db_pool import open_read_only
+from focus_stats import hourly_focus, interruption_stats, session_totals
+
+MINUTE = 60000
+
+
+@pytest.fixture
+def conn(focusbook_db):
+    conn = open_read_only(focusbook_db.path)
+    yield conn
+    conn.close()
+
+
+def add_session(db, hour, status, planned_min=25, actual_min=None, session_type="focus", date="2026-05-04"):
+    """A session starting at a local hour; start_time is stored as UTC ISO like the app does."""
+    start = datetime.strptime(f"{date} {hour:02d}:00", "%Y-%m-%d %H:%M").astimezone(timezone.utc)
+    cursor = db.execute(
+        "INSERT INTO focus_sessions (type, start_time, planned_duration, actual_duration, status, date) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (session_type, start.strftime("%Y-%m-%dT%H:%M:%S.000Z"), planned_min * MINUTE,
+         None if actual_min is None else actual_min * MINUTE, status, date),
+    )
+    return cursor.lastrowid
+
+
+def interrupt(db, session_id, app_name, reason="switched app"):
+    db.execute(
+        "INSERT INTO focus_session_interruptions (focus_session_id, reason, app_name) VALUES (?, ?, ?)",
+        (session_id, reason, app_name),
+    )
+
+
+def test_sessions_without_interruptions_still_report_totals(focusbook_db, conn):
+    add_session(focusbook_db, 9, "completed", actual_min=25)
+    add_session(focusbook_db, 10, "completed", actual_min=35)
+
+    stats = interruption_stats(conn, "2026-05-04", "2026-05-04")
+    assert stats["sessions"] == 2
+    assert stats["focus_ms"] == 60 * MINUTE
+    assert stats["interruptions"] == 0
+    assert stats["interrupted_sessions"] == 0
+    assert stats["interrupted_session_share"] == 0.0
+    assert stats["interruptions_per_hour"] == 0.0
+    assert stats["interruptions_per_session"] == 0.0
+    assert stats["apps"] == []
+
+
+def test_interruptions_per_app(focusbook_db, conn):
+    first = add_session(focusbook_db, 9, "completed", actual_min=30)
+    second = add_session(focusbook_db, 10, "cancelled", actual_min=30)
+    add_session(focusbook_db, 11, "completed", actual_min=60)
+    add_session(focusbook_db, 12, "completed", actual_min=60, session_type="shortBreak")
+    for session_id, app in [(first, "Slack"), (second, "Slack"), (second, "Slack"), (second, " ")]:
+        interrupt(focusbook_db, session_id, app)
+
+    stats = interruption_stats(conn, "2026-05-04", "2026-05-04")
+    assert (stats["sessions"], stats["interruptions"], stats["interrupted_sessions"]) == (3, 4, 2)
+    assert stats["interruptions_per_hour"] == 2.0
+    assert [(app["app_name"], app["interruptions"], app["sessions_hit"], app["share"]) for app in stats["apps"]] == [
+        ("Slack", 3, 2, 75.0), ("(unknown)", 1, 1, 25.0),
+    ]
+
+
+def test_empty_range(conn):
+    stats = interruption_stats(conn, "2026-05-04", "2026-05-04")
+    assert (stats["sessions"], stats["interruptions"], stats["interruptions_per_hour"]) == (0, 0, None)
+    assert session_totals(conn, "2026-05-04", "2026-05-04")["completion_rate"] is None
+
+
+def test_sessions_in_progress_do_not_count_against_completion(focusbook_db, conn):
+    add_session(focusbook_db, 9, "completed", actual_min=25)
+    add_session(focusbook_db, 10, "cancelled", actual_min=10)
+    add_session(focusbook_db, 11, "active")
+    add_session(focusbook_db, 12, "paused", actual_min=5)
+
+    totals = session_totals(conn, "2026-05-04", "2026-05-04")
+    assert (totals["sessions"], totals["completed"], totals["cancelled"], totals["in_progress"]) == (4, 1, 1, 2)
+    assert totals["completion_rate"] == 50.0
+
+    hours = {hour["hour"]: hour for hour in hourly_focus(conn, "2026-05-04", "2026-05-04")["hours"]}
+    assert hours[11]["completion_rate"] is None
+    assert hours[11]["sessions"] == 1
+
+
+def test_only_hours_with_enough_sessions_are_ranked(focusbook_db, conn, monkeypatch):
+    monkeypatch.setattr(focus_stats, "MIN_SESSIONS_PER_HOUR", 2)
+    # 09: all completed, 14: half completed and interrupted, 16: one perfect session (too few to rank)
+    for status in ("completed", "completed"):
+        add_session(focusbook_db, 9, status, actual_min=25)
+    interrupt(focusbook_db, add_session(focusbook_db, 14, "completed", actual_min=25), "Slack")
+    add_session(focusbook_db, 14, "cancelled", actual_min=10)
+    add_session(focusbook_db, 16, "completed", actual_min=25)
+
+    result = hourly_focus(conn, "2026-05-04", "2026-05-04")
+    assert [hour["hour"] for hour in result["hours"]] == [9, 14, 16]
+    assert result["ranked_hours"] == 2
+    assert result["best_hours"] == [9, 14]
+    assert result["worst_hour"] == 14
+
+
+def test_a_single_ranked_hour_has_no_worst_hour(focusbook_db, conn, monkeypatch):
+    monkeypatch.setattr(focus_stats, "MIN_SESSIONS_PER_HOUR", 2)
+    add_session(focusbook_db, 9, "completed", actual_min=25)
+    add_session(focusbook_db, 9, "cancelled", actual_min=5)
+    add_session(focusbook_db, 13, "completed", actual_min=25)
+
+    result = hourly_focus(conn, "2026-05-04", "2026-05-04")
+    assert result["best_hours"] == [9]
+    assert result["worst_hour"] is None
@@ -0,0 +1,135 @@
+# test_interval_index.py
+"""Incremental refresh of the interval index and the interval algebra on top of it."""
+import pytest
+
+from db_pool import open_read_only
+from interval_index import APP_USAGE, SPANS, IntervalIndex, covered_ms, gaps, merge
+from presence import iso_to_ms
+
+MINUTE = 60000
+
+
+def at(clock):
+    return iso_to_ms(f"2026-05-04T{clock}:00.000Z")
+
+
+@pytest.fixture
+def conn(focusbook_db):
+    conn = open_read_only(focusbook_db.path)
+    yield conn
+    conn.close()
+
+
+def add_span(db, app, start, end):
+    db.execute(
+        "INSERT INTO span (key_source, key_app, start, end) VALUES ('window', ?, ?, ?)",
+        (app, f"2026-05-04T{start}:00.000Z", f"2026-05-04T{end}:00.000Z"),
+    )
+
+
+def add_timestamp(db, app_usage_id, start, minutes):
+    db.execute(
+        "INSERT INTO timestamps (app_usage_id, start_time, duration) VALUES (?, ?, ?)",
+        (app_usage_id, f"2026-05-04T{start}:00.000Z", minutes * MINUTE),
+    )
+
+
+def spans_of(index, low="00:00", high="23:59"):
+    return [(start, end) for start, end, _ in index.overlapping(at(low), at(high))]
+
+
+def test_overlap_query_finds_a_long_interval_that_started_earlier(focusbook_db, conn):
+    add_span(focusbook_db, "a.exe", "09:00", "12:00")
+    add_span(focusbook_db, "b.exe", "09:10", "09:20")
+    add_span(focusbook_db, "c.exe", "11:50", "13:00")
+    index = IntervalIndex(SPANS)
+    index.refresh(conn, force=True)
+
+    assert spans_of(index, "10:00", "11:00") == [(at("09:00"), at("12:00"))]
+    # [low, high) is half-open on both sides of the query
+    assert spans_of(index, "09:20", "11:50") == [(at("09:00"), at("12:00"))]
+    assert spans_of(index, "13:00", "14:00") == []
+
+
+def test_out_of_order_arrivals_keep_the_index_sorted(focusbook_db, conn):
+    index = IntervalIndex(SPANS)
+    add_span(focusbook_db, "a.exe", "10:00", "10:30")
+    index.refresh(conn, force=True)
+
+    # A later id that starts earlier, and one that outlasts everything before it
+    add_span(focusbook_db, "b.exe", "08:00", "11:00")
+    add_span(focusbook_db, "c.exe", "09:00", "09:15")
+    index.refresh(conn, force=True)
+
+    assert spans_of(index) == [(at("08:00"), at("11:00")), (at("09:00"), at("09:15")), (at("10:00"), at("10:30"))]
+    assert spans_of(index, "10:45", "10:50") == [(at("08:00"), at("11:00"))]
+
+
+def test_rewritten_timestamps_replace_the_indexed_ones(focusbook_db, conn):
+    add_timestamp(focusbook_db, 1, "09:00", 10)
+    add_timestamp(focusbook_db, 1, "09:30", 10)
+    add_timestamp(focusbook_db, 2, "09:05", 5)
+    index = IntervalIndex(APP_USAGE)
+    index.refresh(conn, force=True)
+    assert len(index) == 3
+
+    # sqliteConnection.js saves app_usage row 1 as delete + insert of all its timestamps
+    focusbook_db.execute("DELETE FROM timestamps WHERE app_usage_id = 1")
+    add_timestamp(focusbook_db, 1, "09:00", 10)
+    add_timestamp(focusbook_db, 1, "09:30", 20)
+    index.refresh(conn, force=True)
+
+    assert sorted((start, end, key) for start, end, key in index.overlapping(at("00:00"), at("23:59"))) == [
+        (at("09:00"), at("09:10"), 1), (at("09:05"), at("09:10"), 2), (at("09:30"), at("09:50"), 1),
+    ]
+
+
+def test_other_deletions_rebuild_the_index(focusbook_db, conn):
+    for start, end in [("09:00", "09:10"), ("09:20", "09:30"), ("09:40", "09:50")]:
+        add_span(focusbook_db, "a.exe", start, end)
+    index = IntervalIndex(SPANS)
+    index.refresh(conn, force=True)
+
+    focusbook_db.execute("DELETE FROM span WHERE start LIKE '%T09:20%'")
+    index.refresh(conn, force=True)
+    assert spans_of(index) == [(at("09:00"), at("09:10")), (at("09:40"), at("09:50"))]
+
+    # The newest row deleted while a new one arrives: the row count still catches it
+    focusbook_db.execute("DELETE FROM span WHERE start LIKE '%T09:40%'")
+    add_span(focusbook_db, "a.exe", "10:00", "10:05")
+    index.refresh(conn, force=True)
+    assert spans_of(index) == [(at("09:00"), at("09:10")), (at("10:00"), at("10:05"))]
+
+
+def test_refresh_is_rate_limited_unless_forced(focusbook_db, conn):
+    index = IntervalIndex(SPANS)
+    index.refresh(conn)
+    add_span(focusbook_db, "a.exe", "09:00", "09:10")
+    index.refresh(conn)
+    assert len(index) == 0
+    index.refresh(conn, force=True)
+    assert len(index) == 1
+
+
+def test_merge_joins_intervals_up_to_the_allowed_break():
+    intervals = [(0, 10, "a"), (5, 8, "b"), (12, 20, "c"), (23, 30, "d")]
+    assert [(start, end, len(members)) for start, end, members in merge(intervals)] == [(0, 10, 2), (12, 20, 1), (23, 30, 1)]
+    # A break of exactly max_gap_ms still joins; one millisecond more splits
+    assert [(start, end) for start, end, _ in merge(intervals, max_gap_ms=2)] == [(0, 20), (23, 30)]
+    assert [(start, end) for start, end, _ in merge(intervals, max_gap_ms=3)] == [(0, 30)]
+    # Touching intervals are one block
+    assert [(start, end) for start, end, _ in merge([(0, 5, "a"), (5, 9, "b")])] == [(0, 9)]
+
+
+def test_gaps_lie_between_the_first_and_last_activity_of_the_window():
+    # As overlapping() returns them: every interval overlaps the [20, 110) window
+    intervals = [(5, 30, "a"), (25, 40, "b"), (55, 60, "c"), (70, 100, "d"), (100, 120, "e")]
+    # Before 20 and after 110 is outside the window; touching intervals leave no gap
+    assert gaps(intervals, 20, 110, min_gap_ms=10) == [(40, 55), (60, 70)]
+    # A gap exactly min_gap_ms long counts, a shorter one does not
+    assert gaps(intervals, 20, 110, min_gap_ms=15) == [(40, 55)]
+    assert gaps(intervals, 20, 110, min_gap_ms=16) == []
+
+
+def test_covered_ms_counts_overlaps_once():
+    assert covered_ms([(0, 10, "a"), (5, 15, "b"), (20, 25, "c")]) == 20
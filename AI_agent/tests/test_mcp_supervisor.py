@@ -0,0 +1,125 @@
+# test_mcp_supervisor.py
+"""Failover of the supervised MCP session, on fake server processes."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import mcp_supervisor
+from mcp_supervisor import MCPSupervisor, ServerLost
+
+
+class FakeSession:
+    def __init__(self, name, hang_list_tools=False):
+        self.name = name
+        self.hang_list_tools = hang_list_tools
+
+    async def send_ping(self):
+        pass
+
+    async def list_tools(self):
+        if self.hang_list_tools:
+            await asyncio.Event().wait()
+        return [SimpleNamespace(name="get_productivity_summary")]
+
+    async def call_tool(self, name, arguments=None, **kwargs):
+        return f"{name} on {self.name}"
+
+
+class FakeServer:
+    """Stands in for ServerProcess: same request / lost / stop surface, no subprocess."""
+
+    def __init__(self, name, dead=False, hang_list_tools=False):
+        self.session = FakeSession(name, hang_list_tools)
+        self.lost = asyncio.Event()
+        self.on_lost = None
+        self.stopped = False
+        if dead:
+            self.lost.set()
+
+    def mark_lost(self, reason):
+        if self.lost.is_set():
+            return
+        self.lost.set()
+        if self.on_lost is not None:
+            self.on_lost(self, reason)
+
+    async def request(self, method, *args, **kwargs):
+        if self.lost.is_set():
+            raise ServerLost(f"MCP server lost during {method}")
+        return await mcp_supervisor.ServerProcess.request(self, method, *args, **kwargs)
+
+    async def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def spawn_order(monkeypatch):
+    """Servers handed out by _spawn, in order."""
+    servers = []
+
+    async def spawn(self):
+        return servers.pop(0) if servers else FakeServer("extra")
+
+    async def load_tools(session):
+        return await session.list_tools()
+
+    monkeypatch.setattr(MCPSupervisor, "_spawn", spawn)
+    monkeypatch.setattr(mcp_supervisor, "load_mcp_tools", load_tools)
+    monkeypatch.setattr(mcp_supervisor, "WARM_SPARE", True)
+    return servers
+
+
+def test_lost_server_fails_over_to_the_spare(spawn_order):
+    first, spare = FakeServer("first"), FakeServer("spare")
+    spawn_order.extend([first, spare])
+
+    async def scenario():
+        supervisor = MCPSupervisor(server_params=None)
+        await supervisor.start(timeout=2)
+        assert await supervisor.call_tool("t") == "t on first"
+
+        first.mark_lost("killed")
+        assert await supervisor.call_tool("t") == "t on spare"
+        assert supervisor.restarts == 1
+        await supervisor.close()
+        assert first.stopped
+
+    asyncio.run(scenario())
+
+
+def test_dead_spare_is_not_promoted(spawn_order):
+    first, dead, fresh = FakeServer("first"), FakeServer("dead", dead=True), FakeServer("fresh")
+    spawn_order.extend([first, dead, fresh])
+
+    async def scenario():
+        supervisor = MCPSupervisor(server_params=None)
+        await supervisor.start(timeout=2)
+        first.mark_lost("killed")
+        assert await supervisor.wait_ready(timeout=2) is fresh
+        assert dead.stopped
+        await supervisor.close()
+
+    asyncio.run(scenario())
+
+
+def test_tool_refresh_does_not_hold_up_failover(spawn_order):
+    # The promoted server never answers list_tools and is lost right away: the
+    # refresh waits for the next server instead of blocking the supervisor
+    first, stuck, spare = FakeServer("first"), FakeServer("stuck", hang_list_tools=True), FakeServer("spare")
+    spawn_order.extend([first, stuck, spare])
+
+    async def scenario():
+        supervisor = MCPSupervisor(server_params=None)
+        await supervisor.start(timeout=2)
+        first.mark_lost("killed")
+        assert await supervisor.wait_ready(timeout=2) is stuck
+
+        started = time.monotonic()
+        stuck.mark_lost("killed")
+        assert await supervisor.call_tool("t") == "t on spare"
+        assert time.monotonic() - started < 1
+        await supervisor.close()
+
+    asyncio.run(scenario())
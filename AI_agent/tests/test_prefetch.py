@@ -0,0 +1,52 @@
+# test_prefetch.py
+"""Which questions get the productivity summary prefetched, and for which range."""
+import asyncio
+from datetime import date
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+import prefetch
+from prefetch import UsagePrefetcher, prefetch_calls
+
+TODAY = date(2026, 5, 13)  # a Wednesday
+
+
+def test_single_day_question_prefetches_the_summary_of_that_day():
+    assert prefetch_calls("How productive was I yesterday?", TODAY) == [
+        ("get_productivity_summary", {"date": "2026-05-12"}),
+    ]
+
+
+def test_range_question_prefetches_the_summary_of_the_range():
+    [(name, args)] = prefetch_calls("How much time did I spend on apps in the last 7 days?", TODAY)
+    assert name == "get_productivity_summary"
+    assert args["end_date"] == "2026-05-13" and args["start_date"] < args["end_date"]
+
+
+def test_no_prefetch_without_a_usage_topic_or_a_range():
+    assert prefetch_calls("What is the capital of France yesterday?", TODAY) == []
+    assert prefetch_calls("How can I be more productive?", TODAY) == []
+
+
+class FakeTool:
+    name = "get_productivity_summary"
+
+    async def ainvoke(self, call):
+        return ToolMessage(content="{}", tool_call_id=call["id"], name=self.name)
+
+
+def test_node_adds_the_call_and_its_result_to_the_turn():
+    node = UsagePrefetcher([FakeTool()])
+    update = asyncio.run(node({"messages": [HumanMessage(content="How productive was I yesterday?")]}))
+    call, result = update["messages"]
+    assert isinstance(call, AIMessage) and call.tool_calls[0]["name"] == "get_productivity_summary"
+    assert result.tool_call_id == call.tool_calls[0]["id"]
+
+
+def test_node_leaves_the_turn_untouched_when_the_range_cannot_be_resolved(monkeypatch):
+    def unresolvable(question, today=None):
+        raise OverflowError("date value out of range")
+
+    monkeypatch.setattr(prefetch, "resolve_question_range", unresolvable)
+    node = UsagePrefetcher([FakeTool()])
+    assert asyncio.run(node({"messages": [HumanMessage(content="How productive was I yesterday?")]})) == {}
@@ -0,0 +1,119 @@
+# test_presence.py
+"""The activity x presence sweep and the presence-aware summaries built on it."""
+import pytest
+
+import span_resolver
+from db_pool import open_read_only
+from presence import presence_bucket, summarize_active_productivity, summarize_presence, sweep
+
+MINUTE = 60000
+
+
+def pieces(intervals, presence):
+    return [(index, overlap, span[2] if span else None) for index, overlap, span in sweep(intervals, presence)]
+
+
+def test_sweep_splits_overlapping_intervals_across_presence_gaps():
+    presence = [(0, 100, "active", None), (150, 300, "idle", "meeting")]
+    # Two activity intervals overlapping each other; 100-150 and 300+ have no presence
+    assert pieces([(50, 200), (60, 400)], presence) == [
+        (0, 50, "active"), (0, 50, None), (0, 50, "idle"),
+        (1, 40, "active"), (1, 50, None), (1, 150, "idle"), (1, 100, None),
+    ]
+
+
+def test_sweep_accounts_for_every_millisecond_once():
+    presence = [(10, 20, "active", None), (20, 35, "locked", None), (50, 60, "active", None)]
+    intervals = [(0, 70), (5, 15), (15, 55), (58, 59), (80, 90)]
+    covered = {}
+    for index, overlap, _ in sweep(intervals, presence):
+        assert overlap > 0
+        covered[index] = covered.get(index, 0) + overlap
+    assert covered == {index: end - start for index, (start, end) in enumerate(intervals)}
+
+
+def test_sweep_keeps_presence_for_a_later_interval_inside_a_long_one():
+    # The second interval starts before the first one ends: the pointer must not
+    # have skipped the presence spans it still needs
+    presence = [(0, 10, "active", None), (10, 20, "idle", None)]
+    assert pieces([(0, 20), (2, 8)], presence) == [(0, 10, "active"), (0, 10, "idle"), (1, 6, "active")]
+
+
+@pytest.mark.parametrize("span, bucket", [
+    (None, "no_presence_data"),
+    ((0, 1, "active", None), "active"),
+    ((0, 1, "idle", "meeting"), "credited_absence"),
+    ((0, 1, "locked", "working"), "credited_absence"),
+    ((0, 1, "idle", "break"), "away"),
+    ((0, 1, "suspended", None), "away"),
+])
+def test_presence_bucket(span, bucket):
+    assert presence_bucket(span) == bucket
+
+
+@pytest.fixture
+def conn(focusbook_db, monkeypatch):
+    # The compiled rule index is process-wide; another test's rules must not leak in
+    monkeypatch.setattr(span_resolver, "_index", None)
+    db = focusbook_db
+    db.execute("INSERT INTO category (id, name, default_productivity) VALUES (1, 'Coding', 'productive')")
+    db.execute("INSERT INTO rule (matcher_type, matcher_value, category_id, is_user_rule) VALUES ('app', 'code.exe', 1, 0)")
+    for presence_type, start, end in [
+        ("active", "09:00", "09:30"),
+        ("idle", "09:30", "10:00"),
+        ("idle", "10:00", "10:30"),
+    ]:
+        db.execute(
+            "INSERT INTO presence_span (type, start, end) VALUES (?, ?, ?)",
+            (presence_type, f"2026-05-04T{start}:00.000Z", f"2026-05-04T{end}:00.000Z"),
+        )
+    # The latest answer wins: the first idle span was a meeting, the second a break
+    db.execute("INSERT INTO span_annotation (presence_span_id, user_label, answered_at) VALUES (2, 'Meeting', '2026-05-04T11:00:00.000Z')")
+    db.execute("INSERT INTO span_annotation (presence_span_id, user_label, answered_at) VALUES (3, 'working', '2026-05-04T11:00:00.000Z')")
+    db.execute("INSERT INTO span_annotation (presence_span_id, user_label, answered_at) VALUES (3, 'break', '2026-05-04T11:05:00.000Z')")
+    conn = open_read_only(db.path)
+    yield conn
+    conn.close()
+
+
+def add_span(db, app, start, end):
+    db.execute(
+        "INSERT INTO span (key_source, key_app, start, end) VALUES ('window', ?, ?, ?)",
+        (app, f"2026-05-04T{start}.000Z", f"2026-05-04T{end}.000Z"),
+    )
+
+
+def test_active_productivity_splits_each_span_by_presence(focusbook_db, conn):
+    # Inserted out of start order; 08:50-09:00 is before the presence log begins
+    add_span(focusbook_db, "code.exe", "09:20:00", "10:15:00")
+    add_span(focusbook_db, "code.exe", "08:50:00", "09:10:00")
+    add_span(focusbook_db, "unknown.exe", "09:00:00", "09:05:00")
+
+    result = summarize_active_productivity(conn, "2026-05-04T00:00:00.000Z", "2026-05-05T00:00:00.000Z")
+    productive = result["productivity"]["productive"]
+    assert productive["span_count"] == 2
+    assert productive["no_presence_data"] == 10 * MINUTE
+    assert productive["active"] == 20 * MINUTE
+    assert productive["credited_absence"] == 30 * MINUTE
+    assert productive["away"] == 15 * MINUTE
+    assert result["productivity"]["unrated"]["active"] == 5 * MINUTE
+    assert result["totals"]["active"] == 25 * MINUTE and result["totals"]["span_count"] == 3
+
+
+def test_active_productivity_follows_a_span_past_the_range_end(focusbook_db, conn):
+    add_span(focusbook_db, "code.exe", "09:50:00", "10:20:00")
+    result = summarize_active_productivity(conn, "2026-05-04T09:00:00.000Z", "2026-05-04T10:00:00.000Z")
+    assert result["totals"]["credited_absence"] == 10 * MINUTE
+    assert result["totals"]["away"] == 20 * MINUTE
+
+
+def test_presence_summary_clips_to_the_range_and_splits_absences_by_label(conn):
+    summary = summarize_presence(conn, "2026-05-04T09:15:00.000Z", "2026-05-04T10:10:00.000Z")
+    assert summary["active_ms"] == 15 * MINUTE
+    assert summary["absent_ms"] == 40 * MINUTE
+    assert summary["absence_labels"]["meeting"]["total_ms"] == 30 * MINUTE
+    assert summary["absence_labels"]["break"]["total_ms"] == 10 * MINUTE
+    assert summary["meeting_ms"] == 30 * MINUTE
+    assert summary["credited_ms"] == 45 * MINUTE
+    assert summary["unlabelled_long_absences"] == 0
+
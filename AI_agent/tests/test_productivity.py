@@ -0,0 +1,49 @@
+# test_productivity.py
+"""Verdict and work-mode fallbacks of summarize_productivity (dataProcessor.js parity)."""
+import pytest
+
+from productivity import summarize_productivity
+
+
+@pytest.fixture
+def usage_db(focusbook_db):
+    focusbook_db.execute(
+        "INSERT INTO categories (name, type, default_mode) VALUES "
+        "('Code', 'productive', NULL), ('Meetings', 'productive', 'Collaboration'), "
+        "('Games', 'distracted', NULL)"
+    )
+    # Only one mode row: the others come from FALLBACK_MODE_ROLLUP
+    focusbook_db.execute("INSERT INTO modes (name, rollup) VALUES ('Collaboration', 'neutral')")
+    return focusbook_db
+
+
+def modes_by_name(summary):
+    return {mode["mode"]: (mode["rollup"], mode["time_ms"]) for mode in summary["modes"]}
+
+
+def test_category_without_default_mode_uses_the_dashboard_fallback(usage_db):
+    usage_db.add_usage("2026-05-04", 9, "Code", 60_000, category="Code")
+
+    summary = summarize_productivity("2026-05-04", "2026-05-04")
+
+    assert modes_by_name(summary) == {"Deep work": ("productive", 60_000)}
+    assert summary["verdicts"]["productive"]["total_ms"] == 60_000
+
+
+def test_modes_table_and_default_mode_win_over_the_fallbacks(usage_db):
+    usage_db.add_usage("2026-05-04", 9, "Zoom", 30_000, category="Meetings")
+
+    assert modes_by_name(summarize_productivity("2026-05-04", "2026-05-04")) == {
+        "Collaboration": ("neutral", 30_000),
+    }
+
+
+def test_unknown_category_is_neutral_break(usage_db):
+    usage_db.add_usage("2026-05-04", 9, "Tool", 10_000, category="Something new")
+    usage_db.add_usage("2026-05-04", 10, "Steam", 20_000, category="Games")
+
+    summary = summarize_productivity("2026-05-04", "2026-05-04")
+
+    assert modes_by_name(summary) == {"Break": ("neutral", 30_000)}
+    assert summary["verdicts"]["neutral"]["total_ms"] == 10_000
+    assert summary["verdicts"]["distracted"]["total_ms"] == 20_000
@@ -0,0 +1,70 @@
+# test_response_cache.py
+"""What the reply cache keys on, and its store / lookup round trip."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from response_cache import CachedQuestion, ResponseCache
+
+MODEL = "openai:gpt-test"
+
+
+@pytest.fixture
+def usage(focusbook_db):
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    focusbook_db.add_usage(yesterday, 9, "Code", 60_000)
+    return focusbook_db
+
+
+@pytest.fixture
+def cache(usage, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.db"), max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_rephrasings_that_normalize_alike_share_a_key(usage):
+    assert CachedQuestion("How productive was I yesterday?", MODEL).key == \
+        CachedQuestion("how productive was i   yesterday", MODEL).key
+
+
+def test_questions_about_today_or_no_period_are_not_cacheable(usage):
+    assert CachedQuestion("How productive was I today?", MODEL).key is None
+    assert CachedQuestion("How can I focus better?", MODEL).key is None
+
+
+def test_key_changes_with_the_model_and_the_range(usage):
+    key = CachedQuestion("How productive was I yesterday?", MODEL).key
+    assert CachedQuestion("How productive was I yesterday?", "gemini:gemini-test").key != key
+    assert CachedQuestion("How productive was I last week?", MODEL).key != key
+
+
+@pytest.mark.parametrize("change", [
+    "UPDATE app_usage SET time_spent = time_spent + 1",
+    "UPDATE app_usage SET category = 'Games'",
+    "INSERT INTO categories (name, type) VALUES ('Code', 'distracted')",
+    "INSERT INTO category (name, default_productivity) VALUES ('Coding', 'productive')",
+])
+def test_key_changes_with_the_data_behind_the_answer(usage, change):
+    key = CachedQuestion("How productive was I yesterday?", MODEL).key
+    usage.execute(change)
+    assert CachedQuestion("How productive was I yesterday?", MODEL).key != key
+
+
+def test_store_then_lookup(cache):
+    cached, reply = cache.lookup("How productive was I yesterday?", MODEL)
+    assert reply is None
+    cache.store(cached, "You were productive for 1m.")
+
+    _, reply = cache.lookup("how productive was I yesterday", MODEL)
+    assert reply == "You were productive for 1m."
+
+
+def test_uncacheable_and_empty_replies_are_not_stored(cache):
+    cached, _ = cache.lookup("How productive was I today?", MODEL)
+    cache.store(cached, "Today so far: 1m.")
+    assert cache.lookup("How productive was I today?", MODEL)[1] is None
+
+    cached, _ = cache.lookup("How productive was I yesterday?", MODEL)
+    cache.store(cached, "   ")
+    assert cache.lookup("How productive was I yesterday?", MODEL)[1] is None
@@ -0,0 +1,88 @@
+# test_rollup_cache.py
+"""Incremental refresh of the hourly usage rollup."""
+import pytest
+
+from rollup_cache import RollupCache
+
+
+@pytest.fixture
+def rollup(focusbook_db, tmp_path):
+    cache = RollupCache(focusbook_db.path, str(tmp_path / "rollup_cache.db"))
+    yield cache
+    cache.close()
+
+
+def totals(rollup, start_date="2026-01-01", end_date="2026-12-31"):
+    return {row["app_name"]: row["total_time"] for row in rollup.app_totals(start_date, end_date)}
+
+
+def test_first_build_aggregates_hours_and_skips_daily_rows(focusbook_db, rollup):
+    focusbook_db.add_usage("2026-05-04", 9, "Code", 60_000)
+    focusbook_db.add_usage("2026-05-04", 9, "Code", 30_000)
+    focusbook_db.add_usage("2026-05-04", 10, "Slack", 5_000, category="Communication")
+    focusbook_db.add_usage("2026-05-04", None, "Code", 999_999)  # daily aggregate
+
+    assert totals(rollup) == {"Code": 90_000, "Slack": 5_000}
+    rows = rollup.execute("SELECT hour, entry_count FROM usage_rollup WHERE app_name = 'Code'")
+    assert [(r["hour"], r["entry_count"]) for r in rows] == [(9, 2)]
+
+
+def test_inserted_rows_are_picked_up(focusbook_db, rollup):
+    focusbook_db.add_usage("2026-05-04", 9, "Code", 60_000)
+    rollup.refresh(force=True)
+
+    focusbook_db.add_usage("2026-05-05", 11, "Code", 15_000)
+    rollup.refresh(force=True)
+
+    assert totals(rollup, "2026-05-05", "2026-05-05") == {"Code": 15_000}
+    assert totals(rollup) == {"Code": 75_000}
+
+
+def test_rows_updated_in_place_are_reaggregated(focusbook_db, rollup):
+    row_id = focusbook_db.add_usage("2026-05-04", 9, "Code", 60_000)
+    focusbook_db.add_usage("2026-05-03", 9, "Code", 10_000)
+    rollup.refresh(force=True)
+
+    # The tracker grows time_spent and moves updated_at (JS ISO format) while the app stays focused
+    focusbook_db.execute(
+        "UPDATE app_usage SET time_spent = 120000, updated_at = '2099-01-01T00:00:00.000Z' WHERE id = ?",
+        (row_id,),
+    )
+    rollup.refresh(force=True)
+
+    assert totals(rollup, "2026-05-04", "2026-05-04") == {"Code": 120_000}
+    assert totals(rollup, "2026-05-03", "2026-05-03") == {"Code": 10_000}
+
+
+def test_deleted_rows_trigger_a_full_rebuild(focusbook_db, rollup):
+    focusbook_db.add_usage("2026-05-04", 9, "Code", 60_000)
+    row_id = focusbook_db.add_usage("2026-05-04", 10, "Slack", 5_000, category="Communication")
+    rollup.refresh(force=True)
+
+    focusbook_db.execute("DELETE FROM app_usage WHERE id = ?", (row_id,))
+    rollup.refresh(force=True)
+
+    assert totals(rollup) == {"Code": 60_000}
+
+
+def test_refresh_is_skipped_without_a_source_commit(focusbook_db, rollup):
+    focusbook_db.add_usage("2026-05-04", 9, "Code", 60_000)
+    rollup.refresh(force=True)
+    marks = rollup.execute("SELECT key, value FROM rollup_state ORDER BY key")
+
+    rollup.refresh()
+
+    assert rollup.execute("SELECT key, value FROM rollup_state ORDER BY key") == marks
+
+
+def test_state_survives_a_new_instance(focusbook_db, rollup, tmp_path):
+    focusbook_db.add_usage("2026-05-04", 9, "Code", 60_000)
+    rollup.refresh(force=True)
+    rollup.close()
+
+    focusbook_db.add_usage("2026-05-04", 10, "Code", 5_000)
+    reopened = RollupCache(focusbook_db.path, rollup.cache_path)
+    try:
+        assert totals(reopened) == {"Code": 65_000}
+    finally:
+        reopened.close()
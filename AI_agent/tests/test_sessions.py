@@ -0,0 +1,97 @@
+# test_sessions.py
+"""Conversation threads on the SQLite checkpointer, and the leases that serialize their turns."""
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+import sessions as sessions_module
+from sessions import ConversationLeases, ConversationSessions, open_checkpointer
+
+
+def build_graph(checkpointer):
+    graph = StateGraph(MessagesState)
+    graph.add_node("chat_node", lambda state: {})
+    graph.add_edge(START, "chat_node")
+    graph.add_edge("chat_node", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def test_has_turns_once_a_turn_is_recorded(tmp_path):
+    async def scenario():
+        async with open_checkpointer(str(tmp_path / "sessions.db")) as checkpointer:
+            sessions = ConversationSessions(checkpointer)
+            agent = build_graph(checkpointer)
+            assert not await sessions.has_turns("c1")
+
+            await agent.aupdate_state(
+                sessions.config("c1"),
+                {"messages": [HumanMessage(content="hi"), AIMessage(content="hello")]},
+                as_node="chat_node",
+            )
+            assert await sessions.has_turns("c1")
+            assert not await sessions.has_turns("c2")
+
+            await sessions.reset("c1")
+            assert not await sessions.has_turns("c1")
+
+    asyncio.run(scenario())
+
+
+def test_lease_is_exclusive_until_released(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker_a, worker_b = ConversationLeases(path), ConversationLeases(path)
+
+    assert worker_a.try_acquire("c1")
+    assert not worker_b.try_acquire("c1")
+    assert worker_b.try_acquire("c2")
+
+    # Only the owner's release frees the lease
+    worker_b.release("c1")
+    assert not worker_b.try_acquire("c1")
+    worker_a.release("c1")
+    assert worker_b.try_acquire("c1")
+
+
+def test_lease_of_a_crashed_worker_expires(tmp_path, monkeypatch):
+    path = str(tmp_path / "sessions.db")
+    monkeypatch.setattr(sessions_module, "LEASE_TTL_S", -1)
+    assert ConversationLeases(path).try_acquire("c1")
+    assert ConversationLeases(path).try_acquire("c1")
+
+
+def test_turns_of_one_conversation_never_overlap_across_workers(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    workers = [ConversationSessions(None, ConversationLeases(path)) for _ in range(2)]
+    events = []
+
+    async def turn(sessions, name):
+        async with sessions.lock("c1"):
+            events.append(("start", name))
+            await asyncio.sleep(0.05)
+            events.append(("end", name))
+
+    async def scenario():
+        await asyncio.gather(*(
+            turn(sessions, f"worker{index}-turn{number}") for index, sessions in enumerate(workers) for number in (1, 2)
+        ))
+
+    asyncio.run(scenario())
+    assert len(events) == 8
+    for position in range(0, 8, 2):
+        assert events[position][0] == "start" and events[position + 1] == ("end", events[position][1])
+
+
+def test_lease_is_renewed_while_a_long_turn_runs(tmp_path, monkeypatch):
+    path = str(tmp_path / "sessions.db")
+    monkeypatch.setattr(sessions_module, "LEASE_TTL_S", 0.3)
+    worker_a, worker_b = ConversationLeases(path), ConversationLeases(path)
+
+    async def scenario():
+        async with worker_a.hold("c1"):
+            # Three TTLs into the turn, the lease is still worker A's
+            await asyncio.sleep(0.9)
+            assert not await asyncio.to_thread(worker_b.try_acquire, "c1")
+        assert await asyncio.to_thread(worker_b.try_acquire, "c1")
+
+    asyncio.run(scenario())
@@ -0,0 +1,145 @@
+# test_span_resolver.py
+"""span_resolver.MatcherIndex against src/main/classification/resolver.js."""
+import json
+import os
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from span_resolver import MATCHER_SPECIFICITY, UNRATED, MatcherIndex
+
+RESOLVER_JS = os.path.join(
+    os.path.dirname(__file__), "..", "..", "src", "main", "classification", "resolver.js"
+)
+
+# Reads [{key, rules, categories, overrides}] on stdin, prints resolver.js's answers
+NODE_SCRIPT = """
+const { resolve } = require(process.argv[1])
+let input = ''
+process.stdin.on('data', (chunk) => (input += chunk))
+process.stdin.on('end', () => {
+  const out = JSON.parse(input).map((c) => {
+    const r = resolve(c.key, c.rules, c.categories, c.overrides)
+    return [r.category, r.productivity, r.winning_rule ? r.winning_rule.id : null]
+  })
+  process.stdout.write(JSON.stringify(out))
+})
+"""
+
+CATEGORIES = {
+    1: {"id": 1, "name": "Coding", "default_productivity": "productive"},
+    2: {"id": 2, "name": "Code Review", "default_productivity": "productive"},
+    3: {"id": 3, "name": "Communication", "default_productivity": "neutral"},
+    4: {"id": 4, "name": "Social", "default_productivity": "distracting"},
+    5: {"id": 5, "name": "Incomplete", "default_productivity": None},
+}
+
+APPS = ["code.exe", "vscode.exe", "slack.exe", "chrome.exe", "notion"]
+DOMAINS = ["github.com", "youtube.com", "docs.google.com", "x.com"]
+PATHS = [None, "/", "/acme", "/acme/repo/pulls", "/acme/repo/issues/7", "/watch", "/feed"]
+TITLES = [None, "PR #42 - review", "Daily standup", "Funny cats compilation", "index.js"]
+
+MATCHER_VALUES = {
+    "title_contains": ["review", "standup", "cats", "js"],
+    "app": ["code", "code.exe", "Slack.exe", "chrome.exe", "notion.exe"],
+    "domain": DOMAINS,
+    "domain_path_prefix": [
+        "github.com/acme", "github.com/acme/repo/pulls", "youtube.com/watch", "x.com", "github.com/",
+    ],
+    "domain_path_regex": [
+        r"github.com/^/acme/\w+/pulls", r"github.com/issues/\d+$", "youtube.com/watch",
+        "x.com/[", "x.com",
+    ],
+}
+
+
+def resolve_with_js(cases):
+    output = subprocess.run(
+        ["node", "-e", NODE_SCRIPT, os.path.abspath(RESOLVER_JS)],
+        input=json.dumps(cases), capture_output=True, text=True, check=True, timeout=60,
+    ).stdout
+    return [tuple(result) for result in json.loads(output)]
+
+
+def resolve_with_python(case):
+    categories = {int(k): v for k, v in case["categories"].items()}
+    overrides = {int(k): v for k, v in case["overrides"].items()}
+    index = MatcherIndex(case["rules"], categories, overrides)
+    key = case["key"]
+    category, productivity, winner = index.resolve(key["app"], key["domain"], key["path"], key["title"])
+    return category, productivity, winner["id"] if winner else None
+
+
+def random_case(rng):
+    rules = []
+    for rule_id in range(1, rng.randint(0, 8) + 1):
+        matcher_type = rng.choice(MATCHER_SPECIFICITY + ("unknown",))
+        rules.append({
+            "id": rule_id,
+            "matcher_type": matcher_type,
+            "matcher_value": rng.choice(MATCHER_VALUES.get(matcher_type, ["github.com"])),
+            "category_id": rng.choice(list(CATEGORIES)),
+            "is_user_rule": rng.random() < 0.3,
+        })
+    domain = rng.choice(DOMAINS + [None])
+    key = {
+        "app": rng.choice(APPS),
+        "domain": domain,
+        "path": rng.choice(PATHS) if domain else None,
+        "title": rng.choice(TITLES),
+    }
+    overrides = {3: "distracting"} if rng.random() < 0.3 else {}
+    return {"key": key, "rules": rules, "categories": CATEGORIES, "overrides": overrides}
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_matches_resolver_js_on_random_rule_sets():
+    rng = random.Random(1234)
+    cases = [random_case(rng) for _ in range(2000)]
+    # JSON object keys are strings on the way to node, so compare on the same input
+    cases = json.loads(json.dumps(cases))
+
+    expected = resolve_with_js(cases)
+    for case, js_result in zip(cases, expected):
+        assert resolve_with_python(case) == js_result, case
+
+
+def rule(rule_id, matcher_type, matcher_value, category_id, is_user_rule=False):
+    return {
+        "id": rule_id, "matcher_type": matcher_type, "matcher_value": matcher_value,
+        "category_id": category_id, "is_user_rule": is_user_rule,
+    }
+
+
+@pytest.mark.parametrize("order", [1, -1])
+def test_more_specific_rule_wins_in_any_order(order):
+    rules = [rule(10, "domain", "github.com", 1), rule(11, "domain_path_prefix", "github.com/acme/repo/pulls", 2)]
+    index = MatcherIndex(rules[::order], CATEGORIES, {})
+    assert index.resolve("chrome.exe", "github.com", "/acme/repo/pulls", None)[0] == "Code Review"
+
+
+@pytest.mark.parametrize("order", [1, -1])
+def test_user_rule_beats_builtin_at_equal_specificity(order):
+    rules = [rule(20, "app", "slack.exe", 3), rule(21, "app", "slack.exe", 4, is_user_rule=True)]
+    index = MatcherIndex(rules[::order], CATEGORIES, {})
+    assert index.resolve("slack.exe", None, None, "general")[0] == "Social"
+
+
+def test_no_match_is_unrated():
+    index = MatcherIndex([rule(30, "app", "code.exe", 1)], CATEGORIES, {})
+    assert index.resolve("some-random-internal-tool.exe", None, None, "x") == (None, UNRATED, None)
+
+
+def test_productivity_override_wins_over_category_default():
+    rules = [rule(50, "app", "slack.exe", 3)]
+    assert MatcherIndex(rules, CATEGORIES, {}).resolve("slack.exe", None, None, None)[1] == "neutral"
+    assert MatcherIndex(rules, CATEGORIES, {3: "distracting"}).resolve("slack.exe", None, None, None)[1] == "distracting"
+
+
+def test_app_match_is_whole_token_and_bad_regex_never_matches():
+    index = MatcherIndex([rule(1, "app", "code", 1), rule(2, "domain_path_regex", "x.com/[", 4)], CATEGORIES, {})
+    assert index.resolve("code.exe", None, None, None)[0] == "Coding"
+    assert index.resolve("vscode.exe", None, None, None)[0] is None
+    assert index.resolve("chrome.exe", "x.com", "/a", None)[0] is None
@@ -0,0 +1,94 @@
+# test_sql_guard.py
+"""Plan check, cursor paging and time budget of the query_sql guard."""
+import sqlite3
+
+import pytest
+
+import sql_guard
+from sql_guard import QueryRejected, QueryTimeout, has_order_by, run_guarded
+
+
+@pytest.fixture
+def conn(focusbook_db, monkeypatch):
+    monkeypatch.setattr(sql_guard, "LARGE_TABLE_ROWS", 50)
+    with focusbook_db.conn:
+        focusbook_db.conn.executemany(
+            "INSERT INTO app_usage (date, hour, app_name, time_spent, category) VALUES (?, ?, ?, ?, ?)",
+            [(f"2026-05-{day:02d}", hour, f"app{hour % 3}", 1000, "Code") for day in range(1, 11) for hour in range(24)],
+        )
+    conn = sqlite3.connect(f"file:{focusbook_db.path}?mode=ro", uri=True)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM app_usage",
+    "SELECT * FROM app_usage WHERE date != ''",
+    "SELECT * FROM app_usage WHERE substr(date, 1, 7) = '2026-05'",
+    "SELECT * FROM app_usage ORDER BY date",
+    # A date filter on one side of a self join does not bound the other side
+    "SELECT * FROM app_usage a, app_usage b WHERE a.date = '2026-05-01'",
+    "SELECT * FROM app_usage WHERE date LIKE '2026-05%'",
+    "SELECT * FROM [app_usage] [u] WHERE u.time_spent > 5",
+    "WITH x AS (SELECT * FROM app_usage) SELECT * FROM x JOIN x y USING (id)",
+])
+def test_scans_of_large_tables_are_rejected(conn, sql):
+    with pytest.raises(QueryRejected):
+        run_guarded(conn, sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM app_usage WHERE date = '2026-05-01'",
+    "SELECT app_name, SUM(time_spent) FROM app_usage WHERE date BETWEEN '2026-05-01' AND '2026-05-03' GROUP BY app_name",
+    "SELECT COUNT(*) FROM app_usage",
+    "WITH x AS (SELECT * FROM app_usage WHERE date = '2026-05-01') SELECT * FROM x JOIN x y USING (id)",
+    "SELECT * FROM categories",
+])
+def test_bounded_queries_run(conn, sql):
+    run_guarded(conn, sql)
+
+
+def page_through(conn, sql, max_rows):
+    rows, cursor = [], None
+    while True:
+        _, page, cursor = run_guarded(conn, sql, cursor=cursor, max_rows=max_rows)
+        rows.extend(tuple(row) for row in page)
+        if cursor is None:
+            return rows
+
+
+def test_unordered_query_pages_cover_every_row_once(conn):
+    sql = "SELECT app_name, hour FROM app_usage WHERE date = '2026-05-02'"
+    rows = page_through(conn, sql, max_rows=5)
+    assert rows == sorted(rows)
+    assert sorted(rows) == sorted(tuple(row) for row in conn.execute(sql))
+
+
+def test_query_order_by_is_kept(conn):
+    rows = page_through(conn, "SELECT hour FROM app_usage WHERE date = '2026-05-02' ORDER BY hour DESC", max_rows=7)
+    assert [hour for hour, in rows] == list(range(23, -1, -1))
+
+
+@pytest.mark.parametrize("sql, ordered", [
+    ("SELECT * FROM t ORDER BY a", True),
+    ("SELECT * FROM (SELECT * FROM t ORDER BY a)", False),
+    ("SELECT a, ROW_NUMBER() OVER (ORDER BY a) FROM t", False),
+    ("SELECT 'ORDER BY' FROM t -- ORDER BY a", False),
+])
+def test_has_order_by_ignores_subqueries_windows_and_literals(sql, ordered):
+    assert has_order_by(sql) is ordered
+
+
+def test_cursor_of_another_query_is_rejected(conn):
+    _, _, cursor = run_guarded(conn, "SELECT * FROM app_usage WHERE date = '2026-05-01'", max_rows=5)
+    with pytest.raises(QueryRejected):
+        run_guarded(conn, "SELECT * FROM app_usage WHERE date = '2026-05-02'", cursor=cursor, max_rows=5)
+
+
+def test_time_budget_interrupts_a_long_query(conn):
+    slow = (
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) "
+        "SELECT COUNT(*) FROM n"
+    )
+    with pytest.raises(QueryTimeout):
+        run_guarded(conn, slow, budget_s=0.2)
@@ -0,0 +1,131 @@
+# test_tool_cache.py
+"""Keying, expiry and data-version invalidation of the MCP tool result cache."""
+from datetime import datetime, timedelta
+
+import pytest
+
+import rollup_cache
+import tool_cache
+from rollup_cache import RollupCache
+from tool_cache import ToolResultCache, cached_tool, data_version, get_tool_cache
+
+PAST = "2026-05-04"
+
+
+def resolve_range(date=None, start_date=None, end_date=None, days=None):
+    if days:
+        end = datetime.now()
+        return (end - timedelta(days=days - 1)).strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+    if date:
+        return date, date
+    return start_date, end_date
+
+
+class RecordingTool(list):
+    """A cached tool over the test database; the list holds the calls that reached it."""
+
+    def __init__(self):
+        super().__init__()
+
+        @cached_tool(resolve_range=resolve_range)
+        def usage_tool(date: str = None, start_date: str = None, end_date: str = None, days: int = None) -> dict:
+            self.append((date, start_date, end_date, days))
+            if date == "bad":
+                return {"error": "bad date"}
+            return {"calls": len(self)}
+
+        self.tool = usage_tool
+
+
+@pytest.fixture
+def calls(focusbook_db, monkeypatch):
+    monkeypatch.setattr(rollup_cache, "REFRESH_INTERVAL_S", 0)
+    get_tool_cache().clear()
+    yield RecordingTool()
+    get_tool_cache().clear()
+
+
+def test_equivalent_arguments_share_an_entry(calls):
+    today = datetime.now().strftime("%Y-%m-%d")
+    assert calls.tool(days=1) == calls.tool(date=today) == calls.tool(start_date=today, end_date=today)
+    assert len(calls) == 1
+
+
+def test_past_results_are_dropped_when_past_rows_change(focusbook_db, calls):
+    row_id = focusbook_db.add_usage(PAST, 9, "Code", 60_000)
+    calls.tool(date=PAST)
+    calls.tool(date=PAST)
+    assert len(calls) == 1
+
+    focusbook_db.execute(
+        "UPDATE app_usage SET time_spent = 90000, updated_at = '2099-01-01 00:00:00' WHERE id = ?", (row_id,)
+    )
+    calls.tool(date=PAST)
+    assert len(calls) == 2
+
+
+def test_category_edits_change_the_version(focusbook_db, calls):
+    calls.tool(date=PAST)
+    focusbook_db.execute("INSERT INTO categories (name, type) VALUES ('Code', 'productive')")
+    calls.tool(date=PAST)
+    assert len(calls) == 2
+
+
+def test_error_results_are_not_cached(calls):
+    calls.tool(date="bad")
+    calls.tool(date="bad")
+    assert len(calls) == 2
+
+
+def test_live_entries_expire_and_past_entries_do_not(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(tool_cache.time, "monotonic", lambda: clock[0])
+    cache = ToolResultCache(max_entries=2, today_ttl=30)
+    cache.put("live", "a", version=1, live=True)
+    cache.put("past", "b", version=1, live=False)
+
+    clock[0] += 31
+    assert cache.get("live", 1) is None
+    assert cache.get("past", 1) == "b"
+    assert cache.get("past", 2) is None
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = ToolResultCache(max_entries=2)
+    cache.put("a", 1, version=0, live=False)
+    cache.put("b", 2, version=0, live=False)
+    cache.get("a", 0)
+    cache.put("c", 3, version=0, live=False)
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == 1
+
+
+def test_history_generation_is_shared_through_the_cache_file(focusbook_db, tmp_path):
+    """A bump made by one process's refresh is seen by another sharing the file."""
+    cache_path = str(tmp_path / "shared_cache.db")
+    first = RollupCache(focusbook_db.path, cache_path)
+    second = RollupCache(focusbook_db.path, cache_path)
+    try:
+        row_id = focusbook_db.add_usage(PAST, 9, "Code", 60_000)
+        before = second.history_generation()
+
+        focusbook_db.execute(
+            "UPDATE app_usage SET time_spent = 1, updated_at = '2099-01-01 00:00:00' WHERE id = ?", (row_id,)
+        )
+        first.refresh(force=True)
+        # second's own refresh is rate-limited here, yet it reads the bumped generation
+        assert second.history_generation() > before
+        assert second.history_generation() == first.history_generation()
+    finally:
+        first.close()
+        second.close()
+
+
+def test_data_version_includes_the_history_generation(focusbook_db, monkeypatch):
+    monkeypatch.setattr(rollup_cache, "REFRESH_INTERVAL_S", 0)
+    row_id = focusbook_db.add_usage(PAST, 9, "Code", 60_000)
+    before = data_version()
+    focusbook_db.execute(
+        "UPDATE app_usage SET time_spent = 1, updated_at = '2099-01-01 00:00:00' WHERE id = ?", (row_id,)
+    )
+    assert data_version() != before
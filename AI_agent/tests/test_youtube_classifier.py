@@ -0,0 +1,39 @@
+# test_youtube_classifier.py
+"""Verdict store lookups and the version cached YouTube totals are keyed on."""
+import pytest
+
+import youtube_classifier
+from youtube_classifier import (
+    EDUCATIONAL, ENTERTAINMENT, UNDECIDED, VerdictStore, classify_titles, record_verdicts, verdict_data_version
+)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = VerdictStore(str(tmp_path / "verdicts.db"))
+    monkeypatch.setattr(youtube_classifier, "_store", store)
+    yield store
+    store.close()
+
+
+def test_rule_verdicts_leave_the_version_alone(store):
+    before = verdict_data_version()
+    results = classify_titles(["Python tutorial for beginners - full course", "Some video"])
+    assert results["Python tutorial for beginners - full course"] == (EDUCATIONAL, "rules")
+    assert results["Some video"] == (UNDECIDED, None)
+    assert verdict_data_version() == before
+
+
+def test_recorded_verdicts_change_the_version_and_the_answer(store):
+    before = verdict_data_version()
+    recorded, ignored = record_verdicts({"Some video": "leisure", "Other video": "maybe"})
+    assert recorded == ["Some video"] and ignored == ["Other video"]
+    assert verdict_data_version() != before
+    assert classify_titles(["Some video"])["Some video"] == (ENTERTAINMENT, "llm")
+
+
+def test_replacing_a_verdict_changes_the_version(store):
+    record_verdicts({"Some video": "entertainment"})
+    before = verdict_data_version()
+    record_verdicts({"Some video": "educational"})
+    assert verdict_data_version() != before
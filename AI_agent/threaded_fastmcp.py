@@ -0,0 +1,37 @@
+# threaded_fastmcp.py
+"""
+FastMCP server whose synchronous tools run on worker threads.
+
+FastMCP starts a task per incoming request, but a plain `def` tool is called
+inline on the server's event loop, so two tool calls sent together (the agent's
+ToolNode sends every call of one LLM turn at once) still ran one after the
+other. ThreadedFastMCP runs each call on a worker thread instead: the tools only
+read SQLite (through db_pool's connection pool) or the locked in-process caches,
+so calls from one LLM turn overlap, and the event loop stays free to answer
+pings and other requests meanwhile.
+
+Each worker thread keeps one event loop for running FastMCP's call_tool
+coroutine, so the per-call cost is a thread hand-off, not a new loop.
+"""
+import asyncio
+import threading
+
+import anyio
+from mcp.server.fastmcp import FastMCP
+
+_worker_state = threading.local()
+
+
+def run_on_worker_loop(coroutine):
+    """Run a coroutine to completion on the calling worker thread's own event loop."""
+    loop = getattr(_worker_state, "loop", None)
+    if loop is None:
+        loop = _worker_state.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coroutine)
+
+
+class ThreadedFastMCP(FastMCP):
+    """FastMCP that runs every tool call on a worker thread."""
+
+    async def call_tool(self, name, arguments):
+        return await anyio.to_thread.run_sync(run_on_worker_loop, super().call_tool(name, arguments))
@@ -0,0 +1,146 @@
+# tool_cache.py
+"""
+In-process cache of MCP tool results, keyed by the tool's normalized arguments.
+
+Past ranges live until the data version changes; ranges that include today expire after TODAY_TTL_S.
+"""
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from db_pool import db_connection
+from rollup_cache import get_rollup_cache
+
+TOOL_CACHE_SIZE = int(os.getenv("FOCUSBOOK_TOOL_CACHE_SIZE", "256"))
+TODAY_TTL_S = float(os.getenv("FOCUSBOOK_TOOL_CACHE_TODAY_TTL_S", "30"))
+
+DATE_ARGS = ("date", "start_date", "end_date", "days")
+
+# Category and mode settings change a verdict without touching app_usage. Both
+# tables hold a handful of rows, so fingerprinting their content is cheap.
+CLASSIFICATION_FINGERPRINT_SQL = """
+SELECT (SELECT group_concat(name || ':' || type || ':' || COALESCE(default_mode, ''), '|') FROM categories),
+       (SELECT group_concat(name || ':' || rollup, '|') FROM modes)
+"""
+
+
+def data_version():
+    """Version of everything cached results depend on (cheap when nothing changed)."""
+    generation = get_rollup_cache().history_generation()
+    with db_connection() as conn:
+        fingerprint = tuple(conn.execute(CLASSIFICATION_FINGERPRINT_SQL).fetchone())
+    return generation, fingerprint
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and a trailing ';' so trivially different SQL shares a key."""
+    return " ".join(str(sql).split()).rstrip(";").strip()
+
+
+class ToolResultCache:
+    """LRU of tool results with per-entry expiry and data-version invalidation."""
+
+    def __init__(self, max_entries=TOOL_CACHE_SIZE, today_ttl=TODAY_TTL_S):
+        self.max_entries = max_entries
+        self.today_ttl = today_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        """The cached result for key, or None when missing, expired or stale."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, entry_version, expires_at = entry
+                if entry_version == version and (expires_at is None or time.monotonic() < expires_at):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version, live):
+        """Store a result; live results (covering today) expire after today_ttl."""
+        expires_at = time.monotonic() + self.today_ttl if live else None
+        with self._lock:
+            self._entries[key] = (value, version, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = ToolResultCache()
+
+
+def get_tool_cache():
+    """Return the process-wide tool result cache."""
+    return _cache
+
+
+def cached_tool(resolve_range=None, extra_version=None):
+    """
+    Cache a tool's results in the process-wide ToolResultCache.
+
+    Args:
+        resolve_range: Callable turning the tool's date arguments (passed as
+            keywords) into an inclusive (start_date, end_date). Tools without
+            date arguments are cached as "live" results.
+        extra_version: Callable returning a version of further tables the tool
+            reads (outside app_usage / categories / modes); a change drops its results.
+
+    Returns:
+        A decorator. The wrapper keeps the tool's signature, so it can sit under
+        @mcp.tool().
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        date_params = [name for name in DATE_ARGS if name in signature.parameters]
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+
+            live = True
+            if resolve_range is not None and date_params:
+                start_date, end_date = resolve_range(**{name: arguments.pop(name) for name in date_params})
+                arguments["_range"] = (start_date, end_date)
+                live = end_date >= datetime.now().strftime("%Y-%m-%d")
+            if "sql" in arguments:
+                arguments["sql"] = normalize_sql(arguments["sql"])
+
+            key = (fn.__name__, tuple(sorted(arguments.items())))
+            try:
+                version = data_version()
+                if extra_version is not None:
+                    version = (version, extra_version())
+            except Exception as e:
+                # Without a version there is nothing to validate against: run uncached
+                print(f"Tool cache disabled for this call: {e}", file=sys.stderr)
+                return fn(*args, **kwargs)
+
+            result = _cache.get(key, version)
+            if result is not None:
+                return result
+
+            result = fn(*args, **kwargs)
+            if not (isinstance(result, dict) and "error" in result):
+                _cache.put(key, result, version, live)
+            return result
+
+        return wrapper
+
+    return decorator
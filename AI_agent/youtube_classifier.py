@@ -0,0 +1,280 @@
+# youtube_classifier.py
+"""
+Educational vs entertainment verdicts for YouTube titles, decided once per title.
+
+get_youtube_categorized_data used to ship every YouTube session to the LLM and
+ask it to classify each title, so the same videos were re-classified in every
+conversation. Titles are now resolved in three steps:
+
+1. The verdict store: a title -> verdict table in the AI side cache database
+   (see db_pool.get_cache_db_path). Every title ever decided is answered here.
+2. Keyword rules: weighted educational / entertainment phrases. A title is
+   decided when one side wins by at least DECISION_MARGIN; the verdict is stored.
+3. The LLM, only for titles the rules cannot decide: the tool returns them as
+   undecided, the agent classifies them and calls record_youtube_verdicts, which
+   stores the verdicts (source 'llm') so they are never asked again.
+"""
+import re
+import sqlite3
+import threading
+import time
+
+from db_pool import get_cache_db_path
+
+EDUCATIONAL = "educational"
+ENTERTAINMENT = "entertainment"
+UNDECIDED = "undecided"
+VERDICTS = (EDUCATIONAL, ENTERTAINMENT)
+
+# Words the agent may use for a verdict, mapped to the stored value
+VERDICT_ALIASES = {
+    "educational": EDUCATIONAL,
+    "education": EDUCATIONAL,
+    "productive": EDUCATIONAL,
+    "learning": EDUCATIONAL,
+    "entertainment": ENTERTAINMENT,
+    "unproductive": ENTERTAINMENT,
+    "distracting": ENTERTAINMENT,
+    "leisure": ENTERTAINMENT,
+}
+
+# Score difference needed for the rules to decide a title
+DECISION_MARGIN = 2
+
+EDUCATIONAL_KEYWORDS = {
+    "tutorial": 3, "course": 3, "full course": 4, "crash course": 4, "lecture": 4, "lesson": 3,
+    "how to": 2, "explained": 2, "explainer": 2, "introduction to": 3, "intro to": 3,
+    "for beginners": 3, "learn": 2, "learning": 2, "guide": 2, "walkthrough": 1, "deep dive": 2,
+    "documentary": 2, "masterclass": 3, "workshop": 3, "webinar": 3, "conference": 2, "keynote": 2,
+    "talk": 1, "interview prep": 3, "system design": 3, "algorithm": 3, "data structures": 3,
+    "programming": 3, "coding": 2, "python": 2, "javascript": 2, "typescript": 2, "react": 2,
+    "java": 1, "rust": 1, "golang": 2, "sql": 2, "machine learning": 3, "deep learning": 3,
+    "calculus": 3, "algebra": 3, "physics": 3, "chemistry": 3, "biology": 3, "statistics": 3,
+    "economics": 2, "history of": 2, "science": 2, "math": 2, "mathematics": 3, "study with me": 2,
+    "exam": 2, "mit opencourseware": 4, "khan academy": 4, "freecodecamp": 4, "cs50": 4,
+    "3blue1brown": 4, "fireship": 2, "in 100 seconds": 3, "lecture notes": 3,
+}
+
+ENTERTAINMENT_KEYWORDS = {
+    "funny": 3, "prank": 4, "meme": 3, "memes": 3, "compilation": 2, "reaction": 3, "reacts": 3,
+    "try not to laugh": 4, "fails": 3, "comedy": 3, "stand-up": 3, "standup": 3, "sketch": 2,
+    "music video": 4, "official video": 3, "official audio": 3, "lyrics": 3, "lyric video": 3,
+    "remix": 3, "live performance": 2, "concert": 2, "playlist": 1, "gameplay": 4, "let's play": 4,
+    "lets play": 4, "speedrun": 3, "minecraft": 3, "fortnite": 3, "gta": 3, "gaming": 3,
+    "trailer": 3, "teaser": 2, "movie": 2, "episode": 2, "season": 1, "highlights": 3,
+    "vlog": 3, "unboxing": 2, "asmr": 4, "mukbang": 4, "challenge": 2, "#shorts": 3, "shorts": 2,
+    "cats": 2, "dogs": 2, "tiktok": 3, "drama": 2, "gossip": 3, "celebrity": 2, "football": 2,
+    "nba": 2, "match highlights": 4, "podcast clips": 2,
+}
+
+# Browser suffixes and notification counters that are not part of a video title
+TITLE_NOISE = (
+    re.compile(r"^\(\d+\)\s*"),
+    re.compile(r"\s+-\s+(?:google chrome|mozilla firefox|microsoft\W+edge|brave|opera|safari)$", re.IGNORECASE),
+    re.compile(r"\s+-\s+youtube\b.*$", re.IGNORECASE),
+)
+
+# What the YouTube home page / feed reports as its title; feed browsing counts as entertainment
+HOME_FEED_TITLES = {"", "youtube", "youtube.com", "www.youtube.com"}
+HOME_FEED_TITLE = "YouTube (home / feed)"
+
+
+def _keyword_patterns(keywords):
+    return [
+        (re.compile(r"(?<!\w)" + re.escape(keyword) + r"(?!\w)"), weight)
+        for keyword, weight in keywords.items()
+    ]
+
+
+EDUCATIONAL_PATTERNS = _keyword_patterns(EDUCATIONAL_KEYWORDS)
+ENTERTAINMENT_PATTERNS = _keyword_patterns(ENTERTAINMENT_KEYWORDS)
+
+VERDICT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS youtube_title_verdicts (
+    title_key TEXT PRIMARY KEY,      -- normalized, lowercased title
+    title TEXT NOT NULL,
+    verdict TEXT NOT NULL CHECK (verdict IN ('educational', 'entertainment')),
+    source TEXT NOT NULL,            -- 'rules' or 'llm'
+    score INTEGER,
+    created_at REAL NOT NULL
+);
+"""
+
+VERDICT_VERSION_SQL = "SELECT COUNT(*), MAX(created_at) FROM youtube_title_verdicts WHERE source = 'llm'"
+
+
+def clean_title(description, app_name=None):
+    """Display title of a YouTube row (window title without browser/YouTube suffixes)."""
+    title = (description or "").strip() or (app_name or "").strip()
+    for pattern in TITLE_NOISE:
+        title = pattern.sub("", title)
+    title = " ".join(title.split())
+    if title.lower() in HOME_FEED_TITLES:
+        return HOME_FEED_TITLE
+    return title
+
+
+def title_key(title):
+    """Cache key of a cleaned title."""
+    return title.lower()
+
+
+def normalize_verdict(value):
+    """Map a verdict word to 'educational' / 'entertainment', or None if unknown."""
+    return VERDICT_ALIASES.get(str(value or "").strip().lower())
+
+
+def classify_title(title):
+    """
+    Decide a title with the keyword rules.
+
+    Returns:
+        (verdict, score) - verdict is UNDECIDED when neither side wins by
+        DECISION_MARGIN; score is educational minus entertainment weight
+    """
+    if title == HOME_FEED_TITLE:
+        return ENTERTAINMENT, -DECISION_MARGIN
+
+    lowered = title.lower()
+    educational = sum(weight for pattern, weight in EDUCATIONAL_PATTERNS if pattern.search(lowered))
+    entertainment = sum(weight for pattern, weight in ENTERTAINMENT_PATTERNS if pattern.search(lowered))
+    score = educational - entertainment
+    if score >= DECISION_MARGIN:
+        return EDUCATIONAL, score
+    if score <= -DECISION_MARGIN:
+        return ENTERTAINMENT, score
+    return UNDECIDED, score
+
+
+class VerdictStore:
+    """Title -> verdict table in the side cache database."""
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.cache_path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(VERDICT_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, keys):
+        """Stored {title_key: (verdict, source)} for the given keys."""
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                for key, verdict, source in conn.execute(
+                    f"SELECT title_key, verdict, source FROM youtube_title_verdicts WHERE title_key IN ({placeholders})",
+                    chunk,
+                ):
+                    found[key] = (verdict, source)
+        return found
+
+    def save(self, entries, replace=False):
+        """Store (title, verdict, source, score) tuples; keeps existing verdicts unless replace."""
+        if not entries:
+            return
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    f"{verb} INTO youtube_title_verdicts (title_key, title, verdict, source, score, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(title_key(title), title, verdict, source, score, now) for title, verdict, source, score in entries],
+                )
+
+    def version(self):
+        """Changes whenever an LLM verdict is recorded (rule verdicts never change a result)."""
+        with self._lock:
+            return tuple(self._connect().execute(VERDICT_VERSION_SQL).fetchone())
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_verdict_store():
+    """Return the process-wide verdict store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = VerdictStore(get_cache_db_path())
+        return _store
+
+
+def verdict_data_version():
+    """Version of the verdict store, for tool_cache.cached_tool(extra_version=...)."""
+    return get_verdict_store().version()
+
+
+def classify_titles(titles):
+    """
+    Resolve titles to verdicts: stored verdicts first, then the keyword rules.
+
+    Args:
+        titles: Iterable of cleaned titles
+
+    Returns:
+        {title: (verdict, source)} - source is 'llm', 'rules' or None for UNDECIDED
+    """
+    titles = list(dict.fromkeys(titles))
+    store = get_verdict_store()
+    stored = store.lookup(title_key(title) for title in titles)
+
+    results = {}
+    decided = []
+    for title in titles:
+        hit = stored.get(title_key(title))
+        if hit is not None:
+            results[title] = hit
+            continue
+        verdict, score = classify_title(title)
+        if verdict == UNDECIDED:
+            results[title] = (UNDECIDED, None)
+        else:
+            results[title] = (verdict, "rules")
+            decided.append((title, verdict, "rules", score))
+
+    store.save(decided)
+    return results
+
+
+def record_verdicts(verdicts):
+    """
+    Store verdicts decided by the LLM (they override rule verdicts).
+
+    Args:
+        verdicts: {title: verdict word}
+
+    Returns:
+        (recorded titles, ignored titles)
+    """
+    entries = []
+    ignored = []
+    for title, value in verdicts.items():
+        verdict = normalize_verdict(value)
+        title = clean_title(title)
+        if verdict is None or not title:
+            ignored.append(title)
+            continue
+        entries.append((title, verdict, "llm", None))
+    get_verdict_store().save(entries, replace=True)
+    return [entry[0] for entry in entries], ignored
@@ -5,7 +5,7 @@
  * - Find an open TCP port and start the AI service on it
  * - Determine dev vs prod executable (Python venv vs bundled binary)
  * - Wire environment variables (FOCUSBOOK_DB_PATH, OPENAI_API_KEY)
- * - Probe health (/docs) and auto-restart on crashes or failed health checks
+ * - Probe readiness (/ready) and auto-restart on crashes or failed health checks
  * - Expose a small HTTP client for /chat requests
  *
  * Notes:
@@ -19,6 +19,10 @@ const fs = require('fs')
 const { app } = require('electron')
 const net = require('net')
 
+// Startup readiness polling: every 250ms for up to 30s
+const READY_POLL_INTERVAL_MS = 250
+const READY_POLL_ATTEMPTS = 120
+
 /**
  * @typedef {Object} ServiceStatus
  * @property {boolean} isRunning - Whether the service process is considered running.
@@ -274,21 +278,18 @@ class AIServiceManager {
         }
       })
 
-      // Wait longer for the service to fully start (MCP setup takes time)
-      await new Promise(resolve => setTimeout(resolve, 8000))
-      
-      // Try health check multiple times
+      // The service binds its port right away and builds the agent in the
+      // background; poll /ready until it reports the agent can answer.
       let isHealthy = false
-      for (let i = 0; i < 5; i++) {
+      for (let i = 0; i < READY_POLL_ATTEMPTS; i++) {
         isHealthy = await this.checkHealth()
         if (isHealthy) break
-        console.log(`Health check attempt ${i + 1}/5 failed, retrying...`)
-        await new Promise(resolve => setTimeout(resolve, 2000))
+        await new Promise(resolve => setTimeout(resolve, READY_POLL_INTERVAL_MS))
       }
       
       // Gate isRunning on a real health check. Previously this was set true
       // regardless, so sendMessage would accept requests and then fail on the
-      // HTTP call. Now the service is only "running" once /docs responds.
+      // HTTP call. Now the service is only "running" once /ready returns 200.
       this.isStarting = false
       this.isRunning = isHealthy
       this.retryCount = 0
@@ -358,7 +359,8 @@ class AIServiceManager {
 
   /**
    * Check if the AI service is healthy
-  * Performs a GET /docs against the local service with a short timeout.
+  * Performs a GET /ready against the local service with a short timeout.
+  * /ready answers 503 while the agent is still starting (or failed to start).
   * @returns {Promise<boolean>} True when HTTP 200 is returned; false otherwise.
    */
   async checkHealth() {
@@ -369,10 +371,11 @@ class AIServiceManager {
       const req = http.request({
         hostname: '127.0.0.1',
         port: this.port,
-        path: '/docs',
+        path: '/ready',
         method: 'GET',
         timeout: 2000
       }, (res) => {
+        res.resume()
         resolve(res.statusCode === 200)
       })
 